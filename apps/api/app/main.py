@@ -1,9 +1,16 @@
+import logging
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.quiz import router as quiz_router
 from app.routes.cache import router as cache_router
 from app.routes.results import router as results_router
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+
 app = FastAPI()
 
 # Configure CORS
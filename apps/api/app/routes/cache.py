@@ -1,14 +1,40 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Response
+from typing import List, Optional
 from pydantic import BaseModel, Field
-import time
+from src.core.session_store import create_session_store
+from src.core.payloads import SessionPayloadCache
+import logging
+import os
 
 router = APIRouter(prefix="/api")
 
-# In-memory cache to store quiz data
-quiz_cache: Dict[str, dict] = {}
-cache_expiration: Dict[str, float] = {}  # Store expiration timestamps
+logger = logging.getLogger(__name__)
+
 CACHE_DURATION = 7200  # 2 hours in seconds
+MAX_CACHE_ENTRIES = 50000
+MAX_CACHE_BYTES = 256 * 1024 * 1024  # 256 MB
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "memory://")  # Shared store for multiple workers
+
+# Question sets are stored once and shared with the results cache
+question_sets = create_session_store(
+    SESSION_STORE_URL,
+    ttl=CACHE_DURATION,
+    namespace="questions",
+    max_entries=MAX_CACHE_ENTRIES,
+    max_bytes=MAX_CACHE_BYTES,
+)
+
+# Cache to store quiz data as pre-encoded payloads, expired and least recently used sessions are evicted
+quiz_cache = SessionPayloadCache(
+    create_session_store(
+        SESSION_STORE_URL,
+        ttl=CACHE_DURATION,
+        namespace="quiz",
+        max_entries=MAX_CACHE_ENTRIES,
+        max_bytes=MAX_CACHE_BYTES,
+    ),
+    question_sets,
+)
 
 class QuizOption(BaseModel):
     question: str
@@ -51,51 +77,38 @@ class CacheRequest(BaseModel):
             }
         }
 
+# Plain functions run in Starlette's threadpool, so session store round trips do not block the event loop
 @router.post("/cache")
-async def save_quiz_cache(data: CacheRequest):
+def save_quiz_cache(data: CacheRequest):
     """Save quiz data to cache with 2-hour expiration"""
-    print(f"Received cache request for session {data.session_id}")
-    print(f"Request data: {data.dict()}")
+    logger.debug("Received cache request for session %s", data.session_id)
     
-    quiz_cache[data.session_id] = {
+    quiz_cache.save(data.session_id, {
         "questions": [q.dict() for q in data.questions],
         "metadata": data.metadata.dict(by_alias=True)
-    }
-    cache_expiration[data.session_id] = time.time() + CACHE_DURATION
+    })
     
-    print(f"Cache saved successfully for session {data.session_id}")
+    logger.debug("Cache saved successfully for session %s", data.session_id)
     return {"message": "Cache saved successfully"}
 
 @router.get("/cache")
-async def get_quiz_cache(session_id: str):
+def get_quiz_cache(session_id: str):
     """Retrieve quiz data from cache if not expired"""
-    print(f"Getting cache for session {session_id}")
-    
-    # Clean expired caches
-    current_time = time.time()
-    expired_sessions = [
-        sid for sid, exp_time in cache_expiration.items()
-        if current_time > exp_time
-    ]
-    for sid in expired_sessions:
-        quiz_cache.pop(sid, None)
-        cache_expiration.pop(sid, None)
+    logger.debug("Getting cache for session %s", session_id)
 
-    # Check if session exists and is not expired
-    if session_id not in quiz_cache or current_time > cache_expiration.get(session_id, 0):
+    # Expired sessions are never returned, the store evicts them in the background
+    cached_data = quiz_cache.load(session_id)
+    if cached_data is None:
         raise HTTPException(status_code=404, detail="Cache not found or expired")
 
-    cached_data = quiz_cache[session_id]
-    print(f"Found cache for session {session_id}: {cached_data}")
-    return cached_data
+    logger.debug("Found cache for session %s (%d bytes)", session_id, len(cached_data))
+    return Response(content=cached_data, media_type="application/json")
 
 @router.delete("/cache")
-async def delete_quiz_cache(session_id: str):
+def delete_quiz_cache(session_id: str):
     """Delete quiz data from cache"""
-    print(f"Deleting cache for session {session_id}")
-    if session_id in quiz_cache:
-        quiz_cache.pop(session_id)
-        cache_expiration.pop(session_id, None)
-        print(f"Cache deleted successfully for session {session_id}")
+    logger.debug("Deleting cache for session %s", session_id)
+    if quiz_cache.delete(session_id):
+        logger.debug("Cache deleted successfully for session %s", session_id)
         return {"message": "Cache deleted successfully"}
     raise HTTPException(status_code=404, detail="Cache not found")
\ No newline at end of file
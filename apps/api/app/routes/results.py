@@ -1,14 +1,32 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Response
+from typing import List, Optional
 from pydantic import BaseModel, Field
-import time
+from src.core.session_store import create_session_store
+from src.core.payloads import SessionPayloadCache
+from app.routes.cache import question_sets
+import logging
+import os
 
 router = APIRouter(prefix="/api")
 
-# In-memory cache to store results data
-results_cache: Dict[str, dict] = {}
-results_cache_expiration: Dict[str, float] = {}  # Store expiration timestamps
+logger = logging.getLogger(__name__)
+
 CACHE_DURATION = 7200  # 2 hours in seconds
+MAX_CACHE_ENTRIES = 50000
+MAX_CACHE_BYTES = 256 * 1024 * 1024  # 256 MB
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "memory://")  # Shared store for multiple workers
+
+# Cache to store results data as pre-encoded payloads, expired and least recently used sessions are evicted
+results_cache = SessionPayloadCache(
+    create_session_store(
+        SESSION_STORE_URL,
+        ttl=CACHE_DURATION,
+        namespace="result",
+        max_entries=MAX_CACHE_ENTRIES,
+        max_bytes=MAX_CACHE_BYTES,
+    ),
+    question_sets,
+)
 
 class QuizOption(BaseModel):
     question: str
@@ -34,47 +52,35 @@ class ResultsData(BaseModel):
     userName: str
     userAnswers: List[int]
 
+# Plain functions run in Starlette's threadpool, so session store round trips do not block the event loop
 @router.post("/cache/results/{session_id}")
-async def save_results_cache(session_id: str, data: ResultsData):
+def save_results_cache(session_id: str, data: ResultsData):
     """Save results data to cache with 2-hour expiration"""
-    print(f"Received results cache request for session {session_id}")
+    logger.debug("Received results cache request for session %s", session_id)
     
-    results_cache[session_id] = data.dict()
-    results_cache_expiration[session_id] = time.time() + CACHE_DURATION
+    results_cache.save(session_id, data.dict())
     
-    print(f"Results cache saved successfully for session {session_id}")
+    logger.debug("Results cache saved successfully for session %s", session_id)
     return {"message": "Results cache saved successfully"}
 
 @router.get("/cache/results/{session_id}")
-async def get_results_cache(session_id: str):
+def get_results_cache(session_id: str):
     """Retrieve results data from cache if not expired"""
-    print(f"Getting results cache for session {session_id}")
-    
-    # Clean expired caches
-    current_time = time.time()
-    expired_sessions = [
-        sid for sid, exp_time in results_cache_expiration.items()
-        if current_time > exp_time
-    ]
-    for sid in expired_sessions:
-        results_cache.pop(sid, None)
-        results_cache_expiration.pop(sid, None)
+    logger.debug("Getting results cache for session %s", session_id)
 
-    # Check if session exists and is not expired
-    if session_id not in results_cache or current_time > results_cache_expiration.get(session_id, 0):
+    # Expired sessions are never returned, the store evicts them in the background
+    cached_data = results_cache.load(session_id)
+    if cached_data is None:
         raise HTTPException(status_code=404, detail="Results cache not found or expired")
 
-    cached_data = results_cache[session_id]
-    print(f"Found results cache for session {session_id}")
-    return cached_data
+    logger.debug("Found results cache for session %s (%d bytes)", session_id, len(cached_data))
+    return Response(content=cached_data, media_type="application/json")
 
 @router.delete("/cache/results/{session_id}")
-async def delete_results_cache(session_id: str):
+def delete_results_cache(session_id: str):
     """Delete results data from cache"""
-    print(f"Deleting results cache for session {session_id}")
-    if session_id in results_cache:
-        results_cache.pop(session_id)
-        results_cache_expiration.pop(session_id, None)
-        print(f"Results cache deleted successfully for session {session_id}")
+    logger.debug("Deleting results cache for session %s", session_id)
+    if results_cache.delete(session_id):
+        logger.debug("Results cache deleted successfully for session %s", session_id)
         return {"message": "Results cache deleted successfully"}
     raise HTTPException(status_code=404, detail="Results cache not found")
\ No newline at end of file
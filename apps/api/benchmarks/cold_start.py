@@ -0,0 +1,160 @@
+"""
+Measures cold starts of src/main.py: every run starts a fresh server process and
+times, from the moment the process is spawned, the first response (GET /) and the
+first quiz generated from a small PDF, against the local fake OpenAI API
+(benchmarks/fake_openai.py).
+
+Modes:
+- eager: the server imports openai, httpx and sse_starlette before the app, as the
+  app did before they were loaded lazily;
+- lazy: the app as is, heavy dependencies are loaded by the first quiz request;
+- warmup: the app as is, GET /warmup is called right after the first response and
+  before the first quiz request.
+
+Usage (from apps/api):
+    python benchmarks/cold_start.py [--runs 5] [--pages 2] [--modes eager lazy warmup]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCHMARKS_DIR, "..")
+SRC_DIR = os.path.join(API_DIR, "src")
+
+# Imported before the app in eager mode: the modules main.py used to import at startup
+EAGER_IMPORTS = ["openai", "httpx", "sse_starlette.sse"]
+
+
+def serve(mode: str, port: int) -> None:
+    """
+    Server process: imports the app (after EAGER_IMPORTS in eager mode) and serves it
+    """
+    import importlib
+
+    sys.path.insert(0, SRC_DIR)
+    if mode == "eager":
+        for module in EAGER_IMPORTS:
+            importlib.import_module(module)
+    import uvicorn
+
+    import main
+
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="error")
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def cold_start(mode: str, pdf: bytes, env: dict, num_questions: int) -> dict:
+    import httpx
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", mode, str(port)], env=env)
+    try:
+        with httpx.Client(base_url=base_url, timeout=120) as client:
+            while True:
+                try:
+                    client.get("/").raise_for_status()
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.005)
+            first_response = time.perf_counter() - started
+
+            run = {"first_response_seconds": first_response}
+            if mode == "warmup":
+                warmup_started = time.perf_counter()
+                warmup = client.get("/warmup").json()
+                run["warmup_seconds"] = time.perf_counter() - warmup_started
+                run["warmup_errors"] = warmup["errors"]
+
+            quiz_started = time.perf_counter()
+            response = client.post("/generate-quiz", params={"num_questions": num_questions},
+                                   files={"file": ("cold.pdf", pdf, "application/pdf")})
+            response.raise_for_status()
+            run["first_quiz_seconds"] = time.perf_counter() - quiz_started
+            run["first_quiz_after_spawn_seconds"] = time.perf_counter() - started
+            return run
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def make_pdf(pages: int) -> bytes:
+    import fitz  # PyMuPDF
+
+    document = fitz.open()
+    for number in range(pages):
+        page = document.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 545, 792), f"Chapter {number + 1}\n\n" + (
+            "Photosynthesis converts light energy into chemical energy stored in glucose. "
+            "Chlorophyll absorbs mostly blue and red light and reflects green light. ") * 8, fontsize=10)
+    content = document.tobytes()
+    document.close()
+    return content
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--serve":
+        serve(sys.argv[2], int(sys.argv[3]))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per mode")
+    parser.add_argument("--pages", type=int, default=2, help="Pages of the uploaded PDF")
+    parser.add_argument("--num-questions", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=["eager", "lazy", "warmup"],
+                        choices=["eager", "lazy", "warmup"])
+    args = parser.parse_args()
+
+    sys.path.insert(0, BENCHMARKS_DIR)
+    from fake_openai import FakeOpenAI, start_server
+
+    fake_server, fake_url = start_server(FakeOpenAI(latency=0.0).app)
+    pdf = make_pdf(args.pages)
+    report = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                **os.environ,
+                "OPENAI_BASE_URL": fake_url,
+                "OPENAI_API_KEY": "benchmark",
+                "QUIZ_CACHE_BACKEND": "memory",
+                "SUMMARY_CACHE_BACKEND": "memory",
+                "SESSION_STORE_URL": "memory://",
+                "QUESTION_BANK_PATH": os.path.join(directory, "bank.sqlite3"),
+                "LOG_LEVEL": "WARNING",
+            }
+            for mode in args.modes:
+                runs = []
+                for run in range(args.runs):
+                    # Every run gets an empty question bank, so the quiz is generated
+                    env["QUESTION_BANK_PATH"] = os.path.join(directory, f"bank-{mode}-{run}.sqlite3")
+                    runs.append(cold_start(mode, pdf, env, args.num_questions))
+                summary = {"mode": mode, "runs": args.runs}
+                for key in runs[0]:
+                    if key.endswith("_seconds"):
+                        summary[f"{key[:-len('_seconds')]}_p50_ms"] = round(
+                            statistics.median(run[key] for run in runs) * 1000, 1)
+                errors = {error for run in runs for error in run.get("warmup_errors", {})}
+                if errors:
+                    summary["warmup_errors"] = sorted(errors)
+                report.append(summary)
+    finally:
+        fake_server.should_exit = True
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
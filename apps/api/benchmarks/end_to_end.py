@@ -0,0 +1,318 @@
+"""
+Offline end-to-end benchmark of the API: runs the FastAPI apps in-process against a
+deterministic local fake of the OpenAI chat completions API (benchmarks/fake_openai.py)
+and reports p50/p95 latency and requests/sec per endpoint and concurrency level.
+
+Scenarios:
+- src/main.py: quiz generation from synthetic PDFs of several sizes (unique PDFs, so
+  every request runs the whole pipeline; the same PDF, served from the quiz cache;
+  and the streamed endpoint), then quiz and result cache save/get.
+- app/main.py: quiz and result cache save/get. Its quiz router (app.routes.quiz) is
+  not part of the tree, so the app is assembled from the routers that exist.
+
+Output is JSON (--output to write it to a file); --compare prints the change of
+each scenario against a previous run.
+
+Usage (from apps/api):
+    python benchmarks/end_to_end.py [--concurrency 1 8 32] [--generate-requests 24]
+        [--cache-requests 400] [--sizes 2 20 100] [--llm-latency 0.05] [--output run.json]
+        [--compare previous.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCHMARKS_DIR, "..")
+sys.path.insert(0, os.path.join(API_DIR, "src"))
+sys.path.insert(0, API_DIR)
+
+import fitz  # noqa: E402
+import httpx  # noqa: E402
+
+from fake_openai import FakeOpenAI, start_server  # noqa: E402
+
+PARAGRAPH = (
+    "Photosynthesis converts light energy into chemical energy stored in glucose. "
+    "The light-dependent reactions take place in the thylakoid membranes, while the "
+    "Calvin cycle fixes carbon dioxide in the stroma. Chlorophyll absorbs mostly blue "
+    "and red light and reflects green light. "
+)
+
+
+def make_pdf(pages: int, nonce: str = "") -> bytes:
+    """
+    Builds a text PDF of the given number of pages, made unique by the nonce
+    """
+    document = fitz.open()
+    for number in range(pages):
+        page = document.new_page()
+        text = f"Chapter {number + 1} {nonce}\n\n" + PARAGRAPH * 6
+        page.insert_textbox(fitz.Rect(50, 50, 545, 792), text, fontsize=10)
+    content = document.tobytes()
+    document.close()
+    return content
+
+
+def quiz_payload(session_id: str) -> dict:
+    return {
+        "session_id": session_id,
+        "questions": [
+            {"question": f"Question {index} about photosynthesis?",
+             "options": ["Glucose", "Oxygen", "Water", "Carbon dioxide"], "correct_index": index % 4}
+            for index in range(10)
+        ],
+        "metadata": {"totalPages": 12, "original_text_length": 11000, "was_summarized": True,
+                     "num_questions": 10, "topic": "Biology"},
+    }
+
+
+def result_payload(session_id: str, with_session_id: bool = True) -> dict:
+    payload = {
+        "userName": "Student",
+        "userAnswers": [index % 4 for index in range(10)],
+        "questions": quiz_payload(session_id)["questions"],
+        "metadata": {"topic": "Biology",
+                     "pdf_info": {"total_pages": 12, "pages_read": 12, "was_truncated": False},
+                     "original_text_length": 11000, "was_summarized": True, "num_questions": 10,
+                     "processingTimeSeconds": 14},
+    }
+    if with_session_id:
+        payload["session_id"] = session_id
+    return payload
+
+
+async def measure(make_request, requests: int, concurrency: int) -> dict:
+    """
+    Runs `requests` calls of make_request(index), at most `concurrency` at a time
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def call(index):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await make_request(index)
+            elapsed = time.perf_counter() - started
+            if response.status_code >= 400 or b"event: error" in response.content:
+                errors += 1
+            else:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[call(index) for index in range(requests)])
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(statistics.median(ordered) * 1000, 2) if ordered else None,
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2) if ordered else None,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+    }
+
+
+def src_scenarios(client: httpx.AsyncClient, args):
+    """
+    (endpoint, scenario, setup, make_request, requests) of src/main.py
+    """
+    scenarios = []
+    for pages in args.sizes:
+        unique_pdfs = {}
+
+        async def setup_unique(pages=pages, unique_pdfs=unique_pdfs):
+            unique_pdfs.clear()
+            unique_pdfs.update({index: make_pdf(pages, uuid.uuid4().hex) for index in range(args.generate_requests)})
+
+        async def generate_unique(index, unique_pdfs=unique_pdfs):
+            return await client.post("/generate-quiz", params={"num_questions": args.num_questions},
+                                     files={"file": ("doc.pdf", unique_pdfs[index], "application/pdf")})
+
+        cached_pdf = make_pdf(pages, "cached")
+
+        async def setup_cached(cached_pdf=cached_pdf):
+            await generate_cached(0, cached_pdf)
+
+        async def generate_cached(index, cached_pdf=cached_pdf):
+            return await client.post("/generate-quiz", params={"num_questions": args.num_questions},
+                                     files={"file": ("doc.pdf", cached_pdf, "application/pdf")})
+
+        async def generate_stream(index, unique_pdfs=unique_pdfs):
+            return await client.post("/generate-quiz/stream", params={"num_questions": args.num_questions},
+                                     files={"file": ("doc.pdf", unique_pdfs[index], "application/pdf")})
+
+        scenarios += [
+            ("POST /generate-quiz", f"{pages} pages, unique PDFs", setup_unique, generate_unique,
+             args.generate_requests),
+            ("POST /generate-quiz", f"{pages} pages, cached", setup_cached, generate_cached, args.cache_requests),
+            ("POST /generate-quiz/stream", f"{pages} pages, unique PDFs", setup_unique, generate_stream,
+             args.generate_requests),
+        ]
+    return scenarios + cache_scenarios(client, args, result_with_session_id=True)
+
+
+def cache_scenarios(client: httpx.AsyncClient, args, result_with_session_id: bool):
+    """
+    Quiz and result cache save/get scenarios, shared by both apps
+    """
+    session_ids = [uuid.uuid4().hex for _ in range(args.cache_requests)]
+
+    async def save_quiz(index):
+        return await client.post("/api/cache", json=quiz_payload(session_ids[index]))
+
+    async def get_quiz(index):
+        return await client.get("/api/cache", params={"session_id": random.choice(session_ids)})
+
+    async def save_result(index):
+        session_id = session_ids[index]
+        return await client.post(f"/api/cache/results/{session_id}",
+                                 json=result_payload(session_id, result_with_session_id))
+
+    async def get_result(index):
+        return await client.get(f"/api/cache/results/{random.choice(session_ids)}")
+
+    async def noop():
+        pass
+
+    return [
+        ("POST /api/cache", "save quiz", noop, save_quiz, args.cache_requests),
+        ("GET /api/cache", "get quiz", noop, get_quiz, args.cache_requests),
+        ("POST /api/cache/results/{session_id}", "save result", noop, save_result, args.cache_requests),
+        ("GET /api/cache/results/{session_id}", "get result", noop, get_result, args.cache_requests),
+    ]
+
+
+def build_app_variant():
+    """
+    app/main.py, assembled from the routers present in the tree
+    """
+    from fastapi import FastAPI
+    from app.routes.cache import router as cache_router
+    from app.routes.results import router as results_router
+
+    app = FastAPI()
+    app.include_router(cache_router)
+    app.include_router(results_router)
+    return app
+
+
+async def run_app(name, app, scenarios_for, args):
+    report = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        for endpoint, scenario, setup, make_request, requests in scenarios_for(client, args):
+            for concurrency in args.concurrency:
+                await setup()
+                result = await measure(make_request, requests, concurrency)
+                report.append({"app": name, "endpoint": endpoint, "scenario": scenario,
+                               "concurrency": concurrency, **result})
+                print(f"{name:12} {endpoint:40} {scenario:28} c={concurrency:<3} "
+                      f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms rps={result['rps']} "
+                      f"errors={result['errors']}", file=sys.stderr)
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous_path):
+    """
+    Prints the relative change of p50, p95 and rps of every scenario present in both runs
+    """
+    with open(previous_path, encoding="utf-8") as previous_file:
+        previous = json.load(previous_file)
+
+    def key(row):
+        return row["app"], row["endpoint"], row["scenario"], row["concurrency"]
+
+    before = {key(row): row for row in previous["results"]}
+    for row in current["results"]:
+        old = before.get(key(row))
+        if old is None:
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms", "rps"):
+            if old[metric] and row[metric] is not None:
+                changes.append(f"{metric} {old[metric]} -> {row[metric]} ({(row[metric] / old[metric] - 1) * 100:+.1f}%)")
+        print(f"{' | '.join(str(part) for part in key(row))}: {', '.join(changes)}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--generate-requests", type=int, default=24)
+    parser.add_argument("--cache-requests", type=int, default=400)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 20, 100], help="PDF sizes in pages")
+    parser.add_argument("--num-questions", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake completion")
+    parser.add_argument("--llm-latency-per-question", type=float, default=0.01)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Previous JSON report to compare with")
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(args.llm_latency, args.llm_latency_per_question)
+    server, base_url = start_server(fake.app)
+
+    # The API reads its configuration at import time
+    os.environ.update({
+        "OPENAI_BASE_URL": base_url,
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_REQUESTS_PER_MINUTE": "0",
+        "OPENAI_TOKENS_PER_MINUTE": "0",
+        "QUIZ_CACHE_BACKEND": "memory",
+        "SUMMARY_CACHE_BACKEND": "memory",
+        "SESSION_STORE_URL": "memory://",
+        # The synthetic PDFs share most passages, the bank would serve them without generating
+        "QUESTION_BANK_PATH": "",
+        "LOG_LEVEL": "WARNING",
+    })
+    import main as src_main
+
+    async def run():
+        results = await run_app("src/main.py", src_main.app, src_scenarios, args)
+        results += await run_app("app/main.py", build_app_variant(),
+                                 lambda client, args: cache_scenarios(client, args, result_with_session_id=False),
+                                 args)
+        return results
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        server.should_exit = True
+
+    report = {
+        "run": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {name: value for name, value in vars(args).items() if name not in ("output", "compare")},
+            "fake_llm_calls": fake.calls,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
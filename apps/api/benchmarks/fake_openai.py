@@ -0,0 +1,124 @@
+"""
+Deterministic local stand-in for the OpenAI chat completions API, used by the
+benchmarks. Answers are derived from the prompts (language detection, topic,
+summaries, quiz questions, streamed or not) after a configurable latency.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import socket
+import threading
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+QUESTION_COUNT = re.compile(r"EXACTLY (\d+)")
+BASE_TEXT = re.compile(r"BASE TEXT:\s*(.*?)\s*Return only this JSON", re.DOTALL)
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def approximate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class FakeOpenAI:
+    """
+    Chat completions endpoint answering after `latency` seconds, plus
+    `latency_per_question` seconds per requested quiz question
+    """
+
+    def __init__(self, latency=0.05, latency_per_question=0.0):
+        self.latency = latency
+        self.latency_per_question = latency_per_question
+        self.calls = 0
+        self.app = Starlette(routes=[Route("/v1/chat/completions", self.completions, methods=["POST"])])
+
+    def answer(self, messages):
+        system = messages[0]["content"] if messages else ""
+        prompt = messages[-1]["content"] if messages else ""
+        if "language detection" in system:
+            return "en", 0
+        if "main topic" in system:
+            return "Biology", 0
+        if "summarizing" in system:
+            return "Summary: " + prompt[-600:], 0
+
+        match = QUESTION_COUNT.search(prompt)
+        count = int(match.group(1)) if match else 5
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        # Like a real model, each question draws on a passage of the base text
+        base_text = BASE_TEXT.search(prompt)
+        sentences = list(dict.fromkeys(
+            " ".join(sentence.split()) for sentence in SENTENCE_END.split(base_text.group(1) if base_text else "")
+            if sentence.strip())) or [""]
+
+        def excerpt(index):
+            position = int(digest[:8], 16) + index
+            words = sentences[position % len(sentences)].split()
+            start = (position // len(sentences)) * 3 % max(1, len(words))
+            return " ".join(words[start:start + 6])
+
+        questions = [
+            {
+                "question": f"What does the text say about \"{excerpt(index)}\" ({digest[:8]}, {index + 1})?",
+                "options": [f"Statement {letter} of {digest[index % 56:index % 56 + 8]}" for letter in "ABCD"],
+                "correct_index": int(digest[index % 64], 16) % 4,
+            }
+            for index in range(count)
+        ]
+        return json.dumps({"questions": questions}), count
+
+    def usage(self, messages, content):
+        prompt_tokens = sum(approximate_tokens(message["content"]) for message in messages)
+        completion_tokens = approximate_tokens(content)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    async def completions(self, request: Request):
+        body = await request.json()
+        self.calls += 1
+        messages = body.get("messages", [])
+        content, questions = self.answer(messages)
+        await asyncio.sleep(self.latency + questions * self.latency_per_question)
+        usage = self.usage(messages, content)
+        created = int(time.time())
+
+        if not body.get("stream"):
+            return JSONResponse({
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": body.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            })
+
+        async def chunks():
+            base = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created,
+                    "model": body.get("model")}
+            for start in range(0, len(content), 40):
+                delta = {"index": 0, "delta": {"content": content[start:start + 40]}, "finish_reason": None}
+                yield f"data: {json.dumps({**base, 'choices': [delta]})}\n\n"
+            yield f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+
+def start_server(app):
+    """
+    Serves the ASGI app on a free local port in a background thread.
+    Returns the uvicorn server (set should_exit to stop it) and its base URL.
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}/v1"
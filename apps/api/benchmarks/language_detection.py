@@ -0,0 +1,80 @@
+"""
+Compares the local language detector against the OpenAI API path on a small
+fixture corpus (en/pt/es/fr).
+
+Usage (from apps/api):
+    python benchmarks/language_detection.py
+
+The API path is only measured when OPENAI_API_KEY is set.
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from services.language_detector import detect_language_local  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "language_samples.json")
+
+
+def summarize(name, results):
+    latencies = [r["elapsed_ms"] for r in results]
+    correct = sum(1 for r in results if r["detected"] == r["expected"])
+    return {
+        "detector": name,
+        "samples": len(results),
+        "accuracy": round(correct / len(results), 4),
+        "latency_ms_mean": round(statistics.mean(latencies), 3),
+        "latency_ms_p95": round(sorted(latencies)[int(len(latencies) * 0.95) - 1], 3),
+    }
+
+
+def run_local(samples):
+    results = []
+    for sample in samples:
+        detection = detect_language_local(sample["text"])
+        results.append({
+            "expected": sample["language"],
+            "detected": detection["language"],
+            "confidence": detection["confidence"],
+            "elapsed_ms": detection["elapsed_ms"],
+        })
+    return results
+
+
+async def run_api(samples):
+    from openai import AsyncOpenAI
+    from services.quiz_generator import detect_language_llm
+
+    results = []
+    async with AsyncOpenAI() as client:
+        for sample in samples:
+            started = time.perf_counter()
+            detected = await detect_language_llm(sample["text"], client)
+            results.append({
+                "expected": sample["language"],
+                "detected": detected,
+                "elapsed_ms": (time.perf_counter() - started) * 1000,
+            })
+    return results
+
+
+def main():
+    with open(FIXTURES, encoding="utf-8") as f:
+        samples = json.load(f)
+
+    report = [summarize("local", run_local(samples))]
+    if os.getenv("OPENAI_API_KEY"):
+        report.append(summarize("openai", asyncio.run(run_api(samples))))
+    else:
+        print("OPENAI_API_KEY not set, skipping the API path", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
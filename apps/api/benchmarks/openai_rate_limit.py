@@ -0,0 +1,158 @@
+"""
+Load test of the shared OpenAI client against a local stand-in for the chat
+completions API that enforces a requests-per-minute limit (answering 429 with
+Retry-After when it is exceeded) and fails a fraction of requests with 500.
+
+Compares a plain AsyncOpenAI client without retries (what every request used to
+create) with the shared client (rate limiting, backoff with jitter, circuit breaker),
+reporting sustained throughput, 429s received and errors per second.
+
+Usage (from apps/api):
+    python benchmarks/openai_rate_limit.py [--rpm 1800] [--requests 400] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from openai import AsyncOpenAI  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from fake_openai import start_server  # noqa: E402
+from services.openai_client import CircuitBreaker, ResilientOpenAI  # noqa: E402
+
+
+class StandInServer:
+    """
+    Chat completions endpoint limited to `rpm` requests per minute (1 second of burst)
+    """
+
+    def __init__(self, rpm, error_rate, latency):
+        self.rpm = rpm
+        self.error_rate = error_rate
+        self.latency = latency
+        self.counts = Counter()
+        self.window_start = time.monotonic()
+        self.tokens = rpm / 60
+        self.app = Starlette(routes=[Route("/v1/chat/completions", self.completions, methods=["POST"])])
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.rpm / 60, self.tokens + (now - self.window_start) * self.rpm / 60)
+        self.window_start = now
+        if self.tokens < 1:
+            return (1 - self.tokens) * 60 / self.rpm
+        self.tokens -= 1
+        return None
+
+    async def completions(self, request: Request):
+        await request.body()
+        wait = self.take()
+        if wait is not None:
+            self.counts["429"] += 1
+            return JSONResponse({"error": {"message": "Rate limit reached", "type": "requests"}},
+                                status_code=429, headers={"retry-after-ms": str(int(wait * 1000) + 1)})
+        self.counts["requests"] += 1
+        if self.error_rate and self.counts["requests"] % int(1 / self.error_rate) == 0:
+            self.counts["500"] += 1
+            return JSONResponse({"error": {"message": "Internal error", "type": "server_error"}}, status_code=500)
+        await asyncio.sleep(self.latency)
+        self.counts["200"] += 1
+        return JSONResponse({
+            "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()), "model": "stand-in",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "Biology"}}],
+            "usage": {"prompt_tokens": 50, "completion_tokens": 5, "total_tokens": 55},
+        })
+
+
+async def run_load(client, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors_per_second, error_types = [], Counter(), Counter()
+    started = time.perf_counter()
+
+    async def call():
+        async with semaphore:
+            call_started = time.perf_counter()
+            try:
+                await client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[{"role": "user", "content": "What is the main topic of this text?"}],
+                    max_tokens=10,
+                )
+                latencies.append(time.perf_counter() - call_started)
+            except Exception as e:
+                errors_per_second[int(time.perf_counter() - started)] += 1
+                error_types[type(e).__name__] += 1
+
+    await asyncio.gather(*[call() for _ in range(requests)])
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "succeeded": len(latencies),
+        "failed": sum(error_types.values()),
+        "errors": dict(error_types),
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "max_errors_per_second": max(errors_per_second.values(), default=0),
+        "latency_p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "latency_p95_ms": round(sorted(latencies)[int(len(latencies) * 0.95)] * 1000, 1) if latencies else None,
+    }
+
+
+async def bench(name, make_client, args):
+    server = StandInServer(args.rpm, args.error_rate, args.latency)
+    uvicorn_server, base_url = start_server(server.app)
+    client = make_client(base_url)
+    try:
+        report = await run_load(client, args.requests, args.concurrency)
+    finally:
+        await client.close()
+        uvicorn_server.should_exit = True
+    report = {"client": name, "limit_rps": round(args.rpm / 60, 2), **report,
+              "server_429s": server.counts["429"], "server_500s": server.counts["500"]}
+    if isinstance(client, ResilientOpenAI):
+        report["client_stats"] = client.stats()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=float, default=1800, help="Requests per minute allowed by the stand-in")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Fraction of accepted requests failing with 500")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per successful response")
+    args = parser.parse_args()
+
+    def plain(base_url):
+        return AsyncOpenAI(api_key="bench", base_url=base_url, max_retries=0)
+
+    def shared(base_url):
+        return ResilientOpenAI(
+            AsyncOpenAI(api_key="bench", base_url=base_url, max_retries=0),
+            requests_per_minute=args.rpm,
+            max_retries=8,
+            base_delay=0.1,
+            max_delay=5.0,
+            breaker=CircuitBreaker(failure_threshold=10, reset_timeout=2.0),
+        )
+
+    report = [
+        asyncio.run(bench("plain", plain, args)),
+        asyncio.run(bench("shared", shared, args)),
+    ]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
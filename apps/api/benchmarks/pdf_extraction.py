@@ -0,0 +1,109 @@
+"""
+Measures PDF text extraction throughput under concurrent uploads on synthetic
+10/100/1000-page documents, comparing inline extraction on the event loop (the
+previous implementation) with the pooled, page-range parallel extractor.
+
+Usage (from apps/api):
+    python benchmarks/pdf_extraction.py [--concurrency 1 8] [--pages 10 100 1000]
+
+Budgets are disabled so every page is parsed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from services import pdf_extractor  # noqa: E402
+
+PARAGRAPH = (
+    "Photosynthesis is the process used by plants, algae and certain bacteria to turn "
+    "light energy into chemical energy stored in glucose. It takes place in the chloroplasts. "
+)
+
+
+def make_pdf(pages: int) -> bytes:
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(40, 40, 560, 800), f"Chapter {number + 1}\n" + PARAGRAPH * 12)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+async def extract_inline(pdf_content: bytes):
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(stream=pdf_content, filetype="pdf")
+    text = ""
+    for page in doc:
+        text += page.get_text()
+    return text
+
+
+async def extract_pooled(pdf_content: bytes):
+    text, _ = await pdf_extractor.extract_text(pdf_content, max_pages=0, max_tokens=0, max_scan_pages=0)
+    return text
+
+
+async def measure(extract, pdf_content: bytes, concurrency: int):
+    # Heartbeat measures how long the event loop is blocked while extraction runs
+    max_stall = 0.0
+    running = True
+
+    async def heartbeat():
+        nonlocal max_stall
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            max_stall = max(max_stall, time.perf_counter() - started - 0.005)
+
+    monitor = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    await asyncio.gather(*[extract(pdf_content) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    running = False
+    await monitor
+    return elapsed, max_stall
+
+
+async def run(page_counts, concurrency_levels):
+    report = []
+    for pages in page_counts:
+        pdf_content = make_pdf(pages)
+        for concurrency in concurrency_levels:
+            for name, extract in (("inline", extract_inline), ("pooled", extract_pooled)):
+                elapsed, max_stall = await measure(extract, pdf_content, concurrency)
+                report.append({
+                    "extractor": name,
+                    "pages": pages,
+                    "concurrency": concurrency,
+                    "seconds": round(elapsed, 4),
+                    "documents_per_second": round(concurrency / elapsed, 2),
+                    "pages_per_second": round(pages * concurrency / elapsed, 1),
+                    "max_event_loop_stall_ms": round(max_stall * 1000, 1),
+                })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(run(args.pages, args.concurrency))
+    finally:
+        pdf_extractor.shutdown_executor()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
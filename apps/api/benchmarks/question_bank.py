@@ -0,0 +1,119 @@
+"""
+Measures question bank lookups with millions of questions: listing by topic and
+language (a deep page of a large topic through the keyset cursor compared with
+OFFSET paging, a small topic compared with a table scan forced by NOT INDEXED),
+and reusable questions of a document by document and chunk hashes.
+
+Usage (from apps/api):
+    python benchmarks/question_bank.py [--questions 1000000] [--topics 2000] [--repeat 20]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from services.question_bank import QuestionBank  # noqa: E402
+
+LANGUAGES = ["en", "es", "fr", "de", "pt", "it"]
+QUESTIONS_PER_DOCUMENT = 20
+
+
+def digest(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def populate(bank: QuestionBank, questions: int, topics: int) -> float:
+    """
+    Adds synthetic documents of QUESTIONS_PER_DOCUMENT questions, each linked to
+    one of five chunks of its document. A fifth of the documents share "Topic 0",
+    so listing that topic pages through tens of thousands of questions.
+    """
+    rng = random.Random(0)
+    started = time.perf_counter()
+    for document in range(questions // QUESTIONS_PER_DOCUMENT):
+        topic = "Topic 0" if rng.random() < 0.2 else f"Topic {rng.randrange(topics)}"
+        generated = [
+            {"question": f"Question {index} of document {document}?",
+             "options": [f"Option {letter} {document}.{index}" for letter in "ABCD"],
+             "correct_index": index % 4}
+            for index in range(QUESTIONS_PER_DOCUMENT)
+        ]
+        chunks = [digest(f"chunk {document}.{index % 5}") for index in range(QUESTIONS_PER_DOCUMENT)]
+        bank.add(generated, digest(f"document {document}"), chunks, topic, rng.choice(LANGUAGES))
+    return time.perf_counter() - started
+
+
+def timed(call, repeat: int) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = call()
+        latencies.append(time.perf_counter() - started)
+    return {"p50_ms": round(statistics.median(latencies) * 1000, 3),
+            "max_ms": round(max(latencies) * 1000, 3), "rows": len(rows)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=1_000_000)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        bank = QuestionBank(os.path.join(directory, "bank.sqlite3"))
+        populate_seconds = populate(bank, args.questions, args.topics)
+        conn = bank._conn
+        topic_key, language = "topic 0", LANGUAGES[0]
+        (matching,) = conn.execute(
+            "SELECT COUNT(*) FROM questions WHERE topic_key = ? AND language = ?", (topic_key, language)).fetchone()
+        (deep_cursor,) = conn.execute(
+            "SELECT id FROM questions WHERE topic_key = ? AND language = ? ORDER BY id LIMIT 1 OFFSET ?",
+            (topic_key, language, max(0, matching - 50))).fetchone()
+        document = random.Random(1).randrange(args.questions // QUESTIONS_PER_DOCUMENT)
+
+        def scan():
+            return conn.execute(
+                "SELECT id FROM questions NOT INDEXED WHERE topic_key = ? AND language = ? ORDER BY id LIMIT 50",
+                ("topic 1", language)).fetchall()
+
+        def offset_page():
+            return conn.execute(
+                "SELECT id FROM questions WHERE topic_key = ? AND language = ? ORDER BY id LIMIT 50 OFFSET ?",
+                (topic_key, language, max(0, matching - 50))).fetchall()
+
+        report = {
+            "questions": args.questions,
+            "topics": args.topics,
+            "populate_seconds": round(populate_seconds, 1),
+            "matching_topic_language": matching,
+            "search_topic_language_first_page": timed(lambda: bank.search(topic_key, language), args.repeat),
+            "search_topic_language_deep_page_keyset": timed(
+                lambda: bank.search(topic_key, language, after_id=deep_cursor - 1), args.repeat),
+            "search_topic_language_deep_page_offset": timed(offset_page, args.repeat),
+            "search_small_topic_language": timed(lambda: bank.search("topic 1", language), args.repeat),
+            "search_small_topic_language_table_scan": timed(scan, max(1, args.repeat // 4)),
+            "search_language_first_page": timed(lambda: bank.search(language=language), args.repeat),
+            "find_for_document": timed(lambda: bank.find_for_document(
+                digest(f"document {document}"), [digest(f"chunk {document}.{index}") for index in range(5)], 20),
+                args.repeat),
+            "find_for_new_document_sharing_chunks": timed(lambda: bank.find_for_document(
+                digest("new document"), [digest(f"chunk {document}.{index}") for index in range(2)], 20),
+                args.repeat),
+            "query_plan": [row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM questions WHERE topic_key = ? AND language = ? AND id > 0 "
+                "ORDER BY id LIMIT 50", (topic_key, language))],
+        }
+        bank.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
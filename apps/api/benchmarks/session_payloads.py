@@ -0,0 +1,143 @@
+"""
+Measures memory per session and GET latency of the quiz/result session caches,
+before (Pydantic objects re-serialized on every GET, questions copied into every
+result) and after (pre-encoded, compressed payloads with shared question sets).
+
+Usage (from apps/api):
+    python benchmarks/session_payloads.py [--sessions 2000] [--gets 2000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, HTTPException  # noqa: E402
+
+import main as api  # noqa: E402
+from core.payloads import SessionPayloadCache  # noqa: E402
+from core.session_store import MemorySessionStore  # noqa: E402
+
+
+def make_quiz(index):
+    # Students of the same class share the quiz generated from the same PDF
+    questions = [
+        {
+            "question": f"Which statement about photosynthesis is correct? (variant {number} of quiz {index % 20})",
+            "options": [f"Option {letter}: light energy is converted into chemical energy" for letter in "ABCD"],
+            "correct_index": number % 4,
+        }
+        for number in range(10)
+    ]
+    quiz = {
+        "session_id": f"session-{index}",
+        "questions": questions,
+        "metadata": {"totalPages": 12, "original_text_length": 11000, "was_summarized": True,
+                     "num_questions": 10, "topic": "Biology"},
+    }
+    result = {
+        "session_id": f"session-{index}",
+        "userName": f"Student {index}",
+        "userAnswers": [number % 4 for number in range(10)],
+        "questions": questions,
+        "metadata": {"topic": "Biology",
+                     "pdf_info": {"total_pages": 12, "pages_read": 12, "was_truncated": False},
+                     "original_text_length": 11000, "was_summarized": True, "num_questions": 10,
+                     "processingTimeSeconds": 14.2},
+    }
+    return quiz, result
+
+
+def build_before_app():
+    """The previous implementation: Pydantic objects in plain dicts"""
+    quiz_cache, result_cache = {}, {}
+    app = FastAPI()
+
+    @app.get("/api/cache")
+    async def get_quiz_cache(session_id: str):
+        if session_id not in quiz_cache:
+            raise HTTPException(status_code=404, detail="Cache not found")
+        return quiz_cache[session_id]
+
+    @app.get("/api/cache/results/{session_id}")
+    async def get_result_cache(session_id: str):
+        if session_id not in result_cache:
+            raise HTTPException(status_code=404, detail="Result cache not found")
+        return result_cache[session_id]
+
+    def save(quiz, result):
+        quiz_cache[quiz["session_id"]] = api.QuizCachePayload(**quiz)
+        result_cache[result["session_id"]] = api.ResultCachePayload(**result)
+
+    return app, save
+
+
+def build_after_app():
+    question_sets = MemorySessionStore(ttl=7200, sweep_interval=0)
+    api.question_sets = question_sets
+    api.quiz_cache = SessionPayloadCache(MemorySessionStore(ttl=7200, sweep_interval=0), question_sets)
+    api.result_cache = SessionPayloadCache(MemorySessionStore(ttl=7200, sweep_interval=0), question_sets)
+
+    def save(quiz, result):
+        api.quiz_cache.save(quiz["session_id"], api.QuizCachePayload(**quiz).dict())
+        api.result_cache.save(result["session_id"], api.ResultCachePayload(**result).dict())
+
+    return api.app, save
+
+
+async def measure_gets(app, sessions, gets):
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for index in range(gets):
+            session_id = f"session-{index % sessions}"
+            path = "/api/cache" if index % 2 else f"/api/cache/results/{session_id}"
+            params = {"session_id": session_id} if index % 2 else None
+            started = time.perf_counter()
+            response = await client.get(path, params=params)
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200
+    ordered = sorted(latencies)
+    return {
+        "get_ms_p50": round(statistics.median(latencies), 3),
+        "get_ms_p95": round(ordered[int(len(ordered) * 0.95)], 3),
+    }
+
+
+def run(name, build, sessions, gets):
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    app, save = build()
+    for index in range(sessions):
+        save(*make_quiz(index))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "implementation": name,
+        "sessions": sessions,
+        "bytes_per_session": int((current - baseline) / sessions),
+        **asyncio.run(measure_gets(app, sessions, gets)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--gets", type=int, default=2000)
+    args = parser.parse_args()
+
+    report = [
+        run("before", build_before_app, args.sessions, args.gets),
+        run("after", build_after_app, args.sessions, args.gets),
+    ]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
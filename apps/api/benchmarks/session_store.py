@@ -0,0 +1,117 @@
+"""
+Load benchmark for the session store: read latency as the number of sessions grows
+to 100k, compared with the previous dict + full expiration scan on every read, and
+memory held when inserting far more sessions than the configured limits.
+
+Usage (from apps/api):
+    python benchmarks/session_store.py [--sessions 1000 10000 100000]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.session_store import MemorySessionStore  # noqa: E402
+
+SESSION = {
+    "questions": [
+        {"question": f"Question {index}?", "options": ["A", "B", "C", "D"], "correct_index": index % 4}
+        for index in range(10)
+    ],
+    "metadata": {"totalPages": 12, "original_text_length": 11000, "was_summarized": True,
+                 "num_questions": 10, "topic": "Biology"},
+}
+
+
+class ScanningCache:
+    """
+    The previous implementation: a dict plus an expiration dict scanned on every read
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.cache = {}
+        self.expiration = {}
+
+    def set(self, key, value):
+        self.cache[key] = value
+        self.expiration[key] = time.time() + self.ttl
+
+    def get(self, key):
+        current_time = time.time()
+        expired = [sid for sid, exp_time in self.expiration.items() if current_time > exp_time]
+        for sid in expired:
+            self.cache.pop(sid, None)
+            self.expiration.pop(sid, None)
+        return self.cache.get(key)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def read_latency(store, keys, reads):
+    latencies = []
+    for key in random.choices(keys, k=reads):
+        started = time.perf_counter()
+        store.get(key)
+        latencies.append((time.perf_counter() - started) * 1_000_000)
+    return {
+        "read_us_p50": round(statistics.median(latencies), 2),
+        "read_us_p99": round(percentile(latencies, 0.99), 2),
+    }
+
+
+def bench_reads(session_counts, reads):
+    report = []
+    for count in session_counts:
+        keys = [f"session-{index}" for index in range(count)]
+        for name, store in (("session_store", MemorySessionStore(ttl=7200, sweep_interval=0)),
+                            ("scanning_dict", ScanningCache(ttl=7200))):
+            for key in keys:
+                store.set(key, SESSION)
+            # The scanning cache is O(n) per read, keep its sample small on large stores
+            sample = reads if name == "session_store" else max(20, reads * 1000 // count)
+            report.append({"store": name, "sessions": count, **read_latency(store, keys, sample)})
+    return report
+
+
+def bench_memory(total_sessions, max_entries, max_bytes):
+    tracemalloc.start()
+    store = MemorySessionStore(ttl=7200, max_entries=max_entries, max_bytes=max_bytes, sweep_interval=0)
+    for index in range(total_sessions):
+        store.set(f"session-{index}", json.loads(json.dumps(SESSION)))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "inserted_sessions": total_sessions,
+        **store.stats(),
+        "traced_memory_mb": round(current / 1024 / 1024, 2),
+        "peak_traced_memory_mb": round(peak / 1024 / 1024, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--reads", type=int, default=10000)
+    parser.add_argument("--max-entries", type=int, default=20000)
+    parser.add_argument("--max-bytes", type=int, default=16 * 1024 * 1024)
+    args = parser.parse_args()
+
+    report = {
+        "reads": bench_reads(args.sessions, args.reads),
+        "memory": bench_memory(max(args.sessions), args.max_entries, args.max_bytes),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
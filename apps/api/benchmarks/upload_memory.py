@@ -0,0 +1,198 @@
+"""
+Measures server memory under concurrent large PDF uploads, comparing the previous
+upload handling (the whole upload read into one bytes object, hashed, and sent to
+the extraction pool with every page batch) with spooled uploads (streamed to a
+temporary file while hashing, then opened by PyMuPDF from disk).
+
+Each mode runs in its own uvicorn process; the peak resident memory of that
+process and its extraction workers is sampled from /proc (Linux only) while the
+uploads are streamed from disk by the client.
+
+Usage (from apps/api):
+    python benchmarks/upload_memory.py [--size-mb 100] [--concurrency 8] [--pages 50]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "src"))
+
+PARAGRAPH = (
+    "Photosynthesis converts light energy into chemical energy stored in glucose. "
+    "Chlorophyll absorbs mostly blue and red light and reflects green light. "
+)
+
+
+def make_large_pdf(path: str, size_mb: int, pages: int) -> None:
+    """
+    Writes a PDF of text pages padded to size_mb with an incompressible attachment
+    """
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(40, 40, 560, 800), f"Chapter {number + 1}\n" + PARAGRAPH * 12)
+    doc.embfile_add("padding", os.urandom(size_mb * 1024 * 1024))
+    doc.save(path)
+    doc.close()
+
+
+def build_app(mode: str):
+    from fastapi import FastAPI, File, UploadFile
+
+    import config
+    from core.cache import make_content_key
+    from core.uploads import spool_upload
+    from services.quiz_generator import extract_text_from_bytes, extract_text_from_file
+
+    app = FastAPI()
+
+    @app.post("/extract")
+    async def extract(file: UploadFile = File(...)):
+        if mode == "buffered":
+            pdf_content = await file.read()
+            key = make_content_key(pdf_content)
+            text, metadata = await extract_text_from_bytes(pdf_content)
+        else:
+            with await spool_upload(file, 0, config.UPLOAD_SPOOL_MAX_MEMORY_BYTES) as pdf:
+                key = pdf.sha256
+                text, metadata = await extract_text_from_file(pdf)
+        return {"key": key, "characters": len(text), "pages_read": metadata["pages_read"]}
+
+    return app
+
+
+def serve(mode: str, port: int) -> None:
+    import uvicorn
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    uvicorn.run(build_app(mode), host="127.0.0.1", port=port, log_level="error")
+
+
+def tree_rss_bytes(pid: int) -> int:
+    """
+    Resident memory of a process and all its descendants
+    """
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return total
+
+
+class PeakSampler:
+    def __init__(self, pid: int, interval: float = 0.01):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, tree_rss_bytes(self.pid))
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+async def upload_all(port: int, path: str, concurrency: int) -> dict:
+    import httpx
+
+    async def upload(client):
+        started = time.perf_counter()
+        with open(path, "rb") as pdf_file:
+            response = await client.post("/extract", files={"file": ("large.pdf", pdf_file, "application/pdf")})
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=600) as client:
+        latencies = await asyncio.gather(*[upload(client) for _ in range(concurrency)])
+    return {
+        "elapsed_seconds": round(time.perf_counter() - started, 2),
+        "max_latency_seconds": round(max(latencies), 2),
+    }
+
+
+def bench(mode: str, path: str, args) -> dict:
+    import socket
+
+    import httpx
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", mode, str(port)])
+    try:
+        while True:
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/docs")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        # Warm up the extraction pool so its workers are part of the baseline
+        asyncio.run(upload_all(port, args.warmup_path, 1))
+        baseline = tree_rss_bytes(server.pid)
+        with PeakSampler(server.pid) as sampler:
+            timing = asyncio.run(upload_all(port, path, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "mode": mode,
+        "upload_mb": args.size_mb,
+        "concurrency": args.concurrency,
+        "baseline_rss_mb": round(baseline / 2 ** 20, 1),
+        "peak_rss_mb": round(sampler.peak / 2 ** 20, 1),
+        "peak_increase_mb": round((sampler.peak - baseline) / 2 ** 20, 1),
+        **timing,
+    }
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--serve":
+        serve(sys.argv[2], int(sys.argv[3]))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=100, help="Size of each uploaded PDF")
+    parser.add_argument("--concurrency", type=int, default=8, help="Uploads sent at the same time")
+    parser.add_argument("--pages", type=int, default=50, help="Text pages of the PDF")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "large.pdf")
+        make_large_pdf(path, args.size_mb, args.pages)
+        args.warmup_path = os.path.join(directory, "warmup.pdf")
+        make_large_pdf(args.warmup_path, 0, 1)
+        report = [bench(mode, path, args) for mode in ("buffered", "spooled")]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
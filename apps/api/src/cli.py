@@ -0,0 +1,107 @@
+"""
+Command line entry point for generating quizzes without the API server.
+
+Usage (from apps/api):
+    python src/cli.py batch course/*.pdf [--num-questions 10]
+        [--concurrency 4] [--rate 30] [--output quizzes.jsonl]
+    python src/cli.py profile-imports [--module main] [--top 25] [--log function.log]
+
+Each file's result is printed as one JSON line as soon as it is ready, followed by
+a summary line with the aggregate throughput. profile-imports reports how long
+importing the API (what a cold start waits for) spends in each package and module.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import List
+
+import config
+
+
+def collect_pdfs(paths: List[str]) -> List[str]:
+    """
+    Expands directories into the PDF files they contain
+    """
+    pdfs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                pdfs.extend(os.path.join(root, name) for name in sorted(names) if name.lower().endswith(".pdf"))
+        else:
+            pdfs.append(path)
+    return pdfs
+
+
+async def run_batch(args) -> int:
+    from core.uploads import SpooledFile
+    from services.batch import BatchLimits, generate_batch
+    from utils.tokens import get_encoding
+
+    # Loaded before the event loop starts counting tokens: its files may be downloaded
+    await asyncio.to_thread(get_encoding, config.OPENAI_MODEL)
+
+    # PDFs are read from disk as they are extracted, only their hashes are computed up front
+    documents = [(path, SpooledFile.from_path(path)) for path in collect_pdfs(args.paths)]
+    if not documents:
+        print("No PDF files found", file=sys.stderr)
+        return 1
+
+    limits = BatchLimits(args.concurrency, args.rate)
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    failed = 0
+    try:
+        async for item in generate_batch(documents, args.num_questions, limits):
+            if item["type"] == "summary":
+                failed = item["failed"]
+                print(json.dumps(item), file=sys.stderr)
+            else:
+                output.write(json.dumps(item, ensure_ascii=False) + "\n")
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failed else 0
+
+
+def profile_imports(args) -> int:
+    from utils.import_times import parse_import_times, profile_imports as run_profile, summarize_import_times
+
+    if args.log:
+        with open(args.log, encoding="utf-8") as log:
+            entries = parse_import_times(log.read())
+    else:
+        entries = run_profile(args.module)
+    print(json.dumps(summarize_import_times(entries, args.top), indent=2))
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="Generate one quiz per PDF file")
+    batch.add_argument("paths", nargs="+", help="PDF files or directories containing PDF files")
+    batch.add_argument("--num-questions", type=int, default=10)
+    batch.add_argument("--concurrency", type=int, default=config.BATCH_CONCURRENCY,
+                       help="Quiz generations running at the same time")
+    batch.add_argument("--rate", type=float, default=config.BATCH_RATE_LIMIT_PER_MINUTE,
+                       help="Quiz generations started per minute, 0 for no limit")
+    batch.add_argument("--output", help="Write the JSON lines to this file instead of stdout")
+
+    imports = subparsers.add_parser("profile-imports", help="Report the import time of each package and module")
+    imports.add_argument("--module", default="main", help="Module imported in a fresh interpreter")
+    imports.add_argument("--top", type=int, default=25, help="Packages and modules listed")
+    imports.add_argument("--log", help="Parse this saved report (PYTHONPROFILEIMPORTTIME=1 output) instead")
+
+    args = parser.parse_args()
+    if args.command == "batch":
+        return asyncio.run(run_batch(args))
+    if args.command == "profile-imports":
+        return profile_imports(args)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
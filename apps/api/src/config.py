@@ -15,5 +15,101 @@ else:
     # Ensure URLs are properly formatted
     CORS_ORIGINS = [origin.strip() for origin in CORS_ORIGINS if origin.strip()]
 
+# Logging level of the API ("DEBUG", "INFO", "WARNING"...)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
 # API configuration
-API_PREFIX = os.getenv("API_PREFIX", "")
\ No newline at end of file
+API_PREFIX = os.getenv("API_PREFIX", "")
+
+# OpenAI configuration
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))  # Pooled HTTP connections to the API
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))  # Seconds per request
+OPENAI_REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))  # 0 for no limit
+OPENAI_TOKENS_PER_MINUTE = float(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000"))  # 0 for no limit
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))  # Retries on 429, 5xx and connection errors
+OPENAI_RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5"))  # Seconds, doubled on every retry
+OPENAI_RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY", "20"))
+OPENAI_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("OPENAI_CIRCUIT_FAILURE_THRESHOLD", "5"))  # Consecutive failures opening the circuit
+OPENAI_CIRCUIT_RESET_SECONDS = float(os.getenv("OPENAI_CIRCUIT_RESET_SECONDS", "30"))  # Seconds before a trial call
+
+# Session cache configuration (quizzes and results saved by the frontend)
+# "memory://" (per process), "sqlite:///path/to/file.db" (per host) or "redis://host:port/db"
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "memory://")
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "7200"))  # 2 hours in seconds
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "50000"))
+SESSION_CACHE_MAX_BYTES = int(os.getenv("SESSION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+SESSION_COMPRESS_MIN_BYTES = int(os.getenv("SESSION_COMPRESS_MIN_BYTES", "512"))  # 0 disables compression
+
+# Quiz result cache configuration
+QUIZ_CACHE_BACKEND = os.getenv("QUIZ_CACHE_BACKEND", "memory")  # "memory" or "sqlite"
+QUIZ_CACHE_PATH = os.getenv("QUIZ_CACHE_PATH", "quiz_cache.sqlite3")
+QUIZ_CACHE_MAX_ENTRIES = int(os.getenv("QUIZ_CACHE_MAX_ENTRIES", "1024"))
+QUIZ_CACHE_TTL = float(os.getenv("QUIZ_CACHE_TTL", "86400"))  # 24 hours in seconds
+
+# Token budgets
+QUIZ_CONTENT_MAX_TOKENS = int(os.getenv("QUIZ_CONTENT_MAX_TOKENS", "3000"))  # Base text sent with the quiz prompt
+QUIZ_TOKENS_PER_QUESTION = int(os.getenv("QUIZ_TOKENS_PER_QUESTION", "150"))  # Completion tokens reserved per question
+TOPIC_SAMPLE_TOKENS = int(os.getenv("TOPIC_SAMPLE_TOKENS", "500"))  # Text sent to topic identification
+LANGUAGE_SAMPLE_TOKENS = int(os.getenv("LANGUAGE_SAMPLE_TOKENS", "250"))  # Text sent to the language detection fallback
+
+# Sharded question generation
+QUIZ_SHARD_SIZE = int(os.getenv("QUIZ_SHARD_SIZE", "5"))  # Questions per concurrent call, 0 for a single call
+QUIZ_SHARD_RETRIES = int(os.getenv("QUIZ_SHARD_RETRIES", "2"))  # Retries of a failed shard
+QUIZ_DEDUP_THRESHOLD = float(os.getenv("QUIZ_DEDUP_THRESHOLD", "0.8"))  # Word overlap (question and options) above which questions with the same answer are duplicates
+QUIZ_TOPUP_ATTEMPTS = int(os.getenv("QUIZ_TOPUP_ATTEMPTS", "2"))  # Calls asking for the questions still missing after deduplication
+
+# Language detection configuration
+# The local detector is used by default; below this confidence the OpenAI API is asked instead
+LANGUAGE_DETECTION_MIN_CONFIDENCE = float(os.getenv("LANGUAGE_DETECTION_MIN_CONFIDENCE", "0.2"))
+LANGUAGE_DETECTION_LLM_FALLBACK = os.getenv("LANGUAGE_DETECTION_LLM_FALLBACK", "true").lower() == "true"
+
+# PDF extraction configuration
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_EXTRACTION_USE_PROCESSES = os.getenv("PDF_EXTRACTION_USE_PROCESSES", "true").lower() == "true"
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "50"))  # Pages extracted per pool task
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "0"))  # Per-request page budget, 0 for no limit
+# Per-request token budget, 0 for no limit. Text beyond QUIZ_CONTENT_MAX_TOKENS is summarized first,
+# so keep it several times larger for long documents to be summarized rather than cut
+PDF_MAX_TOKENS = int(os.getenv("PDF_MAX_TOKENS", "12000"))
+PDF_SCAN_MAX_PAGES = int(os.getenv("PDF_SCAN_MAX_PAGES", "200"))  # Pages scanned for sampling, 0 for all
+PDF_SAMPLE_CHUNK_TOKENS = int(os.getenv("PDF_SAMPLE_CHUNK_TOKENS", "400"))  # Size of each sampled chunk, in tokens
+PDF_PRESCAN_PAGES = int(os.getenv("PDF_PRESCAN_PAGES", "8"))  # Pages sampled to detect scanned PDFs, 0 to disable
+PDF_PRESCAN_MIN_CHARS = int(os.getenv("PDF_PRESCAN_MIN_CHARS", "20"))  # Fewer characters in all sampled pages mean the PDF has no text
+PDF_CLASSIFICATION_CACHE_MAX_ENTRIES = int(os.getenv("PDF_CLASSIFICATION_CACHE_MAX_ENTRIES", "4096"))
+PDF_OCR_BACKEND = os.getenv("PDF_OCR_BACKEND", "")  # "" to reject scanned PDFs, "tesseract" or "module:function"
+PDF_OCR_LANGUAGE = os.getenv("PDF_OCR_LANGUAGE", "eng")  # Tesseract language codes, e.g. "eng+spa"
+PDF_OCR_DPI = int(os.getenv("PDF_OCR_DPI", "200"))
+PDF_OCR_MAX_PAGES = int(os.getenv("PDF_OCR_MAX_PAGES", "30"))  # Pages recognized per scanned PDF, 0 for all
+
+# Upload configuration
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))  # Per uploaded file, 0 for no limit
+UPLOAD_SPOOL_MAX_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MAX_MEMORY_BYTES", str(1024 * 1024)))  # Larger uploads are spooled to disk
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None  # Directory of spooled uploads, the system temp dir by default
+
+# Summarization configuration
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "1000"))  # Maximum size of each summarized chunk, about half on average
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))  # Chunks summarized at the same time
+SUMMARY_CACHE_BACKEND = os.getenv("SUMMARY_CACHE_BACKEND", "memory")  # "memory" or "sqlite"
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "summary_cache.sqlite3")
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "4096"))
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", "604800"))  # 7 days in seconds
+
+# Question bank configuration
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", "")  # SQLite file of the bank, empty to disable it
+QUESTION_BANK_CHUNK_SENTENCES = int(os.getenv("QUESTION_BANK_CHUNK_SENTENCES", "8"))  # Average sentences per chunk questions are linked to
+
+# Batch generation configuration
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "50"))  # PDFs accepted per batch request
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))  # Quiz generations running at the same time
+BATCH_RATE_LIMIT_PER_MINUTE = float(os.getenv("BATCH_RATE_LIMIT_PER_MINUTE", "30"))  # Generations started per minute, 0 for no limit
+
+# Cold start configuration
+# Load PyMuPDF, the OpenAI client and the tokenizer in the background when the server starts
+# (long-running servers); serverless deployments call GET /warmup after a cold start instead
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() == "true"
+
+# Background job configuration
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Quiz generation jobs running at the same time
+JOB_QUEUE_MAX_SIZE = int(os.getenv("JOB_QUEUE_MAX_SIZE", "100"))  # Queued jobs before new ones are rejected
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))  # Seconds a job's status is kept after its last update
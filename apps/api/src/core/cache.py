@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def make_content_key(content: bytes, **params) -> str:
+    """
+    Builds a content-addressed cache key from the raw bytes and the parameters
+    that influence the generated output (num_questions, model, prompt version...)
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    return make_key(digest, **params)
+
+
+def make_key(content_hash: str, **params) -> str:
+    """
+    Builds a cache key from an already computed content hash and parameters
+    """
+    suffix = "|".join(f"{name}={params[name]}" for name in sorted(params))
+    return hashlib.sha256(f"{content_hash}|{suffix}".encode("utf-8")).hexdigest()
+
+
+class CacheBackend:
+    """
+    Storage interface for the content cache. Values are JSON-serializable dicts.
+    Backends doing I/O set blocking, so async callers reach them from a thread.
+    """
+
+    blocking = False
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU cache with per-entry expiration
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at and time.time() > expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else 0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    On-disk cache backed by SQLite so entries survive restarts.
+    Entries are evicted in least-recently-used order once max_entries is reached.
+    A hit only records its access time when the last one is older than
+    touch_interval seconds, so reading a hot entry does not write to disk.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 10000, touch_interval: float = 60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, accessed_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at, accessed_at = row
+            if expires_at and now > expires_at:
+                self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            if now - accessed_at >= self.touch_interval:
+                self._conn.execute(
+                    "UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        now = time.time()
+        expires_at = now + ttl if ttl else 0
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE expires_at > 0 AND expires_at < ?", (time.time(),)
+        )
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                """
+                DELETE FROM cache_entries WHERE key IN (
+                    SELECT key FROM cache_entries ORDER BY accessed_at ASC LIMIT ?
+                )
+                """,
+                (count - self.max_entries,),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+        return count
+
+
+class ContentCache:
+    """
+    Content-addressed cache with TTL and hit/miss counters on top of a backend
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: Optional[float] = None):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning("Error reading cache: %s", e)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning("Error writing cache: %s", e)
+
+    async def get_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        get() for async code: a blocking backend is read from a thread rather than on the event loop
+        """
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def set_async(self, key: str, value: Dict[str, Any]) -> None:
+        if self.backend.blocking:
+            await asyncio.to_thread(self.set, key, value)
+        else:
+            self.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "ttl_seconds": self.ttl,
+        }
+
+
+def create_cache(backend: str = "memory", path: str = "", max_entries: int = 1024,
+                 ttl: Optional[float] = None) -> ContentCache:
+    """
+    Creates a content cache for the configured backend ("memory" or "sqlite")
+    """
+    if backend == "sqlite":
+        return ContentCache(SQLiteCacheBackend(path, max_entries=max_entries), ttl=ttl)
+    if backend == "memory":
+        return ContentCache(MemoryCacheBackend(max_entries=max_entries), ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {backend}")
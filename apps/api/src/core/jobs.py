@@ -0,0 +1,181 @@
+import asyncio
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from .session_store import MemorySessionStore
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobQueueBackend:
+    """
+    Queue of job ids waiting for a worker
+    """
+
+    def put(self, job_id: str) -> None:
+        """
+        Enqueues a job id, raising QueueFullError when the queue is at capacity
+        """
+        raise NotImplementedError
+
+    async def get(self) -> str:
+        raise NotImplementedError
+
+    def qsize(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryJobQueue(JobQueueBackend):
+    """
+    In-process FIFO queue. The asyncio queue is created on first use so it is bound
+    to the running event loop.
+    """
+
+    def __init__(self, max_size: int = 0):
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.max_size)
+        return self._queue
+
+    def put(self, job_id: str) -> None:
+        try:
+            self.queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise QueueFullError("Job queue is full")
+
+    async def get(self) -> str:
+        return await self.queue.get()
+
+    def qsize(self) -> int:
+        return self.queue.qsize()
+
+
+class JobManager:
+    """
+    Runs jobs in the background on a pool of asyncio worker tasks.
+
+    submit() stores the job as "queued" and returns its id right away; a worker
+    picks it up, marks it "running" and calls the handler with the job payload.
+    The job ends as "succeeded" with the handler's result, or "failed" with the
+    error message. Job records expire ttl seconds after their last update;
+    subscribers receive every status change until the job is finished.
+    """
+
+    def __init__(self, handler: Callable[[Any], Awaitable[Any]], workers: int = 2,
+                 queue: Optional[JobQueueBackend] = None, ttl: float = 3600, max_entries: int = 10000):
+        self.handler = handler
+        self.worker_count = max(1, workers)
+        self.queue = queue or MemoryJobQueue()
+        self.jobs = MemorySessionStore(ttl=ttl, max_entries=max_entries)
+        self._payloads: Dict[str, Any] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._workers: List[asyncio.Task] = []
+        self.running = 0
+
+    def start(self) -> None:
+        """
+        Starts the worker tasks, if they are not running yet
+        """
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.worker_count:
+            self._workers.append(asyncio.ensure_future(self._work()))
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, payload: Any, **info) -> Dict[str, Any]:
+        """
+        Queues a job and returns its record. Extra keyword arguments are kept
+        in the record (e.g. the session the result belongs to).
+        """
+        self.start()
+        job_id = uuid.uuid4().hex
+        job = {"job_id": job_id, "status": QUEUED, **info, "created_at": time.time(),
+               "started_at": None, "finished_at": None, "result": None, "error": None}
+        self._payloads[job_id] = payload
+        self.jobs.set(job_id, job)
+        try:
+            self.queue.put(job_id)
+        except QueueFullError:
+            self._payloads.pop(job_id, None)
+            self.jobs.delete(job_id)
+            raise
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields the job record now and after every status change, until it is finished
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        updates: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(updates)
+        try:
+            yield job
+            while job["status"] not in FINISHED_STATUSES:
+                job = await updates.get()
+                yield job
+        finally:
+            subscribers = self._subscribers.get(job_id, [])
+            if updates in subscribers:
+                subscribers.remove(updates)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    def _update(self, job_id: str, **changes) -> None:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        job = {**job, **changes}
+        self.jobs.set(job_id, job)
+        for updates in self._subscribers.get(job_id, []):
+            updates.put_nowait(job)
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self.queue.get()
+            payload = self._payloads.pop(job_id, None)
+            if payload is None:
+                continue
+            self.running += 1
+            self._update(job_id, status=RUNNING, started_at=time.time())
+            try:
+                result = await self.handler(payload)
+                self._update(job_id, status=SUCCEEDED, result=result, finished_at=time.time())
+            except asyncio.CancelledError:
+                self._update(job_id, status=FAILED, error="Job cancelled", finished_at=time.time())
+                raise
+            except Exception as e:
+                # HTTP errors raised by the handler carry their message in detail
+                error = getattr(e, "detail", None) or str(e)
+                self._update(job_id, status=FAILED, error=error, finished_at=time.time())
+            finally:
+                self.running -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len([worker for worker in self._workers if not worker.done()]),
+            "queued": self.queue.qsize(),
+            "running": self.running,
+            "jobs": len(self.jobs),
+        }
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import zlib
+from typing import Any, Optional
+
+from .session_store import SessionStore
+
+# First byte of every encoded payload tells how the rest is stored
+RAW_JSON = b"j"
+ZLIB_JSON = b"z"
+
+
+def encode_payload(value: Any, compress_min_bytes: int = 512) -> bytes:
+    """
+    Encodes a JSON-serializable value as compact JSON bytes, zlib-compressed
+    when it is at least compress_min_bytes long (0 disables compression)
+    """
+    if isinstance(value, bytes):
+        data = value
+    else:
+        data = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+    if compress_min_bytes and len(data) >= compress_min_bytes:
+        compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data):
+            return ZLIB_JSON + compressed
+    return RAW_JSON + data
+
+
+def decode_payload(blob: bytes) -> bytes:
+    """
+    Returns the JSON bytes of an encoded payload
+    """
+    if blob[:1] == ZLIB_JSON:
+        return zlib.decompress(blob[1:])
+    return blob[1:]
+
+
+class SessionPayloadCache:
+    """
+    Stores session payloads as pre-encoded bytes, ready to be sent as a response.
+
+    The "questions" list is stored once per distinct question set, keyed by its
+    content hash, in a question set store that can be shared between caches: a
+    result referencing the same questions as its quiz does not copy them.
+    """
+
+    def __init__(self, sessions: SessionStore, question_sets: SessionStore, compress_min_bytes: int = 512):
+        self.sessions = sessions
+        self.question_sets = question_sets
+        self.compress_min_bytes = compress_min_bytes
+
+    def save(self, session_id: str, payload: dict) -> None:
+        payload = dict(payload)
+        questions = payload.pop("questions", None)
+        if questions is None:
+            self.sessions.set(session_id, encode_payload(payload, self.compress_min_bytes))
+            return
+
+        questions_json = json.dumps(questions, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        questions_ref = hashlib.sha256(questions_json).hexdigest()
+        payload = {"questions_ref": questions_ref, **payload}
+        # One round trip when both stores share a backend. The question set is written first
+        # and re-saving refreshes its expiration, so it outlives every session referencing it.
+        self.sessions.set_many_with(
+            {session_id: encode_payload(payload, self.compress_min_bytes)},
+            self.question_sets,
+            {questions_ref: encode_payload(questions_json, self.compress_min_bytes)},
+        )
+
+    def load(self, session_id: str) -> Optional[bytes]:
+        """
+        Returns the JSON bytes of the session payload, or None when it is missing or expired
+        """
+        blob = self.sessions.get(session_id)
+        if blob is None:
+            return None
+        data = decode_payload(blob)
+        if not data.startswith(b'{"questions_ref":"'):
+            return data
+
+        # questions_ref is always the first key written, splice the question set back in its place
+        ref_start = len(b'{"questions_ref":"')
+        questions_ref = data[ref_start:ref_start + 64].decode("ascii")
+        questions_blob = self.question_sets.get(questions_ref)
+        if questions_blob is None:
+            return None
+        rest = data[ref_start + 64 + 1:]
+        return b'{"questions":' + decode_payload(questions_blob) + rest
+
+    def delete(self, session_id: str) -> bool:
+        # Question sets may be shared with other sessions, they expire on their own
+        return self.sessions.delete(session_id)
+
+    def stats(self):
+        return {"sessions": self.sessions.stats(), "question_sets": self.question_sets.stats()}
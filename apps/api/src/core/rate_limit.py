@@ -0,0 +1,65 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket rate limiter for asyncio: allows `rate` tokens per `period`
+    seconds on average, with bursts of up to `burst` (defaults to rate).
+    A rate of 0 disables limiting.
+
+    The bucket may go negative: adjust() charges tokens after the fact (e.g. the
+    actual token usage of a request) and pause() blocks every caller for a while
+    (e.g. after the server answered 429).
+    """
+
+    def __init__(self, rate: float, period: float = 60.0, burst: Optional[float] = None):
+        self.rate = rate
+        self.period = period
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate / self.period)
+        self.updated_at = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Waits until the requested tokens are available and takes them
+        """
+        if not self.rate:
+            return
+        # A request larger than the bucket would never fit, let it drain the whole bucket
+        tokens = min(tokens, self.capacity)
+        # Waiters are served in order, each one sleeping only for its own deficit
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                delay = (tokens - self.tokens) * self.period / self.rate
+                self.waited_seconds += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self.tokens -= tokens
+
+    def adjust(self, tokens: float) -> None:
+        """
+        Takes (or gives back, when negative) tokens without waiting
+        """
+        if not self.rate:
+            return
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - tokens)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Empties the bucket so that no tokens are available for the given time
+        """
+        if not self.rate:
+            return
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate / self.period)
@@ -0,0 +1,435 @@
+import heapq
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximates the memory used by a cached value from its serialized size
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if hasattr(value, "model_dump_json"):
+        return len(value.model_dump_json())
+    return len(json.dumps(value, default=str))
+
+
+class SessionStore:
+    """
+    Storage interface for session data (quizzes and results saved by the frontend).
+    Values expire ttl seconds after being saved. External stores only hold bytes
+    (see core/payloads.py); the in-memory store accepts any value.
+    """
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """
+        Saves several sessions at once. Implementations batch the writes into a single
+        round trip where the backend allows it.
+        """
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+    def set_many_with(self, items: Dict[str, Any], other: "SessionStore", other_items: Dict[str, Any],
+                      ttl: Optional[float] = None) -> None:
+        """
+        Saves items in this store and other_items in another one, other_items first.
+        Stores on the same backend write both in a single round trip.
+        """
+        other.set_many(other_items, ttl)
+        self.set_many(items, ttl)
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "entries": len(self)}
+
+    def close(self) -> None:
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process session cache with per-entry expiration and LRU eviction.
+
+    Expiration times are kept in a min-heap, so expired sessions are removed in
+    O(log n) each, by a background sweeper or on access, instead of scanning every
+    entry. When max_entries or max_bytes is exceeded the least recently used
+    sessions are evicted. A limit of 0 disables it.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 0, max_bytes: int = 0,
+                 sweep_interval: float = 60, sizeof: Callable[[Any], int] = estimate_size):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.sizeof = sizeof
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, _ = entry
+            if time.time() > expires_at:
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        size = self.sizeof(value)
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+            self._evict()
+        self.start_sweeper()
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._expiry_heap.clear()
+            self._bytes = 0
+
+    def sweep(self) -> int:
+        """
+        Removes the expired sessions, popping the expiry heap until the first live one
+        """
+        now = time.time()
+        removed = 0
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, key = heapq.heappop(self._expiry_heap)
+                entry = self._entries.get(key)
+                # Heap entries left behind by overwritten or deleted sessions are skipped
+                if entry is not None and entry[1] == expires_at:
+                    self._remove(key)
+                    removed += 1
+            self.expirations += removed
+            self._compact_heap()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def start_sweeper(self) -> None:
+        """
+        Starts the background thread removing expired sessions every sweep_interval seconds
+        """
+        if self._sweeper is not None or not self.sweep_interval:
+            return
+        with self._lock:
+            if self._sweeper is None:
+                self._stop.clear()
+                self._sweeper = threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True)
+                self._sweeper.start()
+
+    def close(self) -> None:
+        self.stop_sweeper()
+
+    def stop_sweeper(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            self.sweep()
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_entries and len(self._entries) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+        self._compact_heap()
+
+    def _compact_heap(self) -> None:
+        # Rebuild the heap once stale entries dominate, keeping it O(live sessions)
+        if len(self._expiry_heap) > 2 * len(self._entries) + 64:
+            self._expiry_heap = [(expires_at, key) for key, (_, expires_at, _) in self._entries.items()]
+            heapq.heapify(self._expiry_heap)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store shared by every worker on the host through a SQLite file.
+    Connections are pooled, expired rows are removed through an index on the
+    expiration time, and set_many writes all sessions in one transaction.
+
+    max_entries is checked every evict_batch writes (a twentieth of the limit by
+    default) rather than on every write, so the namespace may briefly exceed it by
+    that much; the oldest sessions are then evicted down to the limit.
+    """
+
+    def __init__(self, path: str, ttl: float, namespace: str = "", pool_size: int = 4,
+                 max_entries: int = 0, sweep_interval: float = 60, evict_batch: int = 0):
+        self.path = path
+        self.ttl = ttl
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self.evict_batch = evict_batch or max(1, max_entries // 20)
+        self.evictions = 0
+        self._writes_since_check = 0
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(max(1, pool_size)):
+            conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._pool.put(conn)
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (namespace, expires_at)")
+        self._last_sweep = 0.0
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT value FROM sessions WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, key, time.time()),
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[str, bytes], ttl: Optional[float] = None) -> None:
+        self._write([(self, items)], ttl)
+
+    def set_many_with(self, items: Dict[str, bytes], other: SessionStore, other_items: Dict[str, bytes],
+                      ttl: Optional[float] = None) -> None:
+        if isinstance(other, SQLiteSessionStore) and other.path == self.path:
+            self._write([(other, other_items), (self, items)], ttl)
+        else:
+            super().set_many_with(items, other, other_items, ttl)
+
+    def _write(self, writes: List[Tuple["SQLiteSessionStore", Dict[str, bytes]]], ttl: Optional[float]) -> None:
+        """
+        Writes the items of each (store, items) pair, stores sharing this file, in one transaction
+        """
+        with self._connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                for store, items in writes:
+                    expires_at = time.time() + (store.ttl if ttl is None else ttl)
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO sessions (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                        [(store.namespace, key, sqlite3.Binary(value), expires_at) for key, value in items.items()],
+                    )
+                    store._maintain(conn, len(items))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _maintain(self, conn: sqlite3.Connection, written: int) -> None:
+        now = time.time()
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            conn.execute("DELETE FROM sessions WHERE namespace = ? AND expires_at <= ?", (self.namespace, now))
+        if not self.max_entries:
+            return
+        self._writes_since_check += written
+        if self._writes_since_check < self.evict_batch:
+            return
+        self._writes_since_check = 0
+        (count,) = conn.execute("SELECT COUNT(*) FROM sessions WHERE namespace = ?", (self.namespace,)).fetchone()
+        if count > self.max_entries:
+            # Sessions closest to expiration are the least recently saved ones,
+            # found through the (namespace, expires_at) index without a full scan
+            cursor = conn.execute(
+                """
+                DELETE FROM sessions WHERE namespace = ? AND key IN (
+                    SELECT key FROM sessions WHERE namespace = ? ORDER BY expires_at LIMIT ?
+                )
+                """,
+                (self.namespace, self.namespace, count - self.max_entries),
+            )
+            self.evictions += cursor.rowcount
+
+    def delete(self, key: str) -> bool:
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM sessions WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, key, time.time()),
+            )
+        return cursor.rowcount > 0
+
+    def __len__(self) -> int:
+        with self._connection() as conn:
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE namespace = ? AND expires_at > ?",
+                (self.namespace, time.time()),
+            ).fetchone()
+        return count
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM sessions WHERE namespace = ?", (self.namespace,))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "entries": len(self), "max_entries": self.max_entries,
+                "evictions": self.evictions}
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get().close()
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Session store for multi-host deployments on any Redis-protocol server.
+    Uses a shared connection pool, lets the server expire keys, and pipelines
+    set_many into a single round trip. Memory limits are left to the server's
+    maxmemory policy.
+    """
+
+    def __init__(self, url: str = "", ttl: float = 7200, namespace: str = "", pool_size: int = 10,
+                 client: Any = None):
+        if client is None:
+            import redis  # Optional dependency, only needed for this backend
+
+            pool = redis.ConnectionPool.from_url(url, max_connections=pool_size)
+            client = redis.Redis(connection_pool=pool)
+        self.url = url
+        self.client = client
+        self.ttl = ttl
+        self.prefix = f"{namespace}:" if namespace else ""
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.client.set(self.prefix + key, value, px=int((self.ttl if ttl is None else ttl) * 1000))
+
+    def set_many(self, items: Dict[str, bytes], ttl: Optional[float] = None) -> None:
+        self._write([(self, items)], ttl)
+
+    def set_many_with(self, items: Dict[str, bytes], other: SessionStore, other_items: Dict[str, bytes],
+                      ttl: Optional[float] = None) -> None:
+        if isinstance(other, RedisSessionStore) and (
+                other.client is self.client or (self.url and other.url == self.url)):
+            self._write([(other, other_items), (self, items)], ttl)
+        else:
+            super().set_many_with(items, other, other_items, ttl)
+
+    def _write(self, writes: List[Tuple["RedisSessionStore", Dict[str, bytes]]], ttl: Optional[float]) -> None:
+        """
+        Sends the items of each (store, items) pair, stores on this server, in one pipeline
+        """
+        pipeline = self.client.pipeline(transaction=False)
+        for store, items in writes:
+            expire_ms = int((store.ttl if ttl is None else ttl) * 1000)
+            for key, value in items.items():
+                pipeline.set(store.prefix + key, value, px=expire_ms)
+        pipeline.execute()
+
+    def delete(self, key: str) -> bool:
+        return bool(self.client.delete(self.prefix + key))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*", count=1000))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*", count=1000))
+        if keys:
+            self.client.delete(*keys)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def create_session_store(url: str, ttl: float, namespace: str, max_entries: int = 0,
+                         max_bytes: int = 0) -> SessionStore:
+    """
+    Creates the session store configured by url:
+    "memory://" (per process), "sqlite:///path/to/file.db" (per host) or
+    "redis://host:port/db" (shared by every host)
+    """
+    if not url or url.startswith("memory://"):
+        return MemorySessionStore(ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+    if url.startswith("sqlite:///"):
+        return SQLiteSessionStore(url[len("sqlite:///"):], ttl=ttl, namespace=namespace,
+                                  max_entries=max_entries)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSessionStore(url, ttl=ttl, namespace=namespace)
+    raise ValueError(f"Unknown session store: {url}")
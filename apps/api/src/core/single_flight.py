@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls by key: while a call is in flight, callers with
+    the same key await its result instead of starting their own.
+
+    The shared call runs in its own task, so a caller disconnecting does not
+    cancel the work the other callers are waiting for. An optional cost function
+    maps a result to counters (e.g. OpenAI calls and tokens) that are added to
+    the savings every time a caller is coalesced.
+    """
+
+    def __init__(self, cost: Optional[Callable[[Any], Dict[str, int]]] = None):
+        self.cost = cost
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.saved: Dict[str, int] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Returns the result of fn() and whether it was shared with an in-flight call
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        result = await asyncio.shield(task)
+        if shared and self.cost is not None:
+            for name, value in self.cost(result).items():
+                self.saved[name] = self.saved.get(name, 0) + value
+        return result, shared
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved when every caller went away before it finished
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.executions + self.coalesced
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "coalesced_ratio": round(self.coalesced / requests, 4) if requests else 0.0,
+            "saved": dict(self.saved),
+        }
@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional, Union
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """
+    Raised when an upload exceeds the maximum size
+    """
+
+
+class SpooledFile:
+    """
+    A received file with its size and SHA-256 digest, computed while it was read.
+    Small files are kept in memory, larger ones live on disk (`path`), so PDFs
+    are opened by PyMuPDF from the file instead of from a copy in memory.
+
+    Work that may outlive its owner takes a reference with retain(); the temporary
+    file is removed once every reference has been closed.
+    """
+
+    def __init__(self, size: int, sha256: str, content: Optional[bytes] = None,
+                 path: Optional[str] = None, temporary: bool = False):
+        self.size = size
+        self.sha256 = sha256
+        self.content = content
+        self.path = path
+        self.temporary = temporary
+        self._references = 1
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """
+        The bytes of an in-memory file, otherwise its path
+        """
+        return self.content if self.content is not None else self.path
+
+    @classmethod
+    def from_path(cls, path: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> "SpooledFile":
+        """
+        Wraps a file already on disk, hashing it in chunks. The file is not removed on close.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as source:
+            for chunk in iter(lambda: source.read(chunk_size), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        return cls(size, digest.hexdigest(), path=path)
+
+    def retain(self) -> "SpooledFile":
+        """
+        Takes another reference to the file, released with close()
+        """
+        self._references += 1
+        return self
+
+    def close(self) -> None:
+        """
+        Releases a reference; the last one removes the temporary file, if any
+        """
+        if self._references > 0:
+            self._references -= 1
+        if self._references:
+            return
+        self.content = None
+        if self.temporary and self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> "SpooledFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+async def spool_upload(upload: Any, max_bytes: int = 0, max_memory_bytes: int = 0,
+                       directory: Optional[str] = None, suffix: str = ".pdf",
+                       chunk_size: int = UPLOAD_CHUNK_SIZE) -> SpooledFile:
+    """
+    Reads an upload (anything with an async read(size)) in chunks, hashing it as it
+    goes. Up to max_memory_bytes stay in memory; past that everything is written to a
+    temporary file. Raises UploadTooLargeError as soon as more than max_bytes have
+    been read (0 for no limit).
+    """
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    size = 0
+    path = None
+    spool = None
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise UploadTooLargeError(f"File exceeds the maximum size of {max_bytes} bytes")
+            digest.update(chunk)
+            if spool is None and size <= max_memory_bytes:
+                buffer += chunk
+                continue
+            if spool is None:
+                descriptor, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+                spool = os.fdopen(descriptor, "wb")
+                await asyncio.to_thread(spool.write, bytes(buffer))
+                buffer = bytearray()
+            await asyncio.to_thread(spool.write, chunk)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.remove(path)
+        raise
+
+    if spool is None:
+        return SpooledFile(size, digest.hexdigest(), content=bytes(buffer))
+    spool.close()
+    return SpooledFile(size, digest.hexdigest(), path=path, temporary=True)
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware rejecting request bodies larger than max_bytes with 413, before
+    they are read in full: from the Content-Length header when present, otherwise
+    as soon as the received body grows past the limit. path_limits overrides the
+    limit of specific paths (0 for no limit).
+    """
+
+    def __init__(self, app: Any, max_bytes: int, path_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = path_limits or {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        max_bytes = self.path_limits.get(scope.get("path"), self.max_bytes) if scope["type"] == "http" else 0
+        if not max_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > max_bytes:
+            await self.reject(send, max_bytes)
+            return
+
+        received = 0
+        rejected = False
+
+        async def receive_limited():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    rejected = True
+                    await self.reject(send, max_bytes)
+                    # The app sees a disconnected client and stops reading the body
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def send_unless_rejected(message) -> None:
+            if not rejected:
+                await send(message)
+
+        await self.app(scope, receive_limited, send_unless_rejected)
+
+    @staticmethod
+    async def reject(send, max_bytes: int) -> None:
+        body = json.dumps({"detail": f"Request body exceeds the maximum size of {max_bytes} bytes"}).encode("utf-8")
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode("ascii"))]})
+        await send({"type": "http.response.body", "body": body})
@@ -1,57 +1,84 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from openai import OpenAI
+import asyncio
+import json
+import logging
 import os
+import time
+import uuid
 from dotenv import load_dotenv
-from services.quiz_generator import extract_text_from_pdf, generate_quiz
-from pydantic import BaseModel
-from typing import List, Dict, Optional
-
-# Cache data structures
-class QuizQuestion(BaseModel):
-    question: str
-    options: List[str]
-    correct_index: int
-
-class PdfInfo(BaseModel):
-    total_pages: int
-    pages_read: int
-    was_truncated: bool
-
-class QuizMetadata(BaseModel):
-    totalPages: int
-    original_text_length: int
-    was_summarized: bool
-    num_questions: int
-    topic: Optional[str] = None
-
-class QuizCachePayload(BaseModel):
-    session_id: str
-    questions: List[QuizQuestion]
-    metadata: QuizMetadata
-
-class ResultMetadata(BaseModel):
-    topic: Optional[str] = None
-    pdf_info: PdfInfo
-    original_text_length: int
-    was_summarized: bool
-    num_questions: int
-    processingTimeSeconds: float
-
-class ResultCachePayload(BaseModel):
-    session_id: str
-    userName: str
-    userAnswers: List[int]
-    questions: List[QuizQuestion]
-    metadata: Optional[ResultMetadata] = None
-
-# In-memory caches
-quiz_cache: Dict[str, QuizCachePayload] = {}
-result_cache: Dict[str, ResultCachePayload] = {}
+from services.quiz_generator import (
+    drop_near_duplicates, extract_text_from_file, prepare_content_stages, stream_questions, build_quiz_metadata,
+    MODEL, PROMPT_VERSION
+)
+from core.cache import create_cache, make_key
+from core.session_store import create_session_store
+from core.payloads import SessionPayloadCache
+from core.single_flight import SingleFlight
+from core.jobs import JobManager, MemoryJobQueue, QueueFullError
+from core.metrics import RequestLatencyMiddleware, registry, stage_timer
+from core.uploads import BodySizeLimitMiddleware, SpooledFile, UploadTooLargeError, spool_upload
+from services.batch import generate_batch
+from services.openai_client import close_openai_client, get_openai_client, shared_client_stats
+from services.pdf_extractor import ScannedPdfError, pdf_classification_cache
+from services.question_bank import (
+    bank_topic, find_bank_questions, generate_quiz_from_bank, get_question_bank, public_question,
+    save_bank_questions
+)
+from services.summarizer import chunk_summary_cache
+from services.warmup import warm_up, warm_up_tokenizer
+import config
+from models.quiz import QuizMetadata, QuizCachePayload, ResultCachePayload
+from typing import Awaitable, List, Optional
+
+# Session caches, in memory or in a store shared by every worker (see SESSION_STORE_URL).
+# Payloads are stored pre-encoded and question sets are shared between quizzes and results.
+def create_session_namespace(namespace: str):
+    return create_session_store(
+        config.SESSION_STORE_URL,
+        ttl=config.SESSION_CACHE_TTL,
+        namespace=namespace,
+        max_entries=config.SESSION_CACHE_MAX_ENTRIES,
+        max_bytes=config.SESSION_CACHE_MAX_BYTES,
+    )
+
+question_sets = create_session_namespace("questions")
+quiz_cache = SessionPayloadCache(create_session_namespace("quiz"), question_sets,
+                                 config.SESSION_COMPRESS_MIN_BYTES)
+result_cache = SessionPayloadCache(create_session_namespace("result"), question_sets,
+                                   config.SESSION_COMPRESS_MIN_BYTES)
+
+# Content-addressed cache of generated quizzes, keyed by PDF hash and generation parameters
+generated_quiz_cache = create_cache(
+    backend=config.QUIZ_CACHE_BACKEND,
+    path=config.QUIZ_CACHE_PATH,
+    max_entries=config.QUIZ_CACHE_MAX_ENTRIES,
+    ttl=config.QUIZ_CACHE_TTL,
+)
+
+def generation_cost(result: dict) -> dict:
+    """OpenAI calls and tokens spent by a generation, saved whenever it is shared"""
+    token_usage = result["metadata"].get("token_usage", {})
+    return {
+        "openai_calls": token_usage.get("calls", 0),
+        "prompt_tokens": token_usage.get("prompt_tokens", 0),
+        "completion_tokens": token_usage.get("completion_tokens", 0),
+    }
+
+# Concurrent uploads of the same PDF with the same parameters share one generation
+quiz_generations = SingleFlight(cost=generation_cost)
 
 # Load environment variables
 load_dotenv()
 
+logging.basicConfig(
+    level=config.LOG_LEVEL,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+# The OpenAI client logs every HTTP request at INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Quiz Generator API",
@@ -70,6 +97,15 @@ else:
     if os.getenv("ENVIRONMENT") != "production":
         allowed_origins.append("http://localhost:3000")
 
+# Reject oversized uploads while they are received rather than after buffering them
+# (a little headroom is left for the multipart envelope)
+upload_body_limit = config.UPLOAD_MAX_BYTES and config.UPLOAD_MAX_BYTES + 64 * 1024
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=upload_body_limit,
+    path_limits={"/generate-quiz/batch": upload_body_limit * config.BATCH_MAX_FILES},
+)
+
 # Add CORS middleware with more specific configuration
 app.add_middleware(
     CORSMiddleware,
@@ -80,6 +116,11 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Latency of HTTP requests until the response starts",
+    ["method", "route", "status"])
+app.add_middleware(RequestLatencyMiddleware, histogram=HTTP_REQUEST_SECONDS)
+
 # Test route
 @app.get("/")
 async def root():
@@ -91,7 +132,7 @@ async def test_openai():
     Tests if OpenAI API key is configured correctly
     """
     try:
-        client = OpenAI()
+        client = get_openai_client()
         is_configured = bool(client.api_key)
     except Exception:
         is_configured = False
@@ -101,6 +142,108 @@ async def test_openai():
         is_configured else "OpenAI API key não encontrada"
     }
 
+@app.get("/test-openai/stats")
+async def get_openai_stats():
+    """
+    Get the retry, rate limit and circuit breaker counters of the shared OpenAI client
+    """
+    return get_openai_client().stats()
+
+@app.get("/warmup")
+async def warmup():
+    """
+    Pre-initializes PyMuPDF, the shared OpenAI client and the tokenizer, which are
+    otherwise loaded by the first request. Call it right after a cold start.
+    """
+    return await warm_up()
+
+# Keeps a reference to the startup warm-up so it is not garbage collected while running
+startup_tasks = set()
+
+@app.on_event("startup")
+async def start_warm_up():
+    # In the background: the server accepts requests while dependencies load. The tokenizer
+    # is always loaded this way, since its files may be downloaded the first time it is used.
+    task = asyncio.create_task(warm_up() if config.WARMUP_ON_STARTUP else warm_up_tokenizer())
+    startup_tasks.add(task)
+    task.add_done_callback(startup_tasks.discard)
+
+@app.on_event("shutdown")
+async def close_clients():
+    await close_openai_client()
+
+def event_stream_response(events):
+    """
+    Server-sent events response. sse_starlette (and the uvicorn modules it
+    imports) is loaded by the first stream rather than at startup.
+    """
+    from sse_starlette.sse import EventSourceResponse
+
+    return EventSourceResponse(events)
+
+def quiz_cache_key(content_hash: str, num_questions: int) -> str:
+    """Content-addressed key of a generated quiz, from the SHA-256 of the PDF"""
+    return make_key(
+        content_hash,
+        num_questions=num_questions,
+        model=MODEL,
+        prompt_version=PROMPT_VERSION,
+    )
+
+async def spool_pdf(file: UploadFile) -> SpooledFile:
+    """
+    Streams an uploaded PDF to a spooled file, hashing it on the way.
+    Uploads larger than UPLOAD_MAX_BYTES are answered with 413.
+    """
+    try:
+        return await spool_upload(file, config.UPLOAD_MAX_BYTES, config.UPLOAD_SPOOL_MAX_MEMORY_BYTES,
+                                  config.UPLOAD_SPOOL_DIR)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+async def run_quiz_generation(pdf: SpooledFile, num_questions: int) -> dict:
+    """
+    Generates the quiz of a PDF, reusing cached quizzes and sharing the generation
+    with identical requests already in flight
+    """
+    # Look up previously generated quizzes for the same content and parameters
+    cache_key = quiz_cache_key(pdf.sha256, num_questions)
+    cached = await generated_quiz_cache.get_async(cache_key)
+    if cached is not None:
+        return {
+            "questions": cached["questions"],
+            "metadata": {**cached["metadata"], "cache_hit": True}
+        }
+    
+    def generate() -> Awaitable[dict]:
+        # The shared generation may outlive this request (see SingleFlight),
+        # so it holds its own reference to the spooled file
+        return generate_from(pdf.retain())
+    
+    async def generate_from(pdf: SpooledFile) -> dict:
+        with pdf:
+            pipeline_stats = {}
+            with stage_timer(pipeline_stats, "total"):
+                # Extract text from PDF
+                text, pdf_metadata = await extract_text_from_file(pdf, pipeline_stats)
+            
+                if not text.strip():
+                    raise HTTPException(status_code=400, detail="Could not extract text from PDF")
+            
+                # Generate quiz, reusing questions of the bank
+                questions, topic = await generate_quiz_from_bank(text, num_questions, pdf.sha256, pipeline_stats)
+        
+            metadata = build_quiz_metadata(text, pdf_metadata, questions, topic, pipeline_stats)
+            await generated_quiz_cache.set_async(cache_key, {"questions": questions, "metadata": metadata})
+            return {"questions": questions, "metadata": metadata}
+    
+    # Identical requests already being generated await the same result
+    result, coalesced = await quiz_generations.do(cache_key, generate)
+    return {
+        "questions": result["questions"],
+        "metadata": {**result["metadata"], "cache_hit": False, "coalesced": coalesced}
+    }
+
 @app.post("/generate-quiz")
 async def create_quiz(
     file: UploadFile = File(...),
@@ -113,78 +256,341 @@ async def create_quiz(
         raise HTTPException(status_code=400, detail="File must be a PDF")
     
     try:
-        # Extract text from PDF
-        text, pdf_metadata = await extract_text_from_pdf(file)
-        
-        if not text.strip():
-            raise HTTPException(status_code=400, detail="Could not extract text from PDF")
-        
-        # Calculate text length
-        text_length = len(text)
-        was_summarized = text_length > 4000
-        
-        # Generate quiz
-        questions, topic = generate_quiz(text, num_questions)
-        
-        return {
-            "status": "success",
-            "questions": questions,
-            "metadata": {
-                "original_text_length": text_length,
-                "was_summarized": was_summarized,
-                "num_questions": len(questions),
-                "pdf_info": {
-                    "total_pages": pdf_metadata["total_pages"],
-                    "pages_read": pdf_metadata["pages_read"],
-                    "was_truncated": pdf_metadata["was_truncated"]
-                },
-                "topic": topic
-            }
-        }
+        with await spool_pdf(file) as pdf:
+            result = await run_quiz_generation(pdf, num_questions)
+        return {"status": "success", **result}
         
+    except HTTPException:
+        raise
+    except ScannedPdfError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        logger.exception("Error generating quiz")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def run_quiz_job(payload: dict) -> dict:
+    """
+    Generates the quiz of a background job and saves it to the session's quiz cache,
+    so the frontend can load it with GET /api/cache
+    """
+    with payload["pdf"]:
+        result = await run_quiz_generation(payload["pdf"], payload["num_questions"])
+    metadata = result["metadata"]
+    quiz = QuizCachePayload(
+        session_id=payload["session_id"],
+        questions=result["questions"],
+        metadata=QuizMetadata(
+            totalPages=metadata["pdf_info"]["total_pages"],
+            original_text_length=metadata["original_text_length"],
+            was_summarized=metadata["was_summarized"],
+            num_questions=metadata["num_questions"],
+            topic=metadata["topic"],
+        ),
+    )
+    await asyncio.to_thread(quiz_cache.save, quiz.session_id, quiz.dict())
+    return result
+
+# Background quiz generations, run by a pool of asyncio workers
+quiz_jobs = JobManager(
+    run_quiz_job,
+    workers=config.JOB_WORKERS,
+    queue=MemoryJobQueue(config.JOB_QUEUE_MAX_SIZE),
+    ttl=config.JOB_TTL,
+)
+
+@app.post("/generate-quiz/jobs", status_code=202)
+async def create_quiz_job(
+    file: UploadFile = File(...),
+    num_questions: int = 10,
+    session_id: Optional[str] = None
+):
+    """
+    Receives a PDF file and queues its quiz generation, returning the job id right away.
+    Poll GET /generate-quiz/jobs/{job_id} or subscribe to its events for the status;
+    the finished quiz is also saved to the quiz cache of session_id.
+    """
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="File must be a PDF")
+    
+    session_id = session_id or uuid.uuid4().hex
+    # The spooled upload outlives the request and is removed once the job has run
+    pdf = await spool_pdf(file)
+    try:
+        job = quiz_jobs.submit(
+            {"pdf": pdf, "num_questions": num_questions, "session_id": session_id},
+            session_id=session_id,
+        )
+    except QueueFullError as e:
+        pdf.close()
+        raise HTTPException(status_code=503, detail=str(e))
+    return job
+
+@app.get("/generate-quiz/jobs/stats")
+async def get_quiz_job_stats():
+    """Get the worker and queue counters of the background quiz jobs"""
+    return quiz_jobs.stats()
+
+@app.get("/generate-quiz/jobs/{job_id}")
+async def get_quiz_job(job_id: str):
+    """Get the status of a background quiz job, with its result once it has succeeded"""
+    job = quiz_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/generate-quiz/jobs/{job_id}/events")
+async def subscribe_quiz_job(job_id: str):
+    """
+    Streams the status of a background quiz job as server-sent events named after
+    the status ("queued", "running", "succeeded" or "failed") until it is finished
+    """
+    if quiz_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        async for job in quiz_jobs.subscribe(job_id):
+            yield {"event": job["status"], "data": json.dumps(job)}
+    
+    return event_stream_response(events())
+
+@app.post("/generate-quiz/stream")
+async def create_quiz_stream(
+    file: UploadFile = File(...),
+    num_questions: int = 10
+):
+    """
+    Receives a PDF file and streams the quiz generation as server-sent events:
+    "extraction", one "question" event per question reused from the question bank,
+    then "language", "topic" and "summary" progress events and one "question" event per
+    missing question as soon as the model has produced it, then "done" with the metadata.
+    Failures are reported with an "error" event.
+    """
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="File must be a PDF")
+    
+    pdf = await spool_pdf(file)
+    cache_key = quiz_cache_key(pdf.sha256, num_questions)
+    
+    def event(name: str, data: dict) -> dict:
+        return {"event": name, "data": json.dumps(data)}
+    
+    async def events():
+        # The response outlives the request, so the spooled upload is removed here
+        with pdf:
+            async for item in generate_events():
+                yield item
+    
+    async def generate_events():
+        cached = await generated_quiz_cache.get_async(cache_key)
+        if cached is not None:
+            for index, question in enumerate(cached["questions"]):
+                yield event("question", {"index": index, "question": question})
+            yield event("done", {**cached["metadata"], "cache_hit": True})
+            return
+        
+        try:
+            pipeline_stats = {}
+            started = time.perf_counter()
+            text, pdf_metadata = await extract_text_from_file(pdf, pipeline_stats)
+            if not text.strip():
+                yield event("error", {"detail": "Could not extract text from PDF"})
+                return
+            yield event("extraction", {"original_text_length": len(text), "pdf_info": pdf_metadata})
+            
+            # Questions of the bank are sent first, only the missing ones are generated
+            bank = get_question_bank()
+            chunks, reused = (await asyncio.to_thread(find_bank_questions, bank, text, pdf.sha256, num_questions)
+                              if bank else ([], []))
+            questions = [public_question(question) for question in reused]
+            for index, question in enumerate(questions):
+                yield event("question", {"index": index, "question": question})
+            
+            generated, language = [], ""
+            if reused and len(questions) >= num_questions:
+                topic = bank_topic(reused)
+            else:
+                missing = num_questions - len(questions)
+                client = get_openai_client()
+                async for stage, value in prepare_content_stages(text, client, pipeline_stats, missing):
+                    if stage == "content":
+                        content = value
+                        yield event("summary", {"was_summarized": "summarization" in pipeline_stats})
+                    else:
+                        if stage == "language":
+                            language = value
+                        else:
+                            topic = value
+                        yield event(stage, {stage: value})
+                
+                # Near-duplicates are dropped, the questions still missing are asked again and
+                # questions beyond the requested count (the model may write more) are not sent
+                top_ups = 0
+                while True:
+                    streamed = stream_questions(content, num_questions - len(questions), language, client,
+                                                pipeline_stats)
+                    try:
+                        async for question in streamed:
+                            if not drop_near_duplicates([question], questions):
+                                continue
+                            yield event("question", {"index": len(questions), "question": question})
+                            questions.append(question)
+                            generated.append(question)
+                            if len(questions) >= num_questions:
+                                break
+                    except Exception as e:
+                        if not top_ups:
+                            raise
+                        logger.warning("Error generating missing quiz questions: %s", e)
+                    finally:
+                        await streamed.aclose()
+                    if len(questions) >= num_questions or top_ups >= config.QUIZ_TOPUP_ATTEMPTS:
+                        break
+                    top_ups += 1
+                pipeline_stats["shortfall"] = max(0, num_questions - len(questions))
+            
+            if bank is not None:
+                await asyncio.to_thread(save_bank_questions, bank, pdf.sha256, chunks, reused, generated, topic,
+                                        language, pipeline_stats)
+            pipeline_stats.setdefault("timings", {})["total"] = round(time.perf_counter() - started, 4)
+            metadata = build_quiz_metadata(text, pdf_metadata, questions, topic, pipeline_stats)
+            await generated_quiz_cache.set_async(cache_key, {"questions": questions, "metadata": metadata})
+            yield event("done", {**metadata, "cache_hit": False})
+        
+        except ScannedPdfError as e:
+            yield event("error", {"detail": str(e)})
+        except Exception as e:
+            logger.exception("Error streaming quiz generation")
+            yield event("error", {"detail": str(e)})
+    
+    return event_stream_response(events())
+
+@app.post("/generate-quiz/batch")
+async def create_quiz_batch(
+    files: List[UploadFile] = File(...),
+    num_questions: int = 10
+):
+    """
+    Receives several PDF files and streams one "result" server-sent event per file
+    as soon as its quiz is ready (or has failed), then "done" with the aggregate
+    throughput. Generations of every batch share a global concurrency and rate limit.
+    """
+    if len(files) > config.BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {config.BATCH_MAX_FILES} files per batch")
+    for file in files:
+        if not file.filename.endswith('.pdf'):
+            raise HTTPException(status_code=400, detail=f"File must be a PDF: {file.filename}")
+    
+    documents = []
+    try:
+        for file in files:
+            documents.append((file.filename, await spool_pdf(file)))
+    except HTTPException:
+        for _, pdf in documents:
+            pdf.close()
+        raise
+    
+    async def events():
+        try:
+            async for item in generate_batch(documents, num_questions,
+                                             cache=generated_quiz_cache, cache_key=quiz_cache_key):
+                name = "result" if item.pop("type") == "result" else "done"
+                yield {"event": name, "data": json.dumps(item)}
+        finally:
+            for _, pdf in documents:
+                pdf.close()
+    
+    return event_stream_response(events())
+
+@app.get("/generate-quiz/cache-stats")
+async def get_generated_quiz_cache_stats():
+    """Get hit/miss counters of the generated quiz cache"""
+    return generated_quiz_cache.stats()
+
+@app.get("/question-bank/stats")
+async def get_question_bank_stats():
+    """Get the number of questions and documents in the question bank"""
+    bank = get_question_bank()
+    if bank is None:
+        raise HTTPException(status_code=404, detail="Question bank is disabled")
+    return await asyncio.to_thread(bank.stats)
+
+@app.get("/generate-quiz/coalescing-stats")
+async def get_quiz_coalescing_stats():
+    """Get counters of generations shared between concurrent identical requests"""
+    return quiz_generations.stats()
+
+# The session handlers are plain functions: Starlette runs them in its threadpool, so the
+# SQLite or Redis round trips of the session stores do not block the event loop
 @app.get("/api/cache")
-async def get_quiz_cache(session_id: str = Query(...)):
+def get_quiz_cache(session_id: str = Query(...)):
     """Get cached quiz data for a session"""
-    if session_id not in quiz_cache:
+    cached = quiz_cache.load(session_id)
+    if cached is None:
         raise HTTPException(status_code=404, detail="Cache not found")
-    return quiz_cache[session_id]
+    return Response(content=cached, media_type="application/json")
 
 @app.post("/api/cache")
-async def save_quiz_cache(payload: QuizCachePayload):
+def save_quiz_cache(payload: QuizCachePayload):
     """Save quiz data to cache"""
-    quiz_cache[payload.session_id] = payload
+    quiz_cache.save(payload.session_id, payload.dict())
     return {"status": "success"}
 
 @app.delete("/api/cache")
-async def delete_quiz_cache(session_id: str = Query(...)):
+def delete_quiz_cache(session_id: str = Query(...)):
     """Delete cached quiz data for a session"""
-    if session_id not in quiz_cache:
+    if not quiz_cache.delete(session_id):
         raise HTTPException(status_code=404, detail="Cache not found")
-    del quiz_cache[session_id]
     return {"status": "success"}
 
 @app.get("/api/cache/results/{session_id}")
-async def get_result_cache(session_id: str):
+def get_result_cache(session_id: str):
     """Get cached result data for a session"""
-    if session_id not in result_cache:
+    cached = result_cache.load(session_id)
+    if cached is None:
         raise HTTPException(status_code=404, detail="Result cache not found")
-    return result_cache[session_id]
+    return Response(content=cached, media_type="application/json")
 
 @app.post("/api/cache/results/{session_id}")
-async def save_result_cache(session_id: str, payload: ResultCachePayload):
+def save_result_cache(session_id: str, payload: ResultCachePayload):
     """Save result data to cache"""
     if session_id != payload.session_id:
         raise HTTPException(status_code=400, detail="Session ID mismatch")
-    result_cache[session_id] = payload
+    result_cache.save(session_id, payload.dict())
     return {"status": "success"}
 
 @app.delete("/api/cache/results/{session_id}")
-async def delete_result_cache(session_id: str):
+def delete_result_cache(session_id: str):
     """Delete cached result data for a session"""
-    if session_id not in result_cache:
+    if not result_cache.delete(session_id):
         raise HTTPException(status_code=404, detail="Result cache not found")
-    del result_cache[session_id]
-    return {"status": "success"}
\ No newline at end of file
+    return {"status": "success"}
+
+def collect_cache_metrics():
+    """Samples of the counters kept by the caches, coalescing, jobs and OpenAI client"""
+    for name, cache in (("generated_quiz", generated_quiz_cache), ("chunk_summary", chunk_summary_cache),
+                        ("pdf_classification", pdf_classification_cache)):
+        stats = cache.stats()
+        yield ("quiz_cache_hits_total", "counter", "Cache lookups that found an entry", {"cache": name}, stats["hits"])
+        yield ("quiz_cache_misses_total", "counter", "Cache lookups that found no entry", {"cache": name}, stats["misses"])
+        yield ("quiz_cache_entries", "gauge", "Entries held by the cache", {"cache": name}, stats["entries"])
+    
+    coalescing = quiz_generations.stats()
+    yield ("quiz_generations_total", "counter", "Quiz generations run", {}, coalescing["executions"])
+    yield ("quiz_generations_coalesced_total", "counter", "Requests that shared an in-flight generation", {},
+           coalescing["coalesced"])
+    
+    jobs = quiz_jobs.stats()
+    yield ("quiz_jobs_queued", "gauge", "Background quiz jobs waiting for a worker", {}, jobs["queued"])
+    yield ("quiz_jobs_running", "gauge", "Background quiz jobs running", {}, jobs["running"])
+    
+    openai_stats = shared_client_stats() or {}
+    for key in ("calls", "retries", "rate_limited", "server_errors", "connection_errors", "failed", "circuit_rejected"):
+        yield ("quiz_openai_client_events_total", "counter", "Events of the shared OpenAI client", {"event": key},
+               openai_stats.get(key, 0))
+
+registry.register_collector(collect_cache_metrics)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Stage latency histograms and counters in the Prometheus text format"""
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
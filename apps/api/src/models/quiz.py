@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class QuizQuestion(BaseModel):
+    question: str
+    options: List[str]
+    correct_index: int
+
+class PdfInfo(BaseModel):
+    total_pages: int
+    pages_read: int
+    was_truncated: bool
+    pages_used: Optional[List[int]] = None
+
+class QuizMetadata(BaseModel):
+    totalPages: int
+    original_text_length: int
+    was_summarized: bool
+    num_questions: int
+    topic: Optional[str] = None
+
+class QuizCachePayload(BaseModel):
+    session_id: str
+    questions: List[QuizQuestion]
+    metadata: QuizMetadata
+
+class ResultMetadata(BaseModel):
+    topic: Optional[str] = None
+    pdf_info: PdfInfo
+    original_text_length: int
+    was_summarized: bool
+    num_questions: int
+    processingTimeSeconds: float
+
+class ResultCachePayload(BaseModel):
+    session_id: str
+    userName: str
+    userAnswers: List[int]
+    questions: List[QuizQuestion]
+    metadata: Optional[ResultMetadata] = None
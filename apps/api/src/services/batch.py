@@ -0,0 +1,128 @@
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from core.cache import ContentCache
+from core.rate_limit import AsyncRateLimiter
+from core.uploads import SpooledFile
+from services.question_bank import generate_quiz_from_bank
+from services.quiz_generator import build_quiz_metadata, extract_text_from_file
+import config
+
+
+class BatchLimits:
+    """
+    Concurrency and rate limits applied to the quiz generations of batches
+    """
+
+    def __init__(self, concurrency: int, rate_per_minute: float):
+        self.concurrency = max(1, concurrency)
+        self.rate_per_minute = rate_per_minute
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.limiter = AsyncRateLimiter(rate_per_minute, period=60.0, burst=self.concurrency)
+
+
+_shared_limits: Optional[BatchLimits] = None
+
+
+def shared_batch_limits() -> BatchLimits:
+    """
+    Limits shared by every batch of the process, created on first use so they
+    are bound to the running event loop
+    """
+    global _shared_limits
+    if _shared_limits is None:
+        _shared_limits = BatchLimits(config.BATCH_CONCURRENCY, config.BATCH_RATE_LIMIT_PER_MINUTE)
+    return _shared_limits
+
+
+async def generate_batch(
+    documents: List[Tuple[str, SpooledFile]],
+    num_questions: int = 10,
+    limits: Optional[BatchLimits] = None,
+    cache: Optional[ContentCache] = None,
+    cache_key: Optional[Callable[[str, int], str]] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Generates one quiz per (filename, spooled PDF) document and yields a "result" dict
+    per file as soon as it is finished, then a "summary" dict with aggregate throughput.
+
+    Every PDF is extracted right away (the extraction pool bounds the parallelism);
+    cache keys are built from the content hash (`cache_key(sha256, num_questions)`);
+    quiz generations are scheduled under the given limits, shared by every batch
+    of the process by default. Failures are reported per file.
+    """
+    limits = limits or shared_batch_limits()
+
+    async def process(index: int, filename: str, pdf: SpooledFile) -> Dict:
+        started = time.perf_counter()
+        result = {"index": index, "filename": filename}
+        try:
+            key = cache_key(pdf.sha256, num_questions) if cache is not None else None
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                metadata = {**cached["metadata"], "cache_hit": True}
+                questions = cached["questions"]
+            else:
+                pipeline_stats = {}
+                text, pdf_metadata = await extract_text_from_file(pdf, pipeline_stats)
+                if not text.strip():
+                    raise Exception("Could not extract text from PDF")
+
+                async with limits.semaphore:
+                    await limits.limiter.acquire()
+                    questions, topic = await generate_quiz_from_bank(text, num_questions, pdf.sha256, pipeline_stats)
+
+                metadata = build_quiz_metadata(text, pdf_metadata, questions, topic, pipeline_stats)
+                if cache is not None:
+                    cache.set(key, {"questions": questions, "metadata": metadata})
+                metadata = {**metadata, "cache_hit": False}
+
+            result.update({"status": "success", "questions": questions, "metadata": metadata})
+        except Exception as e:
+            result.update({"status": "error", "detail": str(e)})
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    started = time.perf_counter()
+    tasks = [asyncio.ensure_future(process(index, filename, pdf))
+             for index, (filename, pdf) in enumerate(documents)]
+    summary = {
+        "files": len(documents),
+        "succeeded": 0,
+        "failed": 0,
+        "cache_hits": 0,
+        "questions": 0,
+        "token_usage": {"prompt_tokens": 0, "completion_tokens": 0, "calls": 0},
+    }
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+            if result["status"] == "success":
+                summary["succeeded"] += 1
+                summary["questions"] += len(result["questions"])
+                metadata = result["metadata"]
+                if metadata["cache_hit"]:
+                    summary["cache_hits"] += 1
+                else:
+                    for name in summary["token_usage"]:
+                        summary["token_usage"][name] += metadata.get("token_usage", {}).get(name, 0)
+            else:
+                summary["failed"] += 1
+            yield {"type": "result", **result}
+    finally:
+        # The consumer went away (e.g. client disconnected), stop the remaining work
+        for task in tasks:
+            task.cancel()
+
+    elapsed = time.perf_counter() - started
+    minutes = elapsed / 60 if elapsed else float("inf")
+    yield {
+        "type": "summary",
+        **summary,
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_minute": round(summary["files"] / minutes, 2),
+        "questions_per_minute": round(summary["questions"] / minutes, 2),
+        "concurrency": limits.concurrency,
+        "rate_per_minute": limits.rate_per_minute,
+    }
@@ -0,0 +1,100 @@
+import re
+import time
+from collections import Counter
+from typing import Dict
+
+# Most frequent function words per language. Short, high-frequency words are by far
+# the strongest signal on small samples and keep the model small enough to ship inline.
+STOPWORDS = {
+    "en": {
+        "the", "of", "and", "to", "in", "is", "that", "for", "it", "as", "with", "was",
+        "on", "are", "be", "by", "this", "from", "or", "which", "an", "at", "not", "have",
+        "has", "but", "they", "their", "can", "were", "been", "its", "also", "these",
+        "there", "when", "what", "we", "more", "other", "such", "into", "than", "only",
+        "between", "through", "most", "how", "each", "would", "should", "about", "where",
+    },
+    "pt": {
+        "de", "a", "o", "que", "e", "do", "da", "em", "um", "para", "com", "não", "uma",
+        "os", "no", "se", "na", "por", "mais", "as", "dos", "como", "mas", "ao", "ele",
+        "das", "à", "seu", "sua", "ou", "quando", "muito", "nos", "já", "também", "pelo",
+        "pela", "até", "isso", "entre", "depois", "sem", "mesmo", "aos", "são", "foi",
+        "está", "essa", "esse", "pode", "há", "num", "numa", "pelos", "estão", "então",
+    },
+    "es": {
+        "de", "la", "que", "el", "en", "y", "a", "los", "del", "se", "las", "por", "un",
+        "para", "con", "no", "una", "su", "al", "lo", "como", "más", "pero", "sus", "le",
+        "ya", "o", "este", "sí", "porque", "esta", "entre", "cuando", "muy", "sin",
+        "sobre", "también", "me", "hasta", "hay", "donde", "desde", "todo", "nos",
+        "durante", "uno", "ni", "contra", "ese", "eso", "es", "son", "está", "fue", "pueden",
+    },
+    "fr": {
+        "de", "la", "le", "et", "les", "des", "en", "un", "du", "une", "que", "est",
+        "pour", "qui", "dans", "par", "plus", "pas", "au", "sur", "ne", "se", "ce",
+        "il", "sont", "avec", "aux", "ou", "son", "sa", "ses", "cette", "mais", "comme",
+        "nous", "vous", "leur", "elle", "été", "être", "fait", "peut", "aussi", "entre",
+        "ces", "où", "dont", "très", "sans", "lors", "ainsi", "chez", "deux", "alors",
+    },
+    "de": {
+        "der", "die", "und", "in", "den", "von", "zu", "das", "mit", "sich", "des", "auf",
+        "für", "ist", "im", "dem", "nicht", "ein", "eine", "als", "auch", "es", "an",
+        "werden", "aus", "er", "hat", "dass", "sie", "nach", "wird", "bei", "einer",
+        "um", "am", "sind", "noch", "wie", "einem", "über", "einen", "so", "zum",
+        "war", "haben", "nur", "oder", "aber", "vor", "zur", "bis", "mehr", "durch",
+    },
+    "it": {
+        "di", "e", "il", "la", "che", "per", "un", "in", "del", "della", "non", "una",
+        "le", "si", "con", "da", "dei", "al", "alla", "sono", "gli", "nel", "nella",
+        "anche", "come", "più", "ma", "questo", "questa", "ha", "delle", "degli", "lo",
+        "dalla", "essere", "stato", "quando", "tra", "fra", "ogni", "sulla", "sul",
+        "suo", "sua", "loro", "cui", "ci", "dal", "molto", "tutti", "dopo", "senza",
+    },
+}
+
+# Characters that are (almost) exclusive to one of the supported languages
+MARKER_CHARACTERS = {
+    "pt": "ãõ",
+    "es": "ñ¿¡",
+    "fr": "èêëîïûùœ",
+    "de": "äöüß",
+    "it": "ìò",
+}
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+DEFAULT_LANGUAGE = "en"
+
+
+def detect_language_local(text: str, sample_size: int = 2000) -> Dict:
+    """
+    Detects the language of the text with a stopword-frequency model.
+    Returns the ISO language code, a confidence between 0 and 1 and the elapsed time.
+    """
+    started = time.perf_counter()
+    sample = text[:sample_size].lower()
+    words = WORD_PATTERN.findall(sample)
+
+    scores = Counter()
+    for word in words:
+        for language, stopwords in STOPWORDS.items():
+            if word in stopwords:
+                scores[language] += 1
+
+    for language, characters in MARKER_CHARACTERS.items():
+        scores[language] += sum(sample.count(character) for character in characters) * 2
+
+    ranked = scores.most_common(2)
+    if not ranked or ranked[0][1] == 0:
+        language, confidence = DEFAULT_LANGUAGE, 0.0
+    else:
+        language, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0
+        # Margin over the runner-up, damped for very short samples
+        margin = (best - runner_up) / best
+        coverage = min(1.0, best / 20)
+        confidence = round(margin * coverage, 4)
+
+    return {
+        "language": language,
+        "confidence": confidence,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
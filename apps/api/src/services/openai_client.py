@@ -0,0 +1,263 @@
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from core.rate_limit import AsyncRateLimiter
+from utils.tokens import count_message_tokens
+import config
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency: after `failure_threshold` consecutive failures
+    the circuit opens and calls fail immediately for `reset_timeout` seconds, then a
+    single trial call is let through (half open) and closes the circuit if it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+
+    def before_call(self) -> None:
+        """
+        Raises CircuitOpenError when calls are not allowed right now
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError("OpenAI API circuit is open after repeated failures")
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._trial_in_flight:
+                raise CircuitOpenError("OpenAI API circuit is half open, waiting for the trial call")
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._trial_in_flight = False
+        self.failures += 1
+        if self.state == HALF_OPEN or (self.failure_threshold and self.failures >= self.failure_threshold):
+            if self.state != OPEN:
+                self.times_opened += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """
+        Frees the trial slot of a call that ended without telling whether the API is healthy
+        """
+        self._trial_in_flight = False
+
+
+class ResilientOpenAI:
+    """
+    Long-lived AsyncOpenAI client shared by every request, with:
+
+    - a pooled HTTP client, so connections are reused between calls;
+    - token buckets for requests per minute and tokens per minute (prompt tokens
+      plus max_tokens are reserved up front, then corrected with the actual usage);
+    - retries with exponential backoff and full jitter on 429, 5xx, timeouts and
+      connection errors, honoring Retry-After (a 429 also pauses the buckets); an
+      exhausted quota (429 insufficient_quota) is not retried;
+    - a circuit breaker that fails fast while the API keeps failing, checked before
+      any token is taken so rejected calls leave the buckets untouched.
+
+    The tokens reserved by an attempt that fails are given back.
+
+    It exposes the same chat.completions.create() as AsyncOpenAI.
+    """
+
+    def __init__(self, client: Optional["AsyncOpenAI"] = None, requests_per_minute: float = 0,
+                 tokens_per_minute: float = 0, max_retries: int = 5, base_delay: float = 0.5,
+                 max_delay: float = 20.0, breaker: Optional[CircuitBreaker] = None):
+        if client is None:
+            from openai import AsyncOpenAI
+
+            client = AsyncOpenAI(max_retries=0)
+        self.client = client
+        self.requests = AsyncRateLimiter(requests_per_minute, period=60.0)
+        self.tokens = AsyncRateLimiter(tokens_per_minute, period=60.0)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.counters = {"calls": 0, "retries": 0, "rate_limited": 0, "server_errors": 0,
+                         "connection_errors": 0, "failed": 0, "circuit_rejected": 0}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create_chat_completion))
+
+    @property
+    def api_key(self) -> str:
+        return self.client.api_key
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Full jitter exponential backoff, never shorter than the server's Retry-After
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    async def create_chat_completion(self, **kwargs) -> Any:
+        import openai
+
+        reserved = count_message_tokens(kwargs.get("messages", []), kwargs.get("model", config.OPENAI_MODEL))
+        reserved += kwargs.get("max_tokens") or 0
+
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self.counters["circuit_rejected"] += 1
+                raise
+            try:
+                await self.requests.acquire()
+                await self.tokens.acquire(reserved)
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.counters["calls"] += 1
+            try:
+                response = await self.client.chat.completions.create(**kwargs)
+            except openai.RateLimitError as e:
+                self.breaker.release()
+                self.tokens.adjust(-reserved)
+                self.counters["rate_limited"] += 1
+                if is_quota_exhausted(e):
+                    # Not transient: retrying only delays the error
+                    self.counters["failed"] += 1
+                    raise
+                # The API is healthy but we are over its limits: slow everyone down
+                retry_after = retry_after_seconds(e.response)
+                self.requests.pause(retry_after if retry_after is not None else self.backoff_delay(attempt))
+                error = e
+            except (openai.InternalServerError, openai.APIConnectionError) as e:
+                self.breaker.record_failure()
+                self.tokens.adjust(-reserved)
+                key = "connection_errors" if isinstance(e, openai.APIConnectionError) else "server_errors"
+                self.counters[key] += 1
+                retry_after = None
+                error = e
+            except BaseException:
+                # Client errors (400, 401...) do not tell anything about the API's health
+                self.breaker.release()
+                self.tokens.adjust(-reserved)
+                raise
+            else:
+                self.breaker.record_success()
+                usage = getattr(response, "usage", None)
+                if usage is not None and usage.total_tokens:
+                    self.tokens.adjust(usage.total_tokens - reserved)
+                return response
+
+            if attempt >= self.max_retries:
+                self.counters["failed"] += 1
+                raise error
+            delay = self.backoff_delay(attempt, retry_after)
+            attempt += 1
+            self.counters["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.times_opened,
+            "rate_limit_wait_seconds": round(self.requests.waited_seconds + self.tokens.waited_seconds, 3),
+        }
+
+
+def is_quota_exhausted(error: Exception) -> bool:
+    """
+    Whether a 429 means the account ran out of credits rather than hit a rate limit
+    """
+    return "insufficient_quota" in (getattr(error, "code", None), getattr(error, "type", None))
+
+
+def retry_after_seconds(response: Optional["httpx.Response"]) -> Optional[float]:
+    """
+    Reads the Retry-After header (in seconds) of a rate limited response
+    """
+    if response is None:
+        return None
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = response.headers.get(header)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue
+    return None
+
+
+_shared_client: Optional[ResilientOpenAI] = None
+
+
+def get_openai_client() -> ResilientOpenAI:
+    """
+    Returns the OpenAI client shared by the whole process, created on first use
+    so its limiters are bound to the running event loop. The openai package is
+    imported here rather than at startup, which shortens cold starts.
+    """
+    global _shared_client
+    if _shared_client is None:
+        import httpx
+        from openai import AsyncOpenAI
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=config.OPENAI_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(config.OPENAI_TIMEOUT, connect=10.0),
+        )
+        _shared_client = ResilientOpenAI(
+            AsyncOpenAI(http_client=http_client, max_retries=0),
+            requests_per_minute=config.OPENAI_REQUESTS_PER_MINUTE,
+            tokens_per_minute=config.OPENAI_TOKENS_PER_MINUTE,
+            max_retries=config.OPENAI_MAX_RETRIES,
+            base_delay=config.OPENAI_RETRY_BASE_DELAY,
+            max_delay=config.OPENAI_RETRY_MAX_DELAY,
+            breaker=CircuitBreaker(config.OPENAI_CIRCUIT_FAILURE_THRESHOLD, config.OPENAI_CIRCUIT_RESET_SECONDS),
+        )
+    return _shared_client
+
+
+def shared_client_stats() -> Optional[Dict[str, Any]]:
+    """
+    Counters of the shared client, None when it has not been created yet
+    """
+    return _shared_client.stats() if _shared_client is not None else None
+
+
+async def close_openai_client() -> None:
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.close()
+        _shared_client = None
@@ -0,0 +1,339 @@
+import asyncio
+import importlib
+import logging
+import math
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+from core.cache import create_cache, make_key
+from utils.tokens import count_tokens, trim_to_tokens
+import config
+
+logger = logging.getLogger(__name__)
+
+# Document kinds found by the pre-scan
+TEXT = "text"
+SCANNED = "scanned"
+EMPTY = "empty"
+
+# Pre-scan results keyed by the SHA-256 of the PDF, so re-uploads of a scanned
+# document are rejected without opening it again
+pdf_classification_cache = create_cache(max_entries=config.PDF_CLASSIFICATION_CACHE_MAX_ENTRIES)
+
+
+class ScannedPdfError(Exception):
+    """
+    Raised when a PDF has no extractable text (scanned or empty) and no OCR backend can read it
+    """
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> Executor:
+    """
+    Returns the shared, bounded pool used for PDF extraction. PyMuPDF holds the GIL
+    for most of the parsing, so a process pool is used when available; environments
+    without multiprocessing support (e.g. serverless functions) fall back to threads.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = max(1, config.PDF_EXTRACTION_WORKERS)
+            if config.PDF_EXTRACTION_USE_PROCESSES:
+                try:
+                    _executor = ProcessPoolExecutor(max_workers=workers)
+                except (OSError, NotImplementedError) as e:
+                    logger.warning("Process pool unavailable, extracting PDFs in threads: %s", e)
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-extract")
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """
+    Shuts down the shared extraction pool
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+
+def load_pymupdf() -> str:
+    """
+    Imports PyMuPDF and returns its version
+    """
+    import fitz  # PyMuPDF
+
+    return fitz.VersionBind
+
+
+async def preload_pymupdf() -> None:
+    """
+    Imports PyMuPDF in this process, then starts the extraction workers with it
+    loaded (forked workers inherit the module, the others import it), so the
+    first extraction pays for neither
+    """
+    await asyncio.to_thread(load_pymupdf)
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    await asyncio.gather(*[loop.run_in_executor(executor, load_pymupdf)
+                           for _ in range(max(1, config.PDF_EXTRACTION_WORKERS))])
+
+
+def open_pdf(source: Union[bytes, str]):
+    """
+    Opens a PDF from its raw bytes or from its path; PyMuPDF reads files
+    from disk as needed instead of holding a copy in memory
+    """
+    import fitz  # PyMuPDF
+
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def read_outline(source: Union[bytes, str]) -> Tuple[int, List[int]]:
+    """
+    Returns the page count and the (0-based) pages where table of contents entries start.
+    Only parses the document structure, not the page contents.
+    """
+    with open_pdf(source) as doc:
+        toc_pages = sorted({page - 1 for _, _, page in doc.get_toc() if 0 < page <= doc.page_count})
+        return doc.page_count, toc_pages
+
+
+def extract_pages(source: Union[bytes, str], page_numbers: List[int]) -> List[str]:
+    """
+    Extracts the text of the given (0-based) pages.
+    Runs inside the extraction pool, so it only takes picklable arguments:
+    passing a path avoids sending the whole PDF to the worker with every batch.
+    """
+    with open_pdf(source) as doc:
+        return [doc[page_number].get_text() for page_number in page_numbers]
+
+
+def choose_prescan_pages(total_pages: int, sample_size: int) -> List[int]:
+    """
+    Chooses up to sample_size pages evenly spaced across the document, starting with the first
+    """
+    if total_pages <= sample_size:
+        return list(range(total_pages))
+    step = total_pages / sample_size
+    return sorted({int(index * step) for index in range(sample_size)})
+
+
+def classify_pages(source: Union[bytes, str], sample_size: int, min_chars: int) -> Dict:
+    """
+    Classifies a PDF from a sample of its pages: "text" when the sampled pages hold
+    at least min_chars characters of text in total, however sparse each page is,
+    otherwise "scanned" when they contain images, else "empty". Runs inside the
+    extraction pool.
+    """
+    with open_pdf(source) as doc:
+        pages = choose_prescan_pages(doc.page_count, sample_size)
+        text_chars = text_pages = image_pages = 0
+        for page_number in pages:
+            page = doc[page_number]
+            chars = len("".join(page.get_text().split()))
+            text_chars += chars
+            if chars:
+                text_pages += 1
+            elif page.get_images():
+                image_pages += 1
+        total_pages = doc.page_count
+
+    if text_chars >= min_chars:
+        kind = TEXT
+    elif image_pages:
+        kind = SCANNED
+    else:
+        kind = EMPTY
+    return {"kind": kind, "total_pages": total_pages, "sampled_pages": len(pages), "text_chars": text_chars,
+            "text_pages": text_pages, "image_pages": image_pages}
+
+
+async def classify_pdf(source: Union[bytes, str], content_hash: Optional[str] = None) -> Tuple[Dict, bool]:
+    """
+    Pre-scans the PDF (see classify_pages) off the event loop, reusing the cached
+    classification of the same content when its hash is given.
+    Returns the classification and whether it came from the cache.
+    """
+    key = None
+    if content_hash is not None:
+        key = make_key(content_hash, pages=config.PDF_PRESCAN_PAGES, min_chars=config.PDF_PRESCAN_MIN_CHARS)
+        cached = await pdf_classification_cache.get_async(key)
+        if cached is not None:
+            return cached, True
+
+    loop = asyncio.get_running_loop()
+    classification = await loop.run_in_executor(
+        get_executor(), classify_pages, source, config.PDF_PRESCAN_PAGES, config.PDF_PRESCAN_MIN_CHARS)
+    if key is not None:
+        await pdf_classification_cache.set_async(key, classification)
+    return classification, False
+
+
+def load_ocr_backend(backend: str) -> Callable[[bytes, str], str]:
+    """
+    Imports a "module:function" OCR backend, called with the PNG rendering of a page
+    and the configured language, returning the page text
+    """
+    module_name, _, function_name = backend.partition(":")
+    if not function_name:
+        raise ValueError(f"OCR backend must be \"tesseract\" or \"module:function\", got {backend!r}")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def ocr_pages(source: Union[bytes, str], page_numbers: List[int], backend: str, language: str,
+              dpi: int) -> List[str]:
+    """
+    Recognizes the text of the given (0-based) pages. Runs inside the extraction pool.
+    The "tesseract" backend uses PyMuPDF's OCR, which needs Tesseract and its language
+    data installed locally; other backends are loaded with load_ocr_backend.
+    """
+    recognize = None if backend == "tesseract" else load_ocr_backend(backend)
+    texts = []
+    with open_pdf(source) as doc:
+        for page_number in page_numbers:
+            page = doc[page_number]
+            if recognize is None:
+                textpage = page.get_textpage_ocr(language=language, dpi=dpi, full=True)
+                texts.append(page.get_text(textpage=textpage))
+            else:
+                texts.append(recognize(page.get_pixmap(dpi=dpi).tobytes("png"), language))
+    return texts
+
+
+def choose_scan_pages(total_pages: int, max_scan_pages: int, toc_pages: List[int]) -> List[int]:
+    """
+    Chooses which pages to scan: every page for small documents, otherwise the
+    table of contents entry pages plus evenly spaced pages across the whole document
+    """
+    if not max_scan_pages or total_pages <= max_scan_pages:
+        return list(range(total_pages))
+
+    chosen: Set[int] = set(toc_pages[:max_scan_pages // 2])
+    remaining = max_scan_pages - len(chosen)
+    step = total_pages / remaining
+    chosen.update(int(index * step) for index in range(remaining))
+    return sorted(chosen)
+
+
+def plan_page_batches(page_numbers: List[int], pages_per_task: int) -> List[List[int]]:
+    """
+    Splits the pages to extract into batches of at most pages_per_task pages
+    """
+    pages_per_task = max(1, pages_per_task)
+    return [
+        page_numbers[start:start + pages_per_task]
+        for start in range(0, len(page_numbers), pages_per_task)
+    ]
+
+
+def looks_like_heading(page_text: str) -> bool:
+    """
+    Cheap heading heuristic: the page starts with a short line without final punctuation
+    """
+    for line in page_text.splitlines():
+        line = line.strip()
+        if line:
+            return len(line) <= 80 and not line.endswith((".", ",", ";", ":"))
+    return False
+
+
+def sample_pages(page_texts: Dict[int, str], toc_pages: List[int], max_tokens: int,
+                 chunk_tokens: int, model: str) -> List[Tuple[int, str]]:
+    """
+    Selects representative chunks spread across the document under a token budget.
+    The scanned pages are split into consecutive sections, one chunk per section, and
+    each section contributes its best page: table of contents entries and headings
+    first, then the densest text. Near-empty pages are skipped.
+    """
+    pages = sorted(page_texts)
+    page_tokens = {page: count_tokens(page_texts[page], model) for page in pages}
+    if not max_tokens or sum(page_tokens.values()) <= max_tokens:
+        return [(page, page_texts[page]) for page in pages]
+
+    candidates = [page for page in pages if page_tokens[page] >= 50] or pages
+    sections = max(1, min(len(candidates), max_tokens // max(1, chunk_tokens)))
+    share = max_tokens // sections
+    toc = set(toc_pages)
+    typical_length = sorted(page_tokens[page] for page in candidates)[len(candidates) // 2] or 1
+
+    def score(page: int) -> float:
+        value = min(page_tokens[page], typical_length) / typical_length
+        if page in toc:
+            value += 1.0
+        elif looks_like_heading(page_texts[page]):
+            value += 0.5
+        return value
+
+    selected = []
+    for section in range(sections):
+        section_pages = candidates[section * len(candidates) // sections:(section + 1) * len(candidates) // sections]
+        if not section_pages:
+            continue
+        best = max(section_pages, key=score)
+        selected.append((best, trim_to_tokens(page_texts[best], share, model)))
+    return selected
+
+
+async def extract_text(source: Union[bytes, str], max_pages: Optional[int] = None,
+                       max_tokens: Optional[int] = None,
+                       max_scan_pages: Optional[int] = None, ocr: bool = False) -> Tuple[str, dict]:
+    """
+    Extracts text from the PDF (raw bytes or a path) off the event loop. At most max_scan_pages
+    pages are parsed, in parallel batches, and when their text exceeds max_tokens a
+    representative sample spread across the whole document is kept. A budget of 0 means unlimited.
+    With ocr, the text is recognized by the configured OCR backend instead, on at
+    most PDF_OCR_MAX_PAGES pages spread evenly across the pool.
+    """
+    max_pages = config.PDF_MAX_PAGES if max_pages is None else max_pages
+    max_tokens = config.PDF_MAX_TOKENS if max_tokens is None else max_tokens
+    max_scan_pages = config.PDF_SCAN_MAX_PAGES if max_scan_pages is None else max_scan_pages
+
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+
+    total_pages, toc_pages = await loop.run_in_executor(executor, read_outline, source)
+    pages_available = min(total_pages, max_pages) if max_pages else total_pages
+    toc_pages = [page for page in toc_pages if page < pages_available]
+    if ocr:
+        max_scan_pages = min(filter(None, (max_scan_pages, config.PDF_OCR_MAX_PAGES)), default=0)
+    scan_pages = choose_scan_pages(pages_available, max_scan_pages, toc_pages)
+
+    if ocr:
+        extract = partial(ocr_pages, backend=config.PDF_OCR_BACKEND, language=config.PDF_OCR_LANGUAGE,
+                          dpi=config.PDF_OCR_DPI)
+        pages_per_task = math.ceil(len(scan_pages) / max(1, config.PDF_EXTRACTION_WORKERS))
+    else:
+        extract = extract_pages
+        pages_per_task = config.PDF_PAGES_PER_TASK
+    batches = plan_page_batches(scan_pages, pages_per_task)
+    results = await asyncio.gather(*[
+        loop.run_in_executor(executor, extract, source, batch)
+        for batch in batches
+    ])
+    page_texts = {
+        page: page_text
+        for batch, batch_texts in zip(batches, results)
+        for page, page_text in zip(batch, batch_texts)
+    }
+
+    # Counting tokens of hundreds of pages takes a while, so it stays off the event loop too
+    selected = await asyncio.to_thread(sample_pages, page_texts, toc_pages, max_tokens,
+                                       config.PDF_SAMPLE_CHUNK_TOKENS, config.OPENAI_MODEL)
+    text = "".join(page_text for _, page_text in selected)
+    was_sampled = len(text) < sum(len(page_text) for page_text in page_texts.values())
+
+    return text, {
+        "total_pages": total_pages,
+        "pages_read": len(page_texts),
+        "was_truncated": was_sampled or len(page_texts) < total_pages,
+        "pages_used": [page + 1 for page, _ in selected]
+    }
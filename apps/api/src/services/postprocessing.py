@@ -0,0 +1,84 @@
+import hashlib
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from models.quiz import QuizQuestion
+
+OPTIONS_PER_QUESTION = 4
+
+
+def validate_question(raw: Any) -> Optional[Dict]:
+    """
+    Validates a question produced by the model against the QuizQuestion schema:
+    a non-empty question, exactly OPTIONS_PER_QUESTION distinct non-empty options
+    and a correct_index pointing at one of them. Returns the cleaned question,
+    or None when it is invalid.
+    """
+    if not isinstance(raw, dict):
+        return None
+    try:
+        question = QuizQuestion(**raw)
+    except (ValidationError, TypeError):
+        return None
+
+    text = question.question.strip()
+    options = [option.strip() for option in question.options]
+    if not text or len(options) != OPTIONS_PER_QUESTION or not all(options):
+        return None
+    if len({option.lower() for option in options}) != len(options):
+        return None
+    if not 0 <= question.correct_index < len(options):
+        return None
+    return {"question": text, "options": options, "correct_index": question.correct_index}
+
+
+def shuffle_options(question: Dict, seed: Optional[str] = None) -> Dict:
+    """
+    Shuffles the options of a valid question and remaps correct_index.
+    The RNG is seeded with the question's content (or the given seed), so the
+    same question is always shuffled the same way.
+    """
+    seed = seed or question["question"] + "\x00" + "\x00".join(question["options"])
+    rng = random.Random(hashlib.sha256(seed.encode("utf-8")).digest())
+    order = list(range(len(question["options"])))
+    rng.shuffle(order)
+    return {
+        "question": question["question"],
+        "options": [question["options"][index] for index in order],
+        "correct_index": order.index(question["correct_index"]),
+    }
+
+
+def postprocess_question(raw: Any) -> Optional[Dict]:
+    """
+    Validates and shuffles one question, None when it is invalid
+    """
+    question = validate_question(raw)
+    return shuffle_options(question) if question is not None else None
+
+
+def postprocess_questions(raw_questions: List[Any], stats: Optional[Dict] = None) -> Tuple[List[Dict], int]:
+    """
+    Validates and shuffles the questions produced by the model, dropping invalid ones.
+    Returns the valid questions and the number of dropped ones.
+    """
+    questions = []
+    for raw in raw_questions:
+        question = postprocess_question(raw)
+        if question is not None:
+            questions.append(question)
+    invalid = len(raw_questions) - len(questions)
+    record_invalid(stats, invalid)
+    return questions, invalid
+
+
+def record_invalid(stats: Optional[Dict], invalid: int) -> None:
+    """
+    Adds dropped questions to stats["validation"]
+    """
+    if stats is None:
+        return
+    validation = stats.setdefault("validation", {"invalid_questions": 0})
+    validation["invalid_questions"] += invalid
@@ -0,0 +1,302 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from services.quiz_generator import WORD, generate_quiz
+import config
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def normalize_topic(topic: Optional[str]) -> str:
+    return " ".join((topic or "").lower().split())
+
+
+def question_hash(question: Dict) -> str:
+    """
+    Identity of a question: its wording and options, regardless of the option order
+    """
+    options = sorted(option.strip().lower() for option in question["options"])
+    content = "\x00".join([question["question"].strip().lower(), *options])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def chunk_text(text: str) -> List[Tuple[str, str]]:
+    """
+    Splits the document text into (hash, chunk) pairs with content-defined boundaries:
+    a chunk ends after a sentence whose hash is a multiple of QUESTION_BANK_CHUNK_SENTENCES
+    (or at four times that many sentences). Boundaries do not depend on what precedes
+    a passage, so documents sharing passages share chunk hashes.
+    """
+    average = max(1, config.QUESTION_BANK_CHUNK_SENTENCES)
+    chunks, current = [], []
+    for sentence in SENTENCE_END.split(text):
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            continue
+        current.append(sentence)
+        digest = hashlib.sha256(sentence.encode("utf-8")).digest()
+        if int.from_bytes(digest[:4], "big") % average == 0 or len(current) >= 4 * average:
+            chunks.append(" ".join(current))
+            current = []
+    if current:
+        chunks.append(" ".join(current))
+    return [(hashlib.sha256(chunk.encode("utf-8")).hexdigest(), chunk) for chunk in chunks]
+
+
+def attribute_chunks(questions: List[Dict], chunks: List[Tuple[str, str]]) -> List[Optional[str]]:
+    """
+    Returns the hash of the chunk each question most likely comes from: the one
+    sharing the most words with the question and its options (None without overlap)
+    """
+    chunk_words = [(chunk_hash, set(WORD.findall(chunk.lower()))) for chunk_hash, chunk in chunks]
+    attributed = []
+    for question in questions:
+        words = set(WORD.findall(" ".join([question["question"], *question["options"]]).lower()))
+        best, best_overlap = None, 0
+        for chunk_hash, candidates in chunk_words:
+            overlap = len(words & candidates)
+            if overlap > best_overlap:
+                best, best_overlap = chunk_hash, overlap
+        attributed.append(best)
+    return attributed
+
+
+class QuestionBank:
+    """
+    Persistent store of generated questions backed by SQLite. Questions are linked
+    to the documents and chunks (by hash) they were generated from or served for,
+    so later uploads sharing content can reuse them. Topic and language lookups
+    use a composite index and keyset pagination, so they stay fast with millions
+    of questions.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY,
+                question_hash TEXT NOT NULL UNIQUE,
+                question TEXT NOT NULL,
+                options TEXT NOT NULL,
+                correct_index INTEGER NOT NULL,
+                topic TEXT NOT NULL,
+                topic_key TEXT NOT NULL,
+                language TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS question_sources (
+                question_id INTEGER NOT NULL REFERENCES questions (id),
+                document_hash TEXT NOT NULL,
+                chunk_hash TEXT,
+                PRIMARY KEY (document_hash, question_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_questions_topic_language ON questions (topic_key, language, id);
+            CREATE INDEX IF NOT EXISTS idx_questions_language ON questions (language, id);
+            CREATE INDEX IF NOT EXISTS idx_question_sources_chunk ON question_sources (chunk_hash);
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _row_to_question(row) -> Dict:
+        question_id, question, options, correct_index, topic, language = row[:6]
+        return {"id": question_id, "question": question, "options": json.loads(options),
+                "correct_index": correct_index, "topic": topic, "language": language}
+
+    def add(self, questions: List[Dict], document_hash: str, chunk_hashes: Sequence[Optional[str]],
+            topic: str, language: str) -> List[int]:
+        """
+        Stores questions generated from a document (one chunk hash per question) and
+        returns their ids. Questions already in the bank are only linked to the document.
+        """
+        now = time.time()
+        ids = []
+        with self._lock:
+            for question, chunk_hash in zip(questions, chunk_hashes):
+                key = question_hash(question)
+                self._conn.execute(
+                    """
+                    INSERT OR IGNORE INTO questions
+                        (question_hash, question, options, correct_index, topic, topic_key, language, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (key, question["question"], json.dumps(question["options"], ensure_ascii=False),
+                     question["correct_index"], topic, normalize_topic(topic), language, now),
+                )
+                (question_id,) = self._conn.execute(
+                    "SELECT id FROM questions WHERE question_hash = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO question_sources (question_id, document_hash, chunk_hash) VALUES (?, ?, ?)",
+                    (question_id, document_hash, chunk_hash),
+                )
+                ids.append(question_id)
+            self._conn.commit()
+        return ids
+
+    def link(self, question_ids: Sequence[int], document_hash: str) -> None:
+        """
+        Links reused questions to another document, so its next upload finds them by document hash
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO question_sources (question_id, document_hash) VALUES (?, ?)",
+                [(question_id, document_hash) for question_id in question_ids],
+            )
+            self._conn.commit()
+
+    def find_for_document(self, document_hash: str, chunk_hashes: Sequence[str], limit: int) -> List[Dict]:
+        """
+        Returns up to limit questions of the document or of any of its chunks,
+        questions of the same document first, then those matching the most chunks
+        """
+        chunk_hashes = list(dict.fromkeys(chunk_hashes))
+        placeholders = ",".join("?" * len(chunk_hashes)) or "NULL"
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT q.id, q.question, q.options, q.correct_index, q.topic, q.language,
+                       MAX(s.document_hash = ?) AS same_document, COUNT(s.chunk_hash) AS matching_chunks
+                FROM question_sources s JOIN questions q ON q.id = s.question_id
+                WHERE s.document_hash = ? OR s.chunk_hash IN ({placeholders})
+                GROUP BY q.id
+                ORDER BY same_document DESC, matching_chunks DESC, q.id
+                LIMIT ?
+                """,
+                (document_hash, document_hash, *chunk_hashes, limit),
+            ).fetchall()
+        return [self._row_to_question(row) for row in rows]
+
+    def search(self, topic: Optional[str] = None, language: Optional[str] = None,
+               after_id: int = 0, limit: int = 50) -> List[Dict]:
+        """
+        Lists questions by topic and/or language in id order. Pass the last id of a
+        page as after_id to get the next one (keyset pagination, no OFFSET scans).
+        """
+        conditions, params = ["id > ?"], [after_id]
+        if topic:
+            conditions.append("topic_key = ?")
+            params.append(normalize_topic(topic))
+        if language:
+            conditions.append("language = ?")
+            params.append(language)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT id, question, options, correct_index, topic, language FROM questions
+                WHERE {" AND ".join(conditions)} ORDER BY id LIMIT ?
+                """,
+                (*params, limit),
+            ).fetchall()
+        return [self._row_to_question(row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (questions,) = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()
+            (documents,) = self._conn.execute(
+                "SELECT COUNT(DISTINCT document_hash) FROM question_sources").fetchone()
+        return {"questions": questions, "documents": documents}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_bank: Optional[QuestionBank] = None
+_bank_unavailable = False
+_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> Optional[QuestionBank]:
+    """
+    Returns the process-wide question bank, None when it is disabled (no
+    QUESTION_BANK_PATH) or its database cannot be opened (e.g. on a read-only filesystem)
+    """
+    global _bank, _bank_unavailable
+    if not config.QUESTION_BANK_PATH:
+        return None
+    with _bank_lock:
+        if _bank is None and not _bank_unavailable:
+            try:
+                _bank = QuestionBank(config.QUESTION_BANK_PATH)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning("Question bank unavailable, questions will not be reused: %s", e)
+                _bank_unavailable = True
+        return _bank
+
+
+def public_question(question: Dict) -> Dict:
+    return {"question": question["question"], "options": question["options"],
+            "correct_index": question["correct_index"]}
+
+
+def find_bank_questions(bank: QuestionBank, text: str, document_hash: str,
+                        num_questions: int) -> Tuple[List[Tuple[str, str]], List[Dict]]:
+    """
+    Returns the chunks of the text and up to num_questions reusable questions:
+    those already served for the same document or generated from shared chunks
+    """
+    chunks = chunk_text(text)
+    reused = bank.find_for_document(document_hash, [chunk_hash for chunk_hash, _ in chunks], num_questions)
+    return chunks, reused
+
+
+def bank_topic(reused: List[Dict]) -> str:
+    """
+    Most common topic of the reused questions
+    """
+    return Counter(question["topic"] for question in reused).most_common(1)[0][0]
+
+
+def save_bank_questions(bank: QuestionBank, document_hash: str, chunks: List[Tuple[str, str]],
+                        reused: List[Dict], generated: List[Dict], topic: str, language: str,
+                        stats: Optional[Dict] = None) -> None:
+    """
+    Adds the generated questions to the bank and links the reused ones to the document
+    """
+    if generated:
+        bank.add(generated, document_hash, attribute_chunks(generated, chunks), topic, language)
+    bank.link([question["id"] for question in reused], document_hash)
+    if stats is not None:
+        stats["question_bank"] = {"reused": len(reused), "generated": len(generated)}
+
+
+async def generate_quiz_from_bank(text: str, num_questions: int, document_hash: str,
+                                  stats: Optional[Dict] = None,
+                                  bank: Optional[QuestionBank] = None) -> Tuple[List[Dict], str]:
+    """
+    Generates a quiz reusing questions of the bank (see find_bank_questions).
+    Only the missing count is generated, topped up like any quiz when generated
+    questions repeat reused ones, and the new questions are added to the bank.
+    """
+    bank = bank or get_question_bank()
+    if bank is None:
+        return await generate_quiz(text, num_questions, stats)
+
+    stats = stats if stats is not None else {}
+    # SQLite calls block, so they run in a thread rather than on the event loop
+    chunks, reused = await asyncio.to_thread(find_bank_questions, bank, text, document_hash, num_questions)
+    questions = [public_question(question) for question in reused]
+    if len(questions) >= num_questions:
+        await asyncio.to_thread(save_bank_questions, bank, document_hash, chunks, reused, [], "", "", stats)
+        return questions, bank_topic(reused)
+
+    generated, topic = await generate_quiz(text, num_questions - len(questions), stats, existing=questions)
+    language = stats.get("language_detection", {}).get("language", "")
+    await asyncio.to_thread(save_bank_questions, bank, document_hash, chunks, reused, generated, topic, language,
+                            stats)
+    return questions + generated, topic
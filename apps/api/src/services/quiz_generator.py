@@ -1,112 +1,233 @@
+import asyncio
+import hashlib
 import json
-from typing import List, Dict, Tuple
-from openai import OpenAI
+import logging
+import math
+import re
+import time
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Optional, Sequence, Tuple, Union
+from core.metrics import registry, stage_timer
+from core.uploads import SpooledFile
+from services.language_detector import detect_language_local
+from services import pdf_extractor
+from services.openai_client import get_openai_client
+from services.postprocessing import postprocess_question, postprocess_questions, record_invalid
+from services.summarizer import map_reduce_summarize, split_into_chunks
+from utils.json_stream import JsonArrayStreamParser
+from utils.tokens import context_tokens, count_message_tokens, count_tokens, record_usage, trim_to_tokens
+import config
 
-def detect_language(text: str, client: OpenAI) -> str:
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# Model used for every completion and the version of the prompts below.
+# Bump PROMPT_VERSION whenever a prompt changes so cached quizzes are invalidated.
+MODEL = config.OPENAI_MODEL
+PROMPT_VERSION = "4"
+
+logger = logging.getLogger(__name__)
+
+PDF_BYTES_READ = registry.counter("quiz_pdf_bytes_read_total", "Bytes of uploaded PDFs extracted")
+PDF_PAGES_PARSED = registry.counter("quiz_pdf_pages_parsed_total", "PDF pages parsed during extraction")
+PDF_DOCUMENTS = registry.counter("quiz_pdf_documents_total", "PDFs by pre-scan classification and outcome",
+                                 ["kind", "outcome"])
+
+async def detect_language_llm(text: str, client: "AsyncOpenAI", stats: Optional[Dict] = None) -> str:
     """
     Detects the language of the text using OpenAI API
     """
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response = await client.chat.completions.create(
+            model=MODEL,
             messages=[
                 {"role": "system", "content": "You are a language detection expert. Respond only with the ISO language code (e.g., 'en', 'pt', 'es', 'fr', etc)."},
-                {"role": "user", "content": f"What is the language of this text? Respond only with the language code:\n\n{text[:1000]}"}
+                {"role": "user", "content": f"What is the language of this text? Respond only with the language code:\n\n{trim_to_tokens(text, config.LANGUAGE_SAMPLE_TOKENS, MODEL)}"}
             ]
         )
+        record_usage(stats, "language", response)
         return response.choices[0].message.content.strip().lower()
     except Exception as e:
-        print(f"Error detecting language: {str(e)}")
+        logger.warning("Error detecting language: %s", e)
         return "en"  # Default to English if detection fails
 
-def identify_topic(text: str, client: OpenAI, language: str) -> str:
+async def detect_language(text: str, client: "AsyncOpenAI", stats: Optional[Dict] = None) -> str:
+    """
+    Detects the language of the text locally, falling back to the OpenAI API
+    only when the local detector is not confident enough
+    """
+    detection = detect_language_local(text)
+    detection["method"] = "local"
+    
+    if (detection["confidence"] < config.LANGUAGE_DETECTION_MIN_CONFIDENCE
+            and config.LANGUAGE_DETECTION_LLM_FALLBACK):
+        started = time.perf_counter()
+        detection["language"] = await detect_language_llm(text, client, stats)
+        detection["method"] = "llm"
+        detection["elapsed_ms"] += round((time.perf_counter() - started) * 1000, 3)
+    
+    if stats is not None:
+        stats["language_detection"] = detection
+    return detection["language"]
+
+async def identify_topic(text: str, client: "AsyncOpenAI", language: Optional[str] = None,
+                         stats: Optional[Dict] = None) -> str:
     """
     Identifies the main topic of the text using OpenAI API
     """
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response = await client.chat.completions.create(
+            model=MODEL,
             messages=[
                 {"role": "system", "content": "You are an expert at identifying the main topic or subject area of academic texts. Respond with a concise topic (1-3 words)."},
-                {"role": "user", "content": f"What is the main topic or subject area of this text? Be concise (1-3 words):\n\n{text[:2000]}"}
+                {"role": "user", "content": f"What is the main topic or subject area of this text? Be concise (1-3 words):\n\n{trim_to_tokens(text, config.TOPIC_SAMPLE_TOKENS, MODEL)}"}
             ]
         )
+        record_usage(stats, "topic", response)
         return response.choices[0].message.content.strip()
     except Exception as e:
-        print(f"Error identifying topic: {str(e)}")
+        logger.warning("Error identifying topic: %s", e)
         return "General Knowledge"  # Default topic if identification fails
 
-async def extract_text_from_pdf(pdf_file) -> tuple[str, dict]:
+async def extract_text_from_bytes(pdf_content: bytes, stats: Optional[Dict] = None) -> tuple[str, dict]:
     """
-    Extracts text from PDF file
+    Extracts text from the raw bytes of a PDF file without blocking the event loop
     """
-    try:
-        import fitz  # PyMuPDF
-        
-        # Read PDF content
-        pdf_content = await pdf_file.read()
-        
-        # Open PDF
-        doc = fitz.open(stream=pdf_content, filetype="pdf")
-        
-        # Initialize variables
-        text = ""
-        total_pages = len(doc)
-        pages_read = 0
-        was_truncated = False
-        
-        # Read pages
-        for page in doc:
-            text += page.get_text()
-            pages_read += 1
-            
-            # If text is too long, stop reading
-            if len(text) > 12000:  # Increased limit to get better context
-                was_truncated = True
-                break
-        
-        return text, {
-            "total_pages": total_pages,
-            "pages_read": pages_read,
-            "was_truncated": was_truncated
-        }
+    return await extract_text_from_source(pdf_content, len(pdf_content), stats,
+                                          hashlib.sha256(pdf_content).hexdigest())
 
+async def extract_text_from_file(pdf: SpooledFile, stats: Optional[Dict] = None) -> tuple[str, dict]:
+    """
+    Extracts text from a spooled PDF file without blocking the event loop
+    """
+    return await extract_text_from_source(pdf.source, pdf.size, stats, pdf.sha256)
+
+async def extract_text_from_source(source: Union[bytes, str], size: int, stats: Optional[Dict] = None,
+                                   content_hash: Optional[str] = None) -> tuple[str, dict]:
+    """
+    Extracts text from a PDF given as raw bytes or as a path. A pre-scan of a few
+    pages first detects documents without any text (scanned or empty), which are
+    read with the OCR backend when one is configured and otherwise rejected with
+    ScannedPdfError before the whole document is parsed. Documents with text, even
+    sparse, are extracted in full; when that yields no text the OCR backend, if any,
+    reads them instead.
+    """
+    classification, ocr = None, False
+    try:
+        with stage_timer(stats, "extraction"):
+            if config.PDF_PRESCAN_PAGES:
+                classification, cached = await pdf_extractor.classify_pdf(source, content_hash)
+                kind = classification["kind"]
+                ocr = kind == pdf_extractor.SCANNED and bool(config.PDF_OCR_BACKEND)
+                if kind != pdf_extractor.TEXT and not ocr:
+                    PDF_DOCUMENTS.inc(kind=kind, outcome="rejected")
+                    if kind == pdf_extractor.SCANNED:
+                        raise pdf_extractor.ScannedPdfError(
+                            "The PDF appears to be scanned (its pages are images without text). "
+                            "Please upload a PDF with selectable text.")
+                    raise pdf_extractor.ScannedPdfError("The PDF does not contain any text")
+            text, metadata = await pdf_extractor.extract_text(source, ocr=ocr)
+            if not ocr and not text.strip() and config.PDF_OCR_BACKEND:
+                ocr = True
+                text, metadata = await pdf_extractor.extract_text(source, ocr=True)
+    except pdf_extractor.ScannedPdfError:
+        raise
     except Exception as e:
         raise Exception(f"Error extracting text from PDF: {str(e)}")
+    
+    PDF_BYTES_READ.inc(size)
+    PDF_PAGES_PARSED.inc(metadata["pages_read"])
+    if classification is not None:
+        PDF_DOCUMENTS.inc(kind=classification["kind"], outcome="ocr" if ocr else "extracted")
+    if stats is not None:
+        stats["extraction"] = {"bytes_read": size, "pages_parsed": metadata["pages_read"]}
+        if classification is not None:
+            stats["extraction"].update({"document_type": classification["kind"], "ocr": ocr,
+                                        "classification_cached": cached})
+    return text, metadata
 
-def summarize_text(text: str, client: OpenAI, language: str) -> str:
+async def summarize_text(text: str, client: "AsyncOpenAI", language: str, stats: Optional[Dict] = None) -> str:
     """
-    Generates a summary of the text using OpenAI API
+    Generates a summary of the text using OpenAI API, with chunks summarized concurrently
     """
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": f"You are an expert at summarizing texts while maintaining key points and important concepts. Always respond in the same language as the input text ({language})."},
-                {"role": "user", "content": f"Create a detailed summary of the following text, keeping the most important concepts and information for question generation: \n\n{text[:8000]}"}
-            ]
-        )
-        return response.choices[0].message.content
+        return await map_reduce_summarize(text, client, language, stats)
 
     except Exception as e:
         raise Exception(f"Error summarizing text: {str(e)}")
 
-def generate_quiz(text: str, num_questions: int = 10) -> List[Dict]:
+def completion_token_reserve(num_questions: int) -> int:
     """
-    Generates a quiz using the OpenAI API
+    Tokens reserved for the model's answer when asking for num_questions questions
     """
-    client = OpenAI()
-    
-    # Detect language
-    language = detect_language(text, client)
+    return num_questions * config.QUIZ_TOKENS_PER_QUESTION
+
+def content_token_budget(num_questions: int) -> int:
+    """
+    Maximum number of tokens of base text sent along with the quiz prompt
+    """
+    prompt_tokens = count_message_tokens(build_quiz_messages("", num_questions, "en"), MODEL)
+    available = context_tokens(MODEL) - prompt_tokens - completion_token_reserve(num_questions)
+    return max(0, min(config.QUIZ_CONTENT_MAX_TOKENS, available))
+
+async def prepare_content_stages(text: str, client: "AsyncOpenAI", stats: Optional[Dict] = None,
+                                 num_questions: int = 10) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Runs the pre-processing calls concurrently and yields ("language" | "topic" | "content", value)
+    as soon as each one is ready. Topic identification does not depend on the language,
+    so it starts right away; the summary starts as soon as the language is known.
+    """
+    async def timed(stage: str, call):
+        with stage_timer(stats, stage):
+            return await call
     
-    # Identify topic
-    topic = identify_topic(text, client, language)
+    topic_task = asyncio.create_task(timed("topic", identify_topic(text, client, stats=stats)))
+    summary_task = None
+    try:
+        with stage_timer(stats, "language"):
+            language = await detect_language(text, client, stats)
+        yield "language", language
+        
+        # If text does not fit in the prompt's token budget, generate a summary first
+        text_tokens = count_tokens(text, MODEL)
+        budget = content_token_budget(num_questions)
+        if stats is not None:
+            stats["content_tokens"] = {"text": text_tokens, "budget": budget}
+        if text_tokens > budget:
+            summary_task = asyncio.create_task(timed("summary", summarize_text(text, client, language, stats)))
+        
+        pending = {task for task in (topic_task, summary_task) if task is not None}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is topic_task:
+                    yield "topic", task.result()
+                else:
+                    text = task.result()
+        
+        yield "content", text
+    finally:
+        for task in (topic_task, summary_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+async def prepare_content(text: str, client: "AsyncOpenAI", stats: Optional[Dict] = None,
+                          num_questions: int = 10) -> Tuple[str, str, str]:
+    """
+    Runs the pre-processing calls concurrently and returns (language, topic, content)
+    """
+    results = {}
+    async for stage, value in prepare_content_stages(text, client, stats, num_questions):
+        results[stage] = value
     
-    # If text is too long, generate a summary first
-    text_length = len(text)
-    if text_length > 4000:
-        text = summarize_text(text, client, language)
+    return results["language"], results["topic"], results["content"]
+
+def build_quiz_messages(text: str, num_questions: int, language: str) -> List[Dict]:
+    """
+    Builds the chat messages asking the model for the quiz questions.
+    The base text is packed into whatever is left of the token budget.
+    """
+    if text:
+        text = trim_to_tokens(text, content_token_budget(num_questions), MODEL)
     
     # Language-specific instructions
     language_instructions = {
@@ -117,78 +238,256 @@ def generate_quiz(text: str, num_questions: int = 10) -> List[Dict]:
     }.get(language, "Create questions in English")
     
     prompt = f"""
-    You are a multiple-choice question generator. Based on the provided text, create EXACTLY {num_questions} questions.
-    
-    IMPORTANT RULES:
-    1. Each question MUST have:
-       - A clear question
-       - EXACTLY 4 options
-       - Only ONE correct answer
-    2. Use ONLY information from the provided text
-    3. Vary the difficulty level of questions
-    4. {language_instructions}
-    5. Make sure all questions and answers are in the same language as the source text
-    6. VERY IMPORTANT: For each question, randomly place the correct answer in a different position (0-3)
-       - DO NOT always put the correct answer in the same position
-       - Distribute correct answers randomly across all positions
-       - Make sure the correct_index matches the actual position of the correct answer
+    Create EXACTLY {num_questions} multiple-choice questions based on the text below.
+    Each question has EXACTLY 4 options and only ONE correct answer.
+    Use ONLY information from the text and vary the difficulty. {language_instructions}.
     
     BASE TEXT:
     {text}
     
-    RESPONSE FORMAT:
-    You MUST return a JSON object with EXACTLY this structure:
-    {{
-        "questions": [
-            {{
-                "question": "Question text",
-                "options": [
-                    "Option A",
-                    "Option B",
-                    "Option C",
-                    "Option D"
-                ],
-                "correct_index": 2  // This should vary randomly for each question (0-3)
-            }}
-        ]
-    }}
-    
-    NOTES:
-    - correct_index must be a number between 0 and 3
-    - Generate EXACTLY {num_questions} questions
-    - DO NOT include explanations or additional text, just the JSON
-    - Make sure to randomize the position of correct answers
+    Return only this JSON, with correct_index (0-3) the position of the correct option:
+    {{"questions": [{{"question": "...", "options": ["...", "...", "...", "..."], "correct_index": 0}}]}}
     """
     
+    return [
+        {"role": "system", "content": f"You are an expert at creating multiple-choice questions in {language}. Always respond with valid JSON."},
+        {"role": "user", "content": prompt}
+    ]
+
+async def generate_questions(text: str, num_questions: int, language: str, client: "AsyncOpenAI",
+                             stats: Optional[Dict] = None) -> List[Dict]:
+    """
+    Generates the quiz questions for already prepared content
+    """
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response = await client.chat.completions.create(
+            model=MODEL,
             response_format={ "type": "json_object" },
-            messages=[
-                {"role": "system", "content": f"You are an expert at creating multiple-choice questions in {language}. Always respond with valid JSON. Remember to randomize the position of correct answers."},
-                {"role": "user", "content": prompt}
-            ]
+            messages=build_quiz_messages(text, num_questions, language),
+            max_tokens=completion_token_reserve(num_questions)
         )
+        record_usage(stats, "quiz", response)
         
         # Get model response
         response_content = response.choices[0].message.content
-        print("OpenAI Response:", response_content)  # Debug
+        logger.debug("Quiz response received (%d characters)", len(response_content or ""))
 
         # Parse JSON response
         quiz_data = json.loads(response_content)
-        print("Quiz data:", quiz_data)  # Debug
 
         # Verify if we have questions in expected format
-        if "questions" not in quiz_data:
+        if not isinstance(quiz_data, dict) or not isinstance(quiz_data.get("questions"), list):
             raise Exception("API response does not contain questions in expected format")
 
-        questions = quiz_data["questions"]
-        print("Questions:", questions)  # Debug
-
-        # Add topic to the response
-        quiz_data["topic"] = topic
+        # Drop invalid questions and shuffle the options locally
+        questions, invalid = postprocess_questions(quiz_data["questions"], stats)
+        if invalid:
+            logger.info("Dropped %d invalid questions", invalid)
+        if not questions:
+            raise Exception("API response does not contain any valid question")
+        logger.debug("Generated %d questions", len(questions))
 
-        return questions, topic
+        return questions
         
     except Exception as e:
-        raise Exception(f"Error generating quiz: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error generating quiz: {str(e)}")
+
+def shard_sizes(num_questions: int, shard_size: int) -> List[int]:
+    """
+    Splits num_questions into balanced shards of at most shard_size questions
+    """
+    if shard_size <= 0 or num_questions <= shard_size:
+        return [num_questions]
+    shards = math.ceil(num_questions / shard_size)
+    return [num_questions // shards + (1 if index < num_questions % shards else 0) for index in range(shards)]
+
+def split_into_sections(text: str, sections: int) -> List[str]:
+    """
+    Splits the content into consecutive sections of similar size, one per shard.
+    Short content that cannot be split is shared by the shards.
+    """
+    if sections <= 1:
+        return [text]
+    chunk_tokens = max(1, math.ceil(count_tokens(text, MODEL) / sections))
+    chunks = split_into_chunks(text, chunk_tokens, MODEL) or [text]
+    if len(chunks) < sections:
+        return [chunks[index % len(chunks)] for index in range(sections)]
+    return ["\n".join(chunks[index * len(chunks) // sections:(index + 1) * len(chunks) // sections])
+            for index in range(sections)]
+
+WORD = re.compile(r"\w+")
+
+def question_words(question: Dict) -> set:
+    """
+    Words of the question and of its options
+    """
+    text = " ".join([str(question.get("question", "")), *(str(option) for option in question.get("options", []))])
+    return set(WORD.findall(text.lower()))
+
+def correct_answer(question: Dict) -> str:
+    options = question.get("options") or []
+    index = question.get("correct_index")
+    if isinstance(index, int) and 0 <= index < len(options):
+        return " ".join(str(options[index]).lower().split())
+    return ""
+
+def deduplicate_questions(questions: List[Dict], threshold: float, existing: Sequence[Dict] = ()) -> List[Dict]:
+    """
+    Drops questions nearly identical to an earlier question or to an existing one:
+    the same correct answer and a Jaccard similarity of at least threshold between
+    the words of their question and options. Questions sharing a template ("Which of
+    the following is a function of ...?") but asking about different things are kept.
+    """
+    kept, kept_keys = [], [(question_words(question), correct_answer(question)) for question in existing]
+    for question in questions:
+        words, answer = question_words(question), correct_answer(question)
+        if any(answer == other_answer and words and len(words & other) / len(words | other) >= threshold
+               for other, other_answer in kept_keys):
+            continue
+        kept.append(question)
+        kept_keys.append((words, answer))
+    return kept
+
+def drop_near_duplicates(questions: List[Dict], existing: List[Dict]) -> List[Dict]:
+    """
+    Drops the questions nearly identical to an existing one or to an earlier question
+    """
+    return deduplicate_questions(questions, config.QUIZ_DEDUP_THRESHOLD, existing)
+
+async def generate_questions_sharded(text: str, num_questions: int, language: str, client: "AsyncOpenAI",
+                                     stats: Optional[Dict] = None,
+                                     existing: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    Generates the quiz questions with concurrent calls of at most QUIZ_SHARD_SIZE
+    questions, each one fed a different section of the content. A failed shard is
+    retried on its own; invalid questions and near-duplicates (of each other or of
+    the existing questions of the quiz) are dropped and the missing ones are asked
+    again, up to QUIZ_TOPUP_ATTEMPTS times. Questions still missing are reported in
+    stats["shortfall"].
+    """
+    existing = existing or []
+    sizes = shard_sizes(num_questions, config.QUIZ_SHARD_SIZE)
+    sections = split_into_sections(text, len(sizes))
+    failed_attempts = 0
+    
+    async def generate_shard(section: str, size: int) -> List[Dict]:
+        nonlocal failed_attempts
+        last_error = None
+        for attempt in range(config.QUIZ_SHARD_RETRIES + 1):
+            try:
+                return (await generate_questions(section, size, language, client, stats))[:size]
+            except Exception as e:
+                failed_attempts += 1
+                logger.warning("Error generating quiz shard (attempt %d): %s", attempt + 1, e)
+                last_error = e
+        raise last_error
+    
+    results = await asyncio.gather(*[generate_shard(section, size) for section, size in zip(sections, sizes)],
+                                   return_exceptions=True)
+    generated = [question for result in results if not isinstance(result, BaseException) for question in result]
+    failed_shards = sum(1 for result in results if isinstance(result, BaseException))
+    if not generated:
+        raise next(result for result in results if isinstance(result, BaseException))
+    
+    questions = drop_near_duplicates(generated, existing)
+    duplicates = len(generated) - len(questions)
+    top_ups = 0
+    while len(questions) < num_questions and top_ups < config.QUIZ_TOPUP_ATTEMPTS:
+        top_ups += 1
+        try:
+            extra = await generate_questions(text, num_questions - len(questions), language, client, stats)
+        except Exception as e:
+            logger.warning("Error generating missing quiz questions: %s", e)
+            continue
+        new_questions = drop_near_duplicates(extra, existing + questions)
+        duplicates += len(extra) - len(new_questions)
+        questions += new_questions
+    
+    questions = questions[:num_questions]
+    shortfall = num_questions - len(questions)
+    if shortfall:
+        logger.warning("Generated %d of %d requested questions", len(questions), num_questions)
+    if stats is not None:
+        stats["question_shards"] = {
+            "shards": len(sizes),
+            "sizes": sizes,
+            "failed_attempts": failed_attempts,
+            "failed_shards": failed_shards,
+            "duplicates_removed": duplicates,
+            "top_ups": top_ups,
+        }
+        stats["shortfall"] = shortfall
+    return questions
+
+async def stream_questions(text: str, num_questions: int, language: str, client: "AsyncOpenAI",
+                           stats: Optional[Dict] = None) -> AsyncIterator[Dict]:
+    """
+    Generates the quiz questions with a streamed completion, yielding each question
+    as soon as the model has finished writing it
+    """
+    parser = JsonArrayStreamParser("questions")
+    valid = 0
+    try:
+        # Includes the time the consumer takes between questions
+        with stage_timer(stats, "questions"):
+            stream = await client.chat.completions.create(
+                model=MODEL,
+                response_format={ "type": "json_object" },
+                messages=build_quiz_messages(text, num_questions, language),
+                max_tokens=completion_token_reserve(num_questions),
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async for chunk in stream:
+                record_usage(stats, "quiz", chunk)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    for raw in parser.feed(delta):
+                        question = postprocess_question(raw)
+                        if question is None:
+                            record_invalid(stats, 1)
+                            continue
+                        valid += 1
+                        yield question
+    except Exception as e:
+        raise Exception(f"Error generating quiz: {str(e)}")
+    
+    if valid == 0:
+        raise Exception("Error generating quiz: API response does not contain questions in expected format")
+
+async def generate_quiz(text: str, num_questions: int = 10, stats: Optional[Dict] = None,
+                        existing: Optional[List[Dict]] = None) -> Tuple[List[Dict], str]:
+    """
+    Generates a quiz using the OpenAI API, without near-duplicates of the existing
+    questions (e.g. reused from the question bank) when given.
+    If a stats dict is given it is filled with details about the pipeline stages.
+    """
+    client = get_openai_client()
+    # Detect language, identify topic and summarize
+    language, topic, text = await prepare_content(text, client, stats, num_questions)
+    
+    with stage_timer(stats, "questions"):
+        questions = await generate_questions_sharded(text, num_questions, language, client, stats, existing)
+    
+    return questions, topic
+
+def build_quiz_metadata(text: str, pdf_metadata: dict, questions: list, topic: str,
+                        pipeline_stats: dict) -> dict:
+    """
+    Builds the metadata returned along with the generated questions
+    """
+    return {
+        "original_text_length": len(text),
+        "was_summarized": "summarization" in pipeline_stats,
+        "num_questions": len(questions),
+        "pdf_info": {
+            "total_pages": pdf_metadata["total_pages"],
+            "pages_read": pdf_metadata["pages_read"],
+            "was_truncated": pdf_metadata["was_truncated"],
+            "pages_used": pdf_metadata["pages_used"]
+        },
+        "topic": topic,
+        **pipeline_stats
+    }
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import re
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from core.cache import create_cache, make_key
+from utils.tokens import count_tokens, record_usage, trim_to_tokens
+import config
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# Bump whenever the prompts below change so cached chunk summaries are invalidated
+SUMMARY_PROMPT_VERSION = "1"
+
+# Per-chunk summaries keyed by chunk hash, so overlapping documents only pay for changed chunks
+chunk_summary_cache = create_cache(
+    backend=config.SUMMARY_CACHE_BACKEND,
+    path=config.SUMMARY_CACHE_PATH,
+    max_entries=config.SUMMARY_CACHE_MAX_ENTRIES,
+    ttl=config.SUMMARY_CACHE_TTL,
+)
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def is_chunk_boundary(piece: str, piece_tokens: int, average_tokens: int) -> bool:
+    """
+    Whether a chunk ends after this piece, decided by the piece's hash alone with a
+    probability proportional to its size, so chunks average about average_tokens
+    """
+    digest = hashlib.sha256(piece.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") < (piece_tokens / average_tokens) * 2 ** 32
+
+
+def split_into_chunks(text: str, chunk_tokens: int, model: str) -> List[str]:
+    """
+    Splits the text into chunks of at most chunk_tokens tokens. The text is broken
+    into paragraphs (sentences, then hard cuts, for oversized ones) and a chunk ends
+    after a piece whose hash hits the boundary condition, or before the piece that
+    would exceed chunk_tokens. Boundaries are content-defined: an edit only changes
+    the chunks around it, so unchanged passages of a revised document produce the
+    same chunks (and hit the summary cache).
+    """
+    pieces: List[Tuple[str, int]] = []
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        paragraph_tokens = count_tokens(paragraph, model)
+        if paragraph_tokens <= chunk_tokens:
+            pieces.append((paragraph, paragraph_tokens))
+            continue
+        for sentence in SENTENCE_END.split(paragraph):
+            sentence_tokens = count_tokens(sentence, model)
+            while sentence_tokens > chunk_tokens:
+                head = trim_to_tokens(sentence, chunk_tokens, model)
+                if not head:
+                    break
+                pieces.append((head, count_tokens(head, model)))
+                sentence = sentence[len(head):]
+                sentence_tokens = count_tokens(sentence, model)
+            if sentence:
+                pieces.append((sentence, sentence_tokens))
+
+    average_tokens = max(1, chunk_tokens // 2)
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece, piece_tokens in pieces:
+        if current and current_tokens + piece_tokens + 1 > chunk_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens + 1
+        if is_chunk_boundary(piece, piece_tokens, average_tokens):
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+async def summarize_chunk(text: str, client: "AsyncOpenAI", language: str, stats: Optional[Dict] = None) -> str:
+    """
+    Generates a summary of one chunk of text using OpenAI API
+    """
+    response = await client.chat.completions.create(
+        model=config.OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": f"You are an expert at summarizing texts while maintaining key points and important concepts. Always respond in the same language as the input text ({language})."},
+            {"role": "user", "content": f"Create a detailed summary of the following text, keeping the most important concepts and information for question generation: \n\n{text}"}
+        ]
+    )
+    record_usage(stats, "summary_map", response)
+    return response.choices[0].message.content
+
+
+async def combine_summaries(summaries: List[str], client: "AsyncOpenAI", language: str,
+                            stats: Optional[Dict] = None) -> str:
+    """
+    Merges the partial summaries of consecutive chunks into a single summary
+    """
+    sections = "\n\n".join(f"[Part {index + 1}]\n{summary}" for index, summary in enumerate(summaries))
+    response = await client.chat.completions.create(
+        model=config.OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": f"You are an expert at summarizing texts while maintaining key points and important concepts. Always respond in the same language as the input text ({language})."},
+            {"role": "user", "content": f"The following are summaries of consecutive parts of one document. Combine them into a single detailed summary, keeping the most important concepts and information for question generation and covering every part: \n\n{sections}"}
+        ]
+    )
+    record_usage(stats, "summary_reduce", response)
+    return response.choices[0].message.content
+
+
+def chunk_cache_key(chunk: str, language: str) -> str:
+    """
+    Cache key of a chunk summary
+    """
+    return make_key(
+        hashlib.sha256(chunk.encode("utf-8")).hexdigest(),
+        language=language,
+        model=config.OPENAI_MODEL,
+        prompt_version=SUMMARY_PROMPT_VERSION,
+    )
+
+
+async def map_reduce_summarize(text: str, client: "AsyncOpenAI", language: str,
+                               stats: Optional[Dict] = None) -> str:
+    """
+    Summarizes the text by splitting it into chunks, summarizing the chunks concurrently
+    (at most SUMMARY_CONCURRENCY at a time, reusing cached chunk summaries) and then
+    combining the partial summaries
+    """
+    chunks = split_into_chunks(text, config.SUMMARY_CHUNK_TOKENS, config.OPENAI_MODEL)
+    semaphore = asyncio.Semaphore(max(1, config.SUMMARY_CONCURRENCY))
+    cached_chunks = 0
+
+    async def summarize(chunk: str) -> str:
+        nonlocal cached_chunks
+        key = chunk_cache_key(chunk, language)
+        cached = await chunk_summary_cache.get_async(key)
+        if cached is not None:
+            cached_chunks += 1
+            return cached["summary"]
+        async with semaphore:
+            summary = await summarize_chunk(chunk, client, language, stats)
+        await chunk_summary_cache.set_async(key, {"summary": summary})
+        return summary
+
+    started = time.perf_counter()
+    summaries = await asyncio.gather(*[summarize(chunk) for chunk in chunks])
+    map_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    if len(summaries) == 1:
+        summary = summaries[0]
+    else:
+        summary = await combine_summaries(summaries, client, language, stats)
+    reduce_seconds = time.perf_counter() - started
+
+    if stats is not None:
+        stats["summarization"] = {
+            "chunks": len(chunks),
+            "cached_chunks": cached_chunks,
+            "parallelism": min(len(chunks) - cached_chunks, max(1, config.SUMMARY_CONCURRENCY)),
+            "map_seconds": round(map_seconds, 3),
+            "reduce_seconds": round(reduce_seconds, 3),
+        }
+    return summary
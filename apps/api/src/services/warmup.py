@@ -0,0 +1,83 @@
+import asyncio
+import importlib
+import logging
+import time
+from typing import Awaitable, Callable, Dict
+
+from services import pdf_extractor
+from services.openai_client import get_openai_client
+from services.question_bank import get_question_bank
+from utils.tokens import get_encoding
+import config
+
+logger = logging.getLogger(__name__)
+
+# Modules the first OpenAI call would import: the package itself, its lazily loaded
+# chat resources and the HTTP transport, together most of a second
+OPENAI_MODULES = ["openai", "openai.resources.chat", "httpcore"]
+
+
+def build_response_models() -> None:
+    """
+    Builds the pydantic schemas of chat completions and their stream chunks,
+    which openai otherwise builds while parsing the first response
+    """
+    from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessage
+    from openai.types.chat.chat_completion import Choice
+    from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice, ChoiceDelta
+
+    for model in (ChatCompletionMessage, Choice, ChatCompletion, ChoiceDelta, ChunkChoice, ChatCompletionChunk):
+        model.model_rebuild()
+
+
+async def warm_up_openai_client() -> None:
+    # In a thread so requests served meanwhile are not blocked
+    for module in OPENAI_MODULES:
+        await asyncio.to_thread(importlib.import_module, module)
+    await asyncio.to_thread(build_response_models)
+    get_openai_client()
+
+
+async def warm_up_tokenizer() -> None:
+    await asyncio.to_thread(get_encoding, config.OPENAI_MODEL)
+
+
+async def warm_up_question_bank() -> None:
+    await asyncio.to_thread(get_question_bank)
+
+
+# Heavy dependencies loaded on first use rather than at import, in warm-up order
+WARM_UP_STEPS: Dict[str, Callable[[], Awaitable[None]]] = {
+    "pymupdf": pdf_extractor.preload_pymupdf,
+    "openai_client": warm_up_openai_client,
+    "tokenizer": warm_up_tokenizer,
+    "question_bank": warm_up_question_bank,
+}
+
+
+async def warm_up() -> Dict:
+    """
+    Loads the dependencies the first request would otherwise wait for: PyMuPDF (in
+    this process and the extraction workers), the shared OpenAI client, the tokenizer
+    and the question bank. Every step is idempotent, so calling it again only
+    confirms the process is warm. Returns the seconds spent per step and the
+    errors of the steps that failed.
+    """
+    started = time.perf_counter()
+    seconds, errors = {}, {}
+    for name, step in WARM_UP_STEPS.items():
+        step_started = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+            errors[name] = str(e)
+        seconds[name] = round(time.perf_counter() - step_started, 4)
+    total = time.perf_counter() - started
+    logger.info("Warm-up finished in %.3fs: %s", total, seconds)
+    return {
+        "status": "partial" if errors else "warm",
+        "seconds": seconds,
+        "total_seconds": round(total, 4),
+        "errors": errors,
+    }
@@ -0,0 +1,65 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+# One line of the report written by `python -X importtime` (or PYTHONPROFILEIMPORTTIME=1):
+# "import time: <self us> | <cumulative us> | <indentation><module>"
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_import_times(report: str) -> List[Dict]:
+    """
+    Parses an import time report into one entry per imported module, with its
+    own and cumulative (including the modules it imported) time in seconds and
+    its depth in the import tree. Other lines (e.g. logs) are ignored.
+    """
+    entries = []
+    for line in report.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            own, cumulative, indentation, module = match.groups()
+            entries.append({
+                "module": module,
+                "self_seconds": int(own) / 1e6,
+                "cumulative_seconds": int(cumulative) / 1e6,
+                "depth": (len(indentation) - 1) // 2,
+            })
+    return entries
+
+
+def summarize_import_times(entries: List[Dict], top: int = 25) -> Dict:
+    """
+    Total import time, the time spent in each top-level package and the slowest
+    modules by cumulative time
+    """
+    by_package = defaultdict(float)
+    for entry in entries:
+        by_package[entry["module"].split(".")[0]] += entry["self_seconds"]
+    slowest = sorted(entries, key=lambda entry: entry["cumulative_seconds"], reverse=True)[:top]
+    return {
+        "total_seconds": round(sum(entry["self_seconds"] for entry in entries), 4),
+        "packages": [{"package": package, "seconds": round(seconds, 4)}
+                     for package, seconds in sorted(by_package.items(), key=lambda item: -item[1])[:top]],
+        "slowest_modules": [{"module": entry["module"],
+                             "cumulative_seconds": round(entry["cumulative_seconds"], 4),
+                             "self_seconds": round(entry["self_seconds"], 4)} for entry in slowest],
+    }
+
+
+def profile_imports(module: str = "main", cwd: Optional[str] = None) -> List[Dict]:
+    """
+    Imports the module in a fresh interpreter with -X importtime (from the src
+    directory by default) and returns its parsed import times
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd or SRC_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_import_times(result.stderr)
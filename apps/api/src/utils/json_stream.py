@@ -0,0 +1,77 @@
+import json
+from typing import Dict, List
+
+
+class JsonArrayStreamParser:
+    """
+    Incrementally parses a streamed JSON object and returns each element of the
+    array stored under `key` as soon as that element is complete, e.g. every
+    question of {"questions": [{...}, {...}]} while the model is still writing.
+    """
+
+    def __init__(self, key: str = "questions"):
+        self.key = key
+        self._text = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_key = None
+        self._array_depth = None
+        self._item_start = None
+        self.items_parsed = 0
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """
+        Consumes the next chunk of the response and returns the newly completed items
+        """
+        text = self._text + chunk
+        items = []
+
+        for index in range(self._position, len(text)):
+            char = text[index]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = text[self._string_start + 1:index]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char in "{[":
+                if (char == "[" and self._depth == 1 and self._array_depth is None
+                        and self._last_key == self.key):
+                    self._array_depth = self._depth + 1
+                elif char == "{" and self._array_depth is not None and self._depth == self._array_depth:
+                    self._item_start = index
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if char == "}" and self._item_start is not None and self._depth == self._array_depth:
+                    items.append(json.loads(text[self._item_start:index + 1]))
+                    self._item_start = None
+                    self.items_parsed += 1
+                elif char == "]" and self._array_depth is not None and self._depth == self._array_depth - 1:
+                    self._array_depth = -1  # Array closed, ignore anything else
+
+        # Only keep the part of the text still needed: the item or string being read
+        keep_from = len(text)
+        if self._item_start is not None:
+            keep_from = self._item_start
+        elif self._in_string:
+            keep_from = self._string_start
+        self._text = text[keep_from:]
+        self._position = len(text) - keep_from
+        if self._item_start is not None:
+            self._item_start -= keep_from
+        if self._in_string:
+            self._string_start -= keep_from
+        return items
@@ -0,0 +1,152 @@
+import logging
+import re
+import threading
+from typing import Dict, Optional, Set
+
+from core.metrics import registry
+
+# Context window (prompt + completion) of the supported chat models
+MODEL_CONTEXT_TOKENS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-3.5-turbo-16k": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+}
+DEFAULT_CONTEXT_TOKENS = 16385
+
+# Tokens added by the chat format for every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+logger = logging.getLogger(__name__)
+
+OPENAI_TOKENS = registry.counter("quiz_openai_tokens_total", "Tokens reported by the OpenAI API", ["stage", "type"])
+OPENAI_CALLS = registry.counter("quiz_openai_calls_total", "OpenAI API calls reporting usage", ["stage"])
+
+_encodings: Dict[str, object] = {}
+_encodings_loading: Set[str] = set()
+_encodings_lock = threading.Lock()
+
+# Approximation used when tiktoken (or its encoding files) is unavailable:
+# words and punctuation map to roughly one token, long words to several
+APPROXIMATE_TOKEN = re.compile(r"\w{1,4}|[^\w\s]", re.UNICODE)
+
+
+def load_encoding(model: str):
+    """
+    Loads the tiktoken encoding for the model. The first load of an encoding may
+    download its files, so the API loads it at startup in a thread (see main.py).
+    """
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("tiktoken unavailable, approximating token counts: %s", e)
+        return None
+
+
+def get_encoding(model: str):
+    """
+    Returns the tiktoken encoding for the model, or None when tiktoken is not
+    installed or its encoding files cannot be loaded (e.g. offline). While another
+    thread is loading it, None is returned too (counts are approximated meanwhile)
+    rather than waiting for a download.
+    """
+    with _encodings_lock:
+        if model in _encodings:
+            return _encodings[model]
+        if model in _encodings_loading:
+            return None
+        _encodings_loading.add(model)
+    encoding = None
+    try:
+        encoding = load_encoding(model)
+    finally:
+        with _encodings_lock:
+            _encodings[model] = encoding
+            _encodings_loading.discard(model)
+    return encoding
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Counts the tokens of the text for the model
+    """
+    encoding = get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(APPROXIMATE_TOKEN.findall(text))
+
+
+def count_message_tokens(messages, model: str) -> int:
+    """
+    Counts the prompt tokens of a list of chat messages
+    """
+    return sum(count_tokens(message["content"], model) + MESSAGE_OVERHEAD_TOKENS for message in messages) + 3
+
+
+def trim_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Returns the longest prefix of the text that fits in max_tokens
+    """
+    if max_tokens <= 0:
+        return ""
+    encoding = get_encoding(model)
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens])
+
+    matches = list(APPROXIMATE_TOKEN.finditer(text))
+    if len(matches) <= max_tokens:
+        return text
+    return text[:matches[max_tokens].start()]
+
+
+def context_tokens(model: str) -> int:
+    """
+    Returns the context window of the model
+    """
+    for name in sorted(MODEL_CONTEXT_TOKENS, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_CONTEXT_TOKENS[name]
+    return DEFAULT_CONTEXT_TOKENS
+
+
+def record_usage(stats: Optional[Dict], stage: str, response) -> None:
+    """
+    Adds the token usage reported by an OpenAI response to stats["token_usage"],
+    in total and per pipeline stage
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    OPENAI_CALLS.inc(stage=stage)
+    OPENAI_TOKENS.inc(usage.prompt_tokens or 0, stage=stage, type="prompt")
+    OPENAI_TOKENS.inc(usage.completion_tokens or 0, stage=stage, type="completion")
+    if stats is None:
+        return
+
+    token_usage = stats.setdefault("token_usage", {
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "calls": 0,
+        "by_stage": {},
+    })
+    stage_usage = token_usage["by_stage"].setdefault(stage, {
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "calls": 0,
+    })
+    for totals in (token_usage, stage_usage):
+        totals["prompt_tokens"] += usage.prompt_tokens or 0
+        totals["completion_tokens"] += usage.completion_tokens or 0
+        totals["calls"] += 1
+    token_usage["total_tokens"] += usage.total_tokens or 0
@@ -0,0 +1,8 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# Quiet logs and no files written by the module-level caches of the app
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("QUESTION_BANK_PATH", "")
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.cache import ContentCache, MemoryCacheBackend, SQLiteCacheBackend
+
+
+def accessed_at(backend, key):
+    (value,) = backend._conn.execute("SELECT accessed_at FROM cache_entries WHERE key = ?", (key,)).fetchone()
+    return value
+
+
+def test_recent_hits_do_not_write(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), touch_interval=60)
+    backend.set("key", {"value": 1})
+    written = accessed_at(backend, "key")
+
+    assert backend.get("key") == {"value": 1}
+    assert accessed_at(backend, "key") == written
+
+
+def test_stale_access_time_is_refreshed(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), touch_interval=60)
+    backend.set("key", {"value": 1})
+    backend._conn.execute("UPDATE cache_entries SET accessed_at = accessed_at - 120")
+
+    stale = accessed_at(backend, "key")
+    backend.get("key")
+    assert accessed_at(backend, "key") > stale
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_entries=2, touch_interval=0)
+    backend.set("first", {"value": 1})
+    backend.set("second", {"value": 2})
+    backend.get("first")
+    backend.set("third", {"value": 3})
+
+    assert backend.get("second") is None
+    assert backend.get("first") == {"value": 1}
+
+
+@pytest.mark.parametrize("backend, blocking", [
+    (lambda path: MemoryCacheBackend(), False),
+    (lambda path: SQLiteCacheBackend(str(path / "cache.sqlite3")), True),
+])
+def test_async_access_leaves_the_loop_only_for_blocking_backends(tmp_path, backend, blocking):
+    cache = ContentCache(backend(tmp_path), ttl=60)
+    threads = []
+    get = cache.get
+
+    def recording_get(key):
+        threads.append(threading.current_thread())
+        return get(key)
+
+    cache.get = recording_get
+
+    async def run():
+        await cache.set_async("key", {"value": 1})
+        return await cache.get_async("key"), threading.current_thread()
+
+    value, loop_thread = asyncio.run(run())
+    assert value == {"value": 1}
+    assert cache.stats()["hits"] == 1
+    assert (threads[0] is not loop_thread) == blocking
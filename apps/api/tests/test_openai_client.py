@@ -0,0 +1,237 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from services.openai_client import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, ResilientOpenAI, retry_after_seconds
+)
+
+REQUEST = httpx.Request("POST", "https://api.openai.test/v1/chat/completions")
+MESSAGES = [{"role": "user", "content": "Hello"}]
+
+
+def rate_limit_error(headers=None):
+    response = httpx.Response(429, headers=headers or {}, request=REQUEST)
+    return openai.RateLimitError("Rate limited", response=response, body=None)
+
+
+def server_error():
+    return openai.InternalServerError("Server error", response=httpx.Response(500, request=REQUEST), body=None)
+
+
+def bad_request_error():
+    return openai.BadRequestError("Bad request", response=httpx.Response(400, request=REQUEST), body=None)
+
+
+def quota_error():
+    response = httpx.Response(429, request=REQUEST)
+    body = {"message": "You exceeded your current quota", "type": "insufficient_quota", "code": "insufficient_quota"}
+    return openai.RateLimitError("Quota exceeded", response=response, body=body)
+
+
+def response(total_tokens=10):
+    return SimpleNamespace(usage=SimpleNamespace(total_tokens=total_tokens))
+
+
+class FakeClient:
+    """
+    Stands in for AsyncOpenAI, raising or returning the given outcomes in order
+    """
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.api_key = "test"
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    async def close(self):
+        pass
+
+
+def resilient(client, max_retries=3, breaker=None):
+    return ResilientOpenAI(client, max_retries=max_retries, base_delay=0, max_delay=0, breaker=breaker)
+
+
+def complete(client):
+    return asyncio.run(client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES, max_tokens=5))
+
+
+def expire(breaker):
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_a_single_trial_call_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    expire(breaker)
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    expire(breaker)
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_released_trial_frees_the_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    expire(breaker)
+    breaker.before_call()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+
+
+def test_server_and_connection_errors_are_retried():
+    expected = response()
+    fake = FakeClient(server_error(), openai.APIConnectionError(request=REQUEST), expected)
+    client = resilient(fake)
+
+    assert complete(client) is expected
+    assert fake.calls == 3
+    stats = client.stats()
+    assert stats["retries"] == 2
+    assert stats["server_errors"] == 1
+    assert stats["connection_errors"] == 1
+    assert stats["circuit"] == CLOSED
+
+
+def test_rate_limits_are_retried_without_tripping_the_breaker():
+    expected = response()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    fake = FakeClient(rate_limit_error(), rate_limit_error(), expected)
+    client = resilient(fake, breaker=breaker)
+
+    assert complete(client) is expected
+    assert client.stats()["rate_limited"] == 2
+    assert breaker.state == CLOSED
+
+
+def test_last_error_is_raised_when_retries_run_out():
+    fake = FakeClient(*[server_error() for _ in range(3)])
+    client = resilient(fake, max_retries=2, breaker=CircuitBreaker(failure_threshold=0))
+
+    with pytest.raises(openai.InternalServerError):
+        complete(client)
+    assert fake.calls == 3
+    assert client.stats()["failed"] == 1
+
+
+def test_client_errors_are_not_retried():
+    fake = FakeClient(bad_request_error())
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    client = resilient(fake, breaker=breaker)
+
+    with pytest.raises(openai.BadRequestError):
+        complete(client)
+    assert fake.calls == 1
+    assert breaker.state == CLOSED
+
+
+def test_open_circuit_fails_fast():
+    fake = FakeClient(server_error(), server_error())
+    client = resilient(fake, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30))
+
+    with pytest.raises(CircuitOpenError):
+        complete(client)
+    assert fake.calls == 2
+    stats = client.stats()
+    assert stats["circuit"] == OPEN
+    assert stats["circuit_rejected"] == 1
+    assert stats["circuit_opened"] == 1
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds(httpx.Response(429, headers={"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(httpx.Response(429, headers={"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(httpx.Response(429, headers={"retry-after": "soon"})) is None
+    assert retry_after_seconds(None) is None
+
+
+def test_backoff_never_undercuts_retry_after():
+    client = ResilientOpenAI(FakeClient(), base_delay=0.1, max_delay=5)
+    assert client.backoff_delay(0, retry_after=3) == 3
+    assert client.backoff_delay(0, retry_after=60) == 5
+    assert 0 <= client.backoff_delay(10) <= 5
+
+
+def test_exhausted_quota_is_not_retried():
+    fake = FakeClient(quota_error(), response())
+    client = resilient(fake)
+
+    with pytest.raises(openai.RateLimitError):
+        complete(client)
+    assert fake.calls == 1
+    assert client.stats()["retries"] == 0
+
+
+def test_failed_attempts_give_their_tokens_back():
+    fake = FakeClient(server_error(), openai.APIConnectionError(request=REQUEST), rate_limit_error(),
+                      bad_request_error())
+    client = ResilientOpenAI(fake, tokens_per_minute=100000, max_retries=5, base_delay=0, max_delay=0)
+
+    with pytest.raises(openai.BadRequestError):
+        complete(client)
+    assert fake.calls == 4
+    assert client.tokens.tokens == pytest.approx(client.tokens.capacity, abs=1)
+
+
+def test_open_circuit_does_not_take_tokens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    client = ResilientOpenAI(FakeClient(), requests_per_minute=60, tokens_per_minute=100000, breaker=breaker)
+
+    with pytest.raises(CircuitOpenError):
+        complete(client)
+    assert client.requests.tokens == client.requests.capacity
+    assert client.tokens.tokens == client.tokens.capacity
@@ -0,0 +1,66 @@
+import asyncio
+
+import fitz  # PyMuPDF
+import pytest
+
+import config
+from services import pdf_extractor
+from services.quiz_generator import extract_text_from_bytes
+
+# About 38 characters per page, like slides or forms
+SPARSE_LINE = "Slide {number}: cell membranes and ions"
+
+
+def make_pdf(pages, text=None, image=False) -> bytes:
+    document = fitz.open()
+    for number in range(pages):
+        page = document.new_page()
+        if text:
+            page.insert_text((72, 72), text.format(number=number + 1), fontsize=12)
+        if image:
+            pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 16, 16), False)
+            pixmap.set_rect(pixmap.irect, (200, 200, 200))
+            page.insert_image(fitz.Rect(72, 100, 272, 300), pixmap=pixmap)
+    content = document.tobytes()
+    document.close()
+    return content
+
+
+@pytest.fixture(autouse=True)
+def no_ocr(monkeypatch):
+    monkeypatch.setattr(config, "PDF_OCR_BACKEND", "")
+
+
+def classify(content: bytes):
+    return pdf_extractor.classify_pages(content, config.PDF_PRESCAN_PAGES, config.PDF_PRESCAN_MIN_CHARS)
+
+
+def test_sparse_text_pdf_is_classified_as_text():
+    classification = classify(make_pdf(10, SPARSE_LINE))
+    assert classification["kind"] == pdf_extractor.TEXT
+    assert classification["text_pages"] == classification["sampled_pages"]
+
+
+def test_sparse_text_pdf_is_extracted():
+    text, metadata = asyncio.run(extract_text_from_bytes(make_pdf(10, SPARSE_LINE)))
+    assert "Slide 1: cell membranes and ions" in text
+    assert metadata["total_pages"] == 10
+
+
+def test_sparse_text_pdf_with_images_is_extracted():
+    text, _ = asyncio.run(extract_text_from_bytes(make_pdf(4, SPARSE_LINE, image=True)))
+    assert "Slide 4" in text
+
+
+def test_image_only_pdf_is_rejected():
+    content = make_pdf(3, image=True)
+    assert classify(content)["kind"] == pdf_extractor.SCANNED
+    with pytest.raises(pdf_extractor.ScannedPdfError):
+        asyncio.run(extract_text_from_bytes(content))
+
+
+def test_blank_pdf_is_rejected():
+    content = make_pdf(3)
+    assert classify(content)["kind"] == pdf_extractor.EMPTY
+    with pytest.raises(pdf_extractor.ScannedPdfError):
+        asyncio.run(extract_text_from_bytes(content))
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+import config
+from services import question_bank
+from services import quiz_generator
+from services.question_bank import QuestionBank, generate_quiz_from_bank
+
+SHARED = ("Mitochondria produce ATP through cellular respiration. "
+          "Ribosomes assemble proteins from amino acids. ")
+OTHER = "Chloroplasts capture light energy during photosynthesis. "
+
+
+def question(stem, answer):
+    return {"question": stem, "options": [answer, "Storing genes", "Digesting waste", "None of these"],
+            "correct_index": 0}
+
+
+MITOCHONDRIA = question("Which organelle produces ATP?", "Mitochondria")
+RIBOSOME = question("Which organelle assembles proteins?", "Ribosomes")
+CHLOROPLAST = question("Which organelle captures light energy?", "Chloroplasts")
+
+
+@pytest.fixture
+def bank(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.sqlite3"))
+    yield bank
+    bank.close()
+
+
+@pytest.fixture
+def fake_generate_quiz(monkeypatch):
+    """
+    Replaces the OpenAI calls of generate_quiz: the questions come from the given
+    batches, one per call
+    """
+    batches, calls = [], []
+
+    async def prepare_content(text, client, stats=None, num_questions=10):
+        return "English", "Cell biology", text
+
+    async def generate_questions(text, num_questions, language, client, stats=None):
+        calls.append(num_questions)
+        return batches.pop(0)[:num_questions]
+
+    monkeypatch.setattr(quiz_generator, "get_openai_client", lambda: None)
+    monkeypatch.setattr(quiz_generator, "prepare_content", prepare_content)
+    monkeypatch.setattr(quiz_generator, "generate_questions", generate_questions)
+    monkeypatch.setattr(config, "QUIZ_SHARD_SIZE", 0)
+    monkeypatch.setattr(config, "QUIZ_TOPUP_ATTEMPTS", 2)
+    # One chunk per sentence, so documents sharing a sentence share a chunk
+    monkeypatch.setattr(config, "QUESTION_BANK_CHUNK_SENTENCES", 1)
+    return batches, calls
+
+
+def test_questions_are_reused_for_documents_sharing_passages(bank, fake_generate_quiz):
+    batches, calls = fake_generate_quiz
+    batches.extend([[MITOCHONDRIA, RIBOSOME], [CHLOROPLAST]])
+
+    first, _ = asyncio.run(generate_quiz_from_bank(SHARED, 2, "document-a", bank=bank))
+    stats = {}
+    second, topic = asyncio.run(generate_quiz_from_bank(OTHER + SHARED, 3, "document-b", stats, bank=bank))
+
+    assert first == [MITOCHONDRIA, RIBOSOME]
+    assert calls == [2, 1]
+    assert sorted(q["question"] for q in second) == sorted(
+        q["question"] for q in [MITOCHONDRIA, RIBOSOME, CHLOROPLAST])
+    assert stats["question_bank"] == {"reused": 2, "generated": 1}
+    assert stats["shortfall"] == 0
+    assert topic == "Cell biology"
+
+
+def test_same_document_is_served_from_the_bank(bank, fake_generate_quiz):
+    batches, calls = fake_generate_quiz
+    batches.append([MITOCHONDRIA, RIBOSOME])
+
+    asyncio.run(generate_quiz_from_bank(SHARED, 2, "document-a", bank=bank))
+    again, topic = asyncio.run(generate_quiz_from_bank(SHARED, 2, "document-a", bank=bank))
+
+    assert calls == [2]
+    assert again == [MITOCHONDRIA, RIBOSOME]
+    assert topic == "Cell biology"
+
+
+def test_generated_duplicates_of_reused_questions_are_topped_up(bank, fake_generate_quiz):
+    batches, calls = fake_generate_quiz
+    rephrased = question("Which organelle produces the ATP?", "Mitochondria")
+    batches.extend([[MITOCHONDRIA], [rephrased, CHLOROPLAST], [RIBOSOME]])
+
+    asyncio.run(generate_quiz_from_bank(SHARED, 1, "document-a", bank=bank))
+    stats = {}
+    questions, _ = asyncio.run(generate_quiz_from_bank(SHARED, 3, "document-b", stats, bank=bank))
+
+    assert [q["question"] for q in questions] == [q["question"] for q in [MITOCHONDRIA, CHLOROPLAST, RIBOSOME]]
+    assert calls == [1, 2, 1]
+    assert stats["question_bank"] == {"reused": 1, "generated": 2}
+    assert stats["shortfall"] == 0
+    assert bank.stats()["questions"] == 3
+
+
+def test_shortfall_is_reported_when_top_ups_only_repeat_the_bank(bank, fake_generate_quiz):
+    batches, calls = fake_generate_quiz
+    rephrased = question("Which organelle produces the ATP?", "Mitochondria")
+    batches.extend([[MITOCHONDRIA], [rephrased, CHLOROPLAST], [rephrased], [rephrased]])
+
+    asyncio.run(generate_quiz_from_bank(SHARED, 1, "document-a", bank=bank))
+    stats = {}
+    questions, _ = asyncio.run(generate_quiz_from_bank(SHARED, 3, "document-b", stats, bank=bank))
+
+    assert len(questions) == 2
+    assert calls == [1, 2, 1, 1]
+    assert stats["shortfall"] == 1
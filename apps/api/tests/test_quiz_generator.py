@@ -0,0 +1,91 @@
+import asyncio
+
+import config
+from services import quiz_generator
+from services.quiz_generator import deduplicate_questions, drop_near_duplicates
+
+
+def question(stem, options, correct_index=0):
+    return {"question": stem, "options": options, "correct_index": correct_index}
+
+
+def test_questions_sharing_a_template_are_kept():
+    questions = [
+        question("Which of the following is a function of the mitochondria?",
+                 ["Producing ATP", "Storing genes", "Making proteins", "Digesting waste"]),
+        question("Which of the following is a function of the ribosome?",
+                 ["Producing ATP", "Storing genes", "Making proteins", "Digesting waste"], 2),
+    ]
+    assert deduplicate_questions(questions, 0.8) == questions
+
+
+def test_rephrased_question_with_the_same_answer_is_dropped():
+    options = ["Producing ATP", "Storing genes", "Making proteins", "Digesting waste"]
+    first = question("Which of the following is a function of the mitochondria?", options)
+    again = question("Which of the following is the function of the mitochondria?", options)
+    assert deduplicate_questions([first, again], 0.8) == [first]
+
+
+def test_same_answer_with_different_wording_is_kept():
+    first = question("What do mitochondria produce?", ["ATP", "DNA", "RNA", "Glucose"])
+    other = question("Which molecule stores energy released by cellular respiration?",
+                     ["ATP", "Starch", "Lipids", "Water"])
+    assert deduplicate_questions([first, other], 0.8) == [first, other]
+
+
+def test_drop_near_duplicates_keeps_only_new_questions():
+    options = ["Producing ATP", "Storing genes", "Making proteins", "Digesting waste"]
+    existing = question("Which of the following is a function of the mitochondria?", options)
+    rephrased = question("Which of the following is the function of the mitochondria?", options)
+    other = question("Which of the following is a function of the ribosome?", options, 2)
+    assert drop_near_duplicates([rephrased, other], [existing]) == [other]
+
+
+def fake_generator(batches):
+    """
+    Stands in for generate_questions, returning the given batches in order
+    """
+    calls = []
+
+    async def generate_questions(text, num_questions, language, client, stats=None):
+        calls.append(num_questions)
+        return batches[len(calls) - 1][:num_questions]
+
+    return generate_questions, calls
+
+
+def distinct_questions(count, offset=0):
+    return [question(f"Question number {number} about topic {number}?",
+                     [f"answer {number}", f"wrong {number}", "other", "none"])
+            for number in range(offset, offset + count)]
+
+
+def test_missing_questions_are_topped_up(monkeypatch):
+    repeated = distinct_questions(1) * 4
+    generate_questions, calls = fake_generator([repeated, distinct_questions(3, 10)])
+    monkeypatch.setattr(quiz_generator, "generate_questions", generate_questions)
+    monkeypatch.setattr(config, "QUIZ_SHARD_SIZE", 0)
+    stats = {}
+
+    questions = asyncio.run(quiz_generator.generate_questions_sharded("text", 4, "English", None, stats))
+
+    assert len(questions) == 4
+    assert calls == [4, 3]
+    assert stats["shortfall"] == 0
+    assert stats["question_shards"]["duplicates_removed"] == 3
+
+
+def test_shortfall_is_reported_when_top_ups_run_out(monkeypatch):
+    repeated = distinct_questions(1) * 4
+    generate_questions, calls = fake_generator([repeated] * 3)
+    monkeypatch.setattr(quiz_generator, "generate_questions", generate_questions)
+    monkeypatch.setattr(config, "QUIZ_SHARD_SIZE", 0)
+    monkeypatch.setattr(config, "QUIZ_TOPUP_ATTEMPTS", 2)
+    stats = {}
+
+    questions = asyncio.run(quiz_generator.generate_questions_sharded("text", 4, "English", None, stats))
+
+    assert len(questions) == 1
+    assert len(calls) == 3
+    assert stats["shortfall"] == 3
+    assert stats["question_shards"]["top_ups"] == 2
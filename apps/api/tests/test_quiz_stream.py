@@ -0,0 +1,94 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import main
+
+
+def chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], usage=None)
+
+
+class OverProducingClient:
+    """
+    Streams more questions than requested, in small pieces
+    """
+
+    def __init__(self, produced):
+        self.produced = produced
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        questions = [{"question": f"Which organelle is number {number}?",
+                      "options": [f"Organelle {number}", f"Vesicle {number}", f"Granule {number}", f"Fiber {number}"],
+                      "correct_index": number % 4} for number in range(self.produced)]
+        content = json.dumps({"questions": questions})
+
+        async def stream():
+            for start in range(0, len(content), 40):
+                yield chunk(content[start:start + 40])
+
+        return stream()
+
+
+def parse_events(body: str):
+    events = []
+    for block in body.replace("\r\n", "\n").split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    async def extract_text_from_file(pdf, stats=None):
+        return "Cells contain organelles.", {"total_pages": 1, "pages_read": 1, "was_truncated": False,
+                                             "pages_used": [1]}
+
+    async def prepare_content_stages(text, client, stats, num_questions):
+        yield "language", "English"
+        yield "topic", "Cell biology"
+        yield "content", text
+
+    monkeypatch.setattr(main, "extract_text_from_file", extract_text_from_file)
+    monkeypatch.setattr(main, "prepare_content_stages", prepare_content_stages)
+    monkeypatch.setattr(main, "get_openai_client", lambda: OverProducingClient(produced=7))
+
+
+def stream_quiz(num_questions, content=b"%PDF-1.4 over-producing"):
+    from sse_starlette.sse import AppStatus
+
+    # sse_starlette binds its shutdown event to the first event loop it runs on
+    AppStatus.should_exit_event = None
+
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            response = await client.post("/generate-quiz/stream", params={"num_questions": num_questions},
+                                         files={"file": ("quiz.pdf", content, "application/pdf")})
+            return parse_events(response.text)
+
+    return asyncio.run(send())
+
+
+def test_stream_sends_at_most_the_requested_questions(fake_pipeline):
+    events = stream_quiz(3)
+
+    questions = [data for name, data in events if name == "question"]
+    assert [data["index"] for data in questions] == [0, 1, 2]
+    done = [data for name, data in events if name == "done"][0]
+    assert done["num_questions"] == 3
+    assert done["shortfall"] == 0
+
+
+def test_cached_stream_keeps_the_requested_count(fake_pipeline):
+    content = b"%PDF-1.4 cached over-producing"
+    stream_quiz(3, content)
+    events = stream_quiz(3, content)
+
+    assert len([name for name, _ in events if name == "question"]) == 3
+    assert [data for name, data in events if name == "done"][0]["cache_hit"] is True
@@ -0,0 +1,62 @@
+import asyncio
+import inspect
+
+import httpx
+import pytest
+
+import main
+
+QUESTIONS = [{"question": "What do mitochondria produce?", "options": ["ATP", "DNA", "RNA", "Starch"],
+              "correct_index": 0}]
+
+
+def requests(*calls):
+    """
+    Sends (method, url, kwargs) requests to the app in order and returns the responses
+    """
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            return [await client.request(method, url, **kwargs) for method, url, kwargs in calls]
+
+    return asyncio.run(send())
+
+
+@pytest.mark.parametrize("handler", [
+    main.get_quiz_cache, main.save_quiz_cache, main.delete_quiz_cache,
+    main.get_result_cache, main.save_result_cache, main.delete_result_cache,
+])
+def test_session_handlers_run_in_the_threadpool(handler):
+    assert not inspect.iscoroutinefunction(handler)
+
+
+def test_quiz_cache_round_trip():
+    payload = {"session_id": "session-1", "questions": QUESTIONS,
+               "metadata": {"totalPages": 1, "original_text_length": 500, "was_summarized": False,
+                            "num_questions": 1, "topic": "Cells"}}
+    session = {"params": {"session_id": "session-1"}}
+    saved, loaded, deleted, missing = requests(("POST", "/api/cache", {"json": payload}),
+                                               ("GET", "/api/cache", session),
+                                               ("DELETE", "/api/cache", session),
+                                               ("GET", "/api/cache", session))
+
+    assert saved.status_code == 200
+    assert loaded.json()["questions"] == QUESTIONS
+    assert deleted.status_code == 200
+    assert missing.status_code == 404
+
+
+def test_result_cache_round_trip():
+    payload = {"session_id": "session-2", "userName": "Ada", "userAnswers": [0], "questions": QUESTIONS}
+    saved, mismatch, loaded, deleted, missing = requests(
+        ("POST", "/api/cache/results/session-2", {"json": payload}),
+        ("POST", "/api/cache/results/other", {"json": payload}),
+        ("GET", "/api/cache/results/session-2", {}),
+        ("DELETE", "/api/cache/results/session-2", {}),
+        ("GET", "/api/cache/results/session-2", {}))
+
+    assert saved.status_code == 200
+    assert mismatch.status_code == 400
+    assert loaded.json()["userAnswers"] == [0]
+    assert deleted.status_code == 200
+    assert missing.status_code == 404
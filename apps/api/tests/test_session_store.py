@@ -0,0 +1,115 @@
+import time
+
+import fakeredis
+import pytest
+
+from core.payloads import SessionPayloadCache
+from core.session_store import MemorySessionStore, RedisSessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_store(request, tmp_path):
+    """
+    Creates stores of one backend; stores made by the same factory share it
+    """
+    client = fakeredis.FakeRedis()
+    created = []
+
+    def make(namespace="sessions", ttl=60.0, **kwargs):
+        if request.param == "memory":
+            store = MemorySessionStore(ttl=ttl, sweep_interval=0, **kwargs)
+        elif request.param == "sqlite":
+            store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl=ttl, namespace=namespace, **kwargs)
+        else:
+            store = RedisSessionStore(ttl=ttl, namespace=namespace, client=client)
+        created.append(store)
+        return store
+
+    yield make
+    for store in created:
+        store.close()
+
+
+def test_set_get_delete(make_store):
+    store = make_store()
+    assert store.get("a") is None
+    store.set("a", b"1")
+    assert store.get("a") == b"1"
+    store.set("a", b"2")
+    assert store.get("a") == b"2"
+    assert len(store) == 1
+    assert store.delete("a")
+    assert not store.delete("a")
+    assert store.get("a") is None
+
+
+def test_entries_expire_after_ttl(make_store):
+    store = make_store(ttl=0.05)
+    store.set("short", b"1")
+    store.set("long", b"2", ttl=60)
+    time.sleep(0.1)
+    assert store.get("short") is None
+    assert store.get("long") == b"2"
+
+
+def test_set_many(make_store):
+    store = make_store()
+    store.set_many({f"key{index}": str(index).encode() for index in range(10)})
+    assert len(store) == 10
+    assert store.get("key7") == b"7"
+
+
+def test_namespaces_are_isolated(make_store):
+    quizzes, results = make_store("quiz"), make_store("result")
+    if isinstance(quizzes, MemorySessionStore):
+        pytest.skip("memory stores are separate objects, not namespaces")
+    quizzes.set("session", b"quiz")
+    results.set("session", b"result")
+    assert quizzes.get("session") == b"quiz"
+    assert results.get("session") == b"result"
+    results.clear()
+    assert quizzes.get("session") == b"quiz"
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemorySessionStore(ttl=60, max_entries=3, sweep_interval=0)
+    for key in "abc":
+        store.set(key, b"x")
+    store.get("a")
+    store.set("d", b"x")
+    assert store.get("b") is None
+    assert {key for key in "acd" if store.get(key) is not None} == set("acd")
+    assert store.evictions == 1
+
+
+def test_sqlite_store_evicts_oldest_sessions_in_batches(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl=60, max_entries=10, evict_batch=5)
+    for index in range(14):
+        store.set(f"key{index}", b"x")
+    # Checked on the 5th, 10th... write: 14 sessions until the next check
+    assert len(store) == 14
+    store.set("key14", b"x")
+    assert len(store) == 10
+    assert store.get("key4") is None
+    assert store.get("key5") == b"x"
+    assert store.stats()["evictions"] == 5
+    store.close()
+
+
+def test_payload_cache_saves_both_stores_in_one_round_trip(make_store, monkeypatch):
+    sessions, question_sets = make_store("quiz"), make_store("questions")
+    cache = SessionPayloadCache(sessions, question_sets, compress_min_bytes=64)
+    if isinstance(sessions, RedisSessionStore):
+        pipelines = []
+        original = sessions.client.pipeline
+        monkeypatch.setattr(sessions.client, "pipeline", lambda **kwargs: pipelines.append(kwargs) or original(**kwargs))
+        monkeypatch.setattr(sessions.client, "set", None)
+
+    questions = [{"question": f"Question {index}?", "options": ["a", "b", "c", "d"], "correct_index": 0}
+                 for index in range(5)]
+    cache.save("session", {"questions": questions, "topic": "Biology"})
+
+    assert cache.load("session").decode("utf-8").startswith('{"questions":[{"question":"Question 0?"')
+    assert len(question_sets) == 1
+    if isinstance(sessions, RedisSessionStore):
+        assert len(pipelines) == 1
@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from services.summarizer import split_into_chunks
+from utils.tokens import count_tokens
+
+MODEL = "gpt-4o-mini"
+WORDS = ("cell membrane protein enzyme energy glucose oxygen carbon nucleus gene "
+         "ribosome transport osmosis diffusion gradient signal receptor hormone").split()
+
+
+def paragraph(seed: int) -> str:
+    rng = random.Random(seed)
+    sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize() + "."
+                 for _ in range(rng.randint(1, 3))]
+    return " ".join(sentences)
+
+
+def document(paragraphs):
+    return "\n\n".join(paragraphs)
+
+
+def test_chunks_respect_the_token_limit():
+    chunks = split_into_chunks(document(paragraph(seed) for seed in range(60)), 400, MODEL)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk, MODEL) <= 400 for chunk in chunks)
+
+
+@pytest.mark.parametrize("position", [1, 5, 30, 45])
+def test_inserting_a_paragraph_keeps_the_other_chunks(position):
+    paragraphs = [paragraph(seed) for seed in range(60)]
+    original = split_into_chunks(document(paragraphs), 400, MODEL)
+    revised = split_into_chunks(document(paragraphs[:position] + [paragraph(1000)] + paragraphs[position:]),
+                                400, MODEL)
+
+    # Only the chunk holding the new paragraph changes
+    reused = set(original) & set(revised)
+    assert len(reused) >= len(original) - 1